@@ -1,8 +1,12 @@
 # Association Rules API Views
-from APP01.association_rules import get_gear_recommendations, refresh_association_rules
+from APP01.association_rules import get_gear_recommendations, get_refresh_job, start_refresh_job
+from APP01.instrumentation import metrics_snapshot
+from APP01.pro_matching import DEFAULT_MATCHES, find_similar_pros, parse_setting
+from APP01.setup_optimizer import DEFAULT_SETUPS, parse_budget, recommend_budget_setups
 from django.views.decorators.http import require_http_methods
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
+from django.urls import reverse
 # from .views import is_admin  <-- Circular import risk
 
 def is_admin(user):
@@ -21,6 +25,7 @@ def api_gear_recommendations(request):
         gear_ids: List of gear IDs already selected
         top_n: Number of recommendations (default 5)
         exclude_types: List of gear types to exclude (optional)
+        game: Game id, to use that game's pros' rules (optional)
     
     Returns:
         JSON with recommended gears and their confidence scores
@@ -30,12 +35,13 @@ def api_gear_recommendations(request):
         gear_ids = data.get('gear_ids', [])
         top_n = data.get('top_n', 5)
         exclude_types = data.get('exclude_types', [])
+        game = data.get('game')
         
         if not gear_ids:
             return JsonResponse({'error': 'No gear IDs provided'}, status=400)
         
         # Get recommendations
-        recommendations = get_gear_recommendations(gear_ids, top_n, exclude_types)
+        recommendations = get_gear_recommendations(gear_ids, top_n, exclude_types, game)
         
         # Format response
         results = []
@@ -69,26 +75,143 @@ def api_gear_recommendations(request):
 @login_required
 def api_refresh_association_rules(request):
     """
-    Admin-only endpoint to manually refresh association rules cache.
+    Admin-only endpoint to refresh the association rules cache.
 
-    Triggers recalculation of association rules from current preset data.
+    Starts (or joins) the background refresh job and returns immediately
+    with its id; poll api_association_rules_job for the outcome.
     """
     if not is_admin(request.user):
         return JsonResponse({'success': False, 'message': 'Permission denied'}, status=403)
 
     try:
-        success = refresh_association_rules()
-        
-        if success:
-            return JsonResponse({
-                'success': True,
-                'message': 'Association rules refreshed successfully'
-            })
-        else:
-            return JsonResponse({
-                'success': False,
-                'message': 'Failed to refresh rules - insufficient data'
-            }, status=400)
-            
+        job = start_refresh_job()
+        return JsonResponse({
+            'success': True,
+            'message': 'Association rules refresh started',
+            'job_id': job['id'],
+            'status': job['status'],
+            'status_url': reverse('api_association_rules_job', args=[job['id']]),
+        }, status=202)
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
+
+
+@require_http_methods(["GET"])
+@login_required
+def api_association_rules_job(request, job_id):
+    """
+    Admin-only status of an association rules refresh job.
+
+    Returns:
+        JSON with id, status (queued / running / done / failed), timestamps,
+        and the rule count or failure message once finished
+    """
+    if not is_admin(request.user):
+        return JsonResponse({'success': False, 'message': 'Permission denied'}, status=403)
+
+    job = get_refresh_job(job_id)
+    if job is None:
+        return JsonResponse({'success': False, 'message': 'Unknown job'}, status=404)
+    return JsonResponse({'success': True, **job})
+
+
+@require_http_methods(["GET"])
+def api_pro_matches(request):
+    """
+    Nearest pro players for a user's mouse settings.
+
+    GET params:
+        game: Game ID
+        dpi: Mouse DPI
+        sensitivity: In-game sensitivity
+        k: Number of players (default 5, max 20)
+
+    Returns:
+        JSON with players ordered by distance (eDPI / sensitivity)
+    """
+    try:
+        game_id = int(request.GET['game'])
+        dpi = parse_setting(request.GET['dpi'])
+        sensitivity = parse_setting(request.GET['sensitivity'])
+        k = int(request.GET.get('k', DEFAULT_MATCHES))
+    except KeyError as e:
+        return JsonResponse({'error': f'Missing parameter: {e.args[0]}'}, status=400)
+    except ValueError:
+        return JsonResponse({'error': 'game and k must be numbers, dpi and sensitivity positive numbers'}, status=400)
+
+    players = find_similar_pros(game_id, dpi, sensitivity, k)
+    return JsonResponse({
+        'success': True,
+        'edpi': round(dpi * sensitivity, 2),
+        'players': players,
+        'count': len(players)
+    })
+
+
+@require_http_methods(["GET"])
+def api_budget_setups(request):
+    """
+    Best full setups whose total price fits a budget.
+
+    GET params:
+        budget: Total budget (USD)
+        genre, hand_size, grip: Quiz answers
+        mousepad: 1 to include a mousepad (optional)
+        top: Number of setups (default 3, max 10)
+
+    Returns:
+        JSON with setups ordered by total recommender score
+    """
+    try:
+        budget = parse_budget(request.GET['budget'])
+        top = max(1, min(int(request.GET.get('top', DEFAULT_SETUPS)), 10))
+    except KeyError as e:
+        return JsonResponse({'error': f'Missing parameter: {e.args[0]}'}, status=400)
+    except ValueError:
+        return JsonResponse({'error': 'budget must be a positive number and top a number'}, status=400)
+
+    user_prefs = {
+        'genre': request.GET.get('genre', 'FPS'),
+        'hand_size': request.GET.get('hand_size', 'Medium'),
+        'grip': request.GET.get('grip', 'Palm'),
+    }
+    setups = recommend_budget_setups(
+        user_prefs, budget, include_mousepad=request.GET.get('mousepad') == '1', top=top
+    )
+
+    results = []
+    for setup in setups:
+        items = {}
+        for category, entry in setup['items'].items():
+            gear = entry['gear']
+            items[category] = {
+                'gear_id': gear.gear_id,
+                'name': gear.name,
+                'brand': gear.brand,
+                'price': str(gear.price),
+                'score': round(float(entry['score']), 2),
+                'reasons': entry['reasons'],
+            }
+        results.append({'score': setup['score'], 'price': str(setup['price']), 'items': items})
+
+    return JsonResponse({
+        'success': True,
+        'budget': budget,
+        'setups': results,
+        'count': len(results)
+    })
+
+
+@require_http_methods(["GET"])
+@login_required
+def api_metrics(request):
+    """
+    Admin-only recommender stage counters of the worker serving the request.
+
+    Returns:
+        JSON with pid and, per stage, count / total_ms / avg_ms / max_ms /
+        rows scanned / queries issued (see instrumentation.py)
+    """
+    if not is_admin(request.user):
+        return JsonResponse({'success': False, 'message': 'Permission denied'}, status=403)
+    return JsonResponse({'success': True, **metrics_snapshot()})
@@ -1,35 +1,297 @@
 """
 Association Rule Mining Module for Gaming Gear Matcher
 
-This module implements Market Basket Analysis using the Apriori algorithm
-to recommend gaming gear based on patterns in user preset data.
+This module implements Market Basket Analysis to recommend gaming gear
+based on patterns in pro player setups (or user presets).
+
+Frequent itemsets come from one of the mlxtend backends in ALGORITHMS:
+apriori, fpgrowth (the default; same itemsets, without Apriori's candidate
+generation) or fpmax (maximal itemsets only, so fewer and longer rules).
+Transactions (pro players, user presets or both) are streamed from the
+database into a SciPy CSR matrix (TransactionMatrix), then handed to the
+backends as a sparse one-hot DataFrame by default; `max_len` caps the
+itemset size (MAX_ITEMSET_LEN when unset for pro player apriori / fpgrowth
+rules, so mining and the incremental counts give the same rule set).
+
+Pro player rules (apriori / fpgrowth) are not re-mined on refresh: they
+come from the itemset counts incremental_rules.py keeps up to date as
+ProPlayerGear rows change.
+
+Rule snapshots are served stale-while-revalidate: past CACHE_TIMEOUT (soft
+TTL) the snapshot is still used while start_refresh_job() recomputes it in
+a background thread; the cache.add lock makes that a single job across
+processes, and its status is kept under association_rules_job_<id>.
+Snapshots expire for good after HARD_TIMEOUT.
+
+Rules are kept per partition: the global one (all pros) plus one per Game
+with enough pros, mined in parallel worker processes by
+refresh_game_partitions(). get_recommendations(game=...) uses the game's
+partition and falls back to the global rules.
 """
 
+import itertools
+import multiprocessing
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+import threading
+import time
+import uuid
+import warnings
+
+import numpy as np
 import pandas as pd
-from typing import List, Dict, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+import django
 from django.core.cache import cache
+from django.db import connection
 from django.db.models import Q
-from mlxtend.frequent_patterns import apriori, association_rules
-from mlxtend.preprocessing import TransactionEncoder
+from mlxtend.frequent_patterns import apriori, association_rules, fpgrowth, fpmax
+from scipy.sparse import csr_matrix
 import logging
 
-from APP01.models import Preset, PresetGear, GamingGear
+from APP01.incremental_rules import MAX_ITEMSET_LEN, apply_pending_changes, get_rule_counts, has_pending_changes
+from APP01.instrumentation import timed
+from APP01.leaderboards import top_gear_ids
+from APP01.models import Preset, PresetGear, ProPlayerGear, GamingGear
 
 logger = logging.getLogger(__name__)
 
+# Columns read from recommended gears (API response and matching_result.html)
+HYDRATE_FIELDS = ('gear_id', 'name', 'type', 'brand', 'price', 'image', 'pro_usage_count')
+
+ALGORITHMS = {'apriori': apriori, 'fpgrowth': fpgrowth, 'fpmax': fpmax}
+TRANSACTION_SOURCES = ('pro_players', 'presets', 'all')
+ROW_CHUNK_SIZE = 5000
+# Smallest number of pro setups for a Game to get its own rules
+PARTITION_MIN_TRANSACTIONS = 20
+# Below this many transactions in all, starting worker processes costs more than mining inline
+PARALLEL_MIN_TRANSACTIONS = 50000
+
+RULES_VERSION_KEY = "association_rules_version"
+VERSION_CHECK_SECONDS = 5
+
+REFRESH_LOCK_KEY = "association_rules_refresh_lock"
+REFRESH_LOCK_TIMEOUT = 60 * 10
+REFRESH_RETRY_SECONDS = 60 * 5
+JOB_KEY = "association_rules_job_{}"
+JOB_TIMEOUT = 60 * 60 * 24
+
+GEAR_TYPES_CACHE_KEY = "association_rules_gear_types"
+GEAR_TYPES_TIMEOUT = 60 * 60 * 24
+
+
+# This process's compiled copy of each partition's rules (L1 in front of the shared cache)
+_lock = threading.Lock()
+_local = {}  # game id (None = global) -> {version, index, checked_at, published_at}
+
+
+def get_gear_type_map() -> Dict[int, str]:
+    """gear_id -> type for the whole catalog, cached until a gear changes."""
+    gear_types = cache.get(GEAR_TYPES_CACHE_KEY)
+    if gear_types is None:
+        gear_types = dict(GamingGear.objects.values_list('gear_id', 'type'))
+        cache.set(GEAR_TYPES_CACHE_KEY, gear_types, GEAR_TYPES_TIMEOUT)
+    return gear_types
+
+
+def invalidate_gear_type_map():
+    """Called on GamingGear changes (signals.py)."""
+    cache.delete(GEAR_TYPES_CACHE_KEY)
+
+
+class TransactionMatrix:
+    """
+    Transactions as a SciPy CSR matrix: one row per transaction, one column
+    per gear (`items` holds the gear id of each column).
+    """
+
+    def __init__(self, matrix: csr_matrix, items: np.ndarray):
+        self.matrix = matrix
+        self.items = items
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    @classmethod
+    def from_rows(cls, *row_streams, min_items: int = 2) -> 'TransactionMatrix':
+        """
+        Build from (transaction_id, gear_id) streams, each ordered by transaction_id.
+
+        Rows are consumed one at a time into flat index arrays, so memory is
+        the size of the matrix, not of the Python rows. Transactions with
+        fewer than `min_items` gears are skipped.
+        """
+        codes = {}
+        indices = array('i')
+        indptr = array('q', [0])
+        for rows in row_streams:
+            for _key, group in itertools.groupby(rows, key=lambda row: row[0]):
+                basket = {gear_id for _key, gear_id in group}
+                if len(basket) >= min_items:
+                    indices.extend(sorted(codes.setdefault(gear_id, len(codes)) for gear_id in basket))
+                    indptr.append(len(indices))
+        items = np.empty(len(codes), dtype=np.int64)
+        for gear_id, code in codes.items():
+            items[code] = gear_id
+        indices = np.frombuffer(indices, dtype=np.int32) if indices else np.zeros(0, dtype=np.int32)
+        indptr = np.frombuffer(indptr, dtype=np.int64)
+        data = np.ones(len(indices), dtype=bool)
+        return cls(csr_matrix((data, indices, indptr), shape=(len(indptr) - 1, len(codes))), items)
+
+    def frame(self, min_support: float = 0.0, sparse_columns: bool = True) -> pd.DataFrame:
+        """
+        One-hot DataFrame (gear id string columns) for the mlxtend backends.
+
+        Gears below min_support can't be in any frequent itemset, so their
+        columns are dropped first; every row stays, so supports keep the
+        same denominator.
+        """
+        counts = np.bincount(self.matrix.indices, minlength=len(self.items))
+        keep = np.flatnonzero(counts >= min_support * len(self))
+        matrix = self.matrix[:, keep]
+        columns = [str(gear_id) for gear_id in self.items[keep]]
+        if sparse_columns:
+            with warnings.catch_warnings():
+                # pandas warns about the implicit fill_value of boolean sparse columns
+                warnings.simplefilter('ignore', FutureWarning)
+                return pd.DataFrame.sparse.from_spmatrix(matrix, columns=columns)
+        return pd.DataFrame(matrix.toarray(), columns=columns)
+
+
+def _with_subset_supports(maximal: pd.DataFrame, transaction_df: pd.DataFrame) -> pd.DataFrame:
+    """fpmax output plus the (counted) support of every proper subset; `maximal` marks the original rows."""
+    known = set(maximal['itemsets'])
+    columns = {}
+
+    def column(item):
+        if item not in columns:
+            columns[item] = np.asarray(transaction_df[item], dtype=bool)
+        return columns[item]
+
+    subsets = []
+    for itemset in maximal['itemsets']:
+        for size in range(1, len(itemset)):
+            for subset in itertools.combinations(sorted(itemset), size):
+                subset = frozenset(subset)
+                if subset in known:
+                    continue
+                known.add(subset)
+                hits = np.logical_and.reduce([column(item) for item in subset])
+                subsets.append({'support': hits.mean(), 'itemsets': subset, 'maximal': False})
+
+    return pd.concat(
+        [maximal.assign(maximal=True), pd.DataFrame(subsets, columns=['support', 'itemsets', 'maximal'])],
+        ignore_index=True,
+    )
+
+
+RULES_FORMAT = 1
+
+
+def compact_rules(rules: pd.DataFrame) -> Dict:
+    """
+    The cacheable form of mined rules: no pandas, no frozensets.
+
+    Items (gear ids) are coded as positions in `items`; antecedents and
+    consequents are CSR-style (flat int32 codes plus offsets), and the
+    metrics are float arrays, all in mined order.
+    """
+    antecedents = [sorted(int(item) for item in a) for a in rules['antecedents']]
+    consequents = [sorted(int(item) for item in c) for c in rules['consequents']]
+    items = np.unique(np.fromiter(
+        (item for group in (antecedents, consequents) for rule in group for item in rule), dtype=np.int64,
+    ))
+
+    def encode(groups):
+        offsets = np.zeros(len(groups) + 1, dtype=np.int32)
+        offsets[1:] = np.cumsum([len(g) for g in groups])
+        flat = np.fromiter((item for g in groups for item in g), dtype=np.int64, count=int(offsets[-1]))
+        return offsets, np.searchsorted(items, flat).astype(np.int32)
+
+    antecedent_offsets, antecedent_codes = encode(antecedents)
+    consequent_offsets, consequent_codes = encode(consequents)
+    return {
+        'format': RULES_FORMAT,
+        'items': items,
+        'antecedent_offsets': antecedent_offsets,
+        'antecedent_codes': antecedent_codes,
+        'consequent_offsets': consequent_offsets,
+        'consequent_codes': consequent_codes,
+        'confidence': rules['confidence'].to_numpy(dtype=np.float64),
+        'lift': rules['lift'].to_numpy(dtype=np.float64),
+        'score': rules['score'].to_numpy(dtype=np.float64),
+    }
+
+
+class RuleIndex:
+    """
+    Mined rules compiled for lookup, built from a compact_rules() payload.
+
+    Keeps an item -> rule ids inverted index over the antecedents, so a cart
+    only touches rules that share at least one item with it; a rule fires
+    when all of its antecedent items were hit. Rule ids follow the mined
+    order (score descending), which keeps the recommendation order of the
+    old full scan.
+    """
+
+    def __init__(self, payload: Dict):
+        items = [str(item) for item in payload['items'].tolist()]
+        a_offsets = payload['antecedent_offsets'].tolist()
+        a_codes = payload['antecedent_codes'].tolist()
+        c_offsets = payload['consequent_offsets'].tolist()
+        c_codes = payload['consequent_codes'].tolist()
+
+        self.antecedent_sizes: List[int] = [end - start for start, end in zip(a_offsets, a_offsets[1:])]
+        self.consequents: List[Tuple[str, ...]] = [
+            tuple(items[code] for code in c_codes[start:end]) for start, end in zip(c_offsets, c_offsets[1:])
+        ]
+        self.confidence: List[float] = payload['confidence'].tolist()
+        self.lift: List[float] = payload['lift'].tolist()
+        self.score: List[float] = payload['score'].tolist()
+        self.by_item: Dict[str, List[int]] = {}
+        for rule_id, (start, end) in enumerate(zip(a_offsets, a_offsets[1:])):
+            for code in a_codes[start:end]:
+                self.by_item.setdefault(items[code], []).append(rule_id)
+
+    @classmethod
+    def from_rules(cls, rules: pd.DataFrame) -> 'RuleIndex':
+        return cls(compact_rules(rules))
+
+    def __len__(self):
+        return len(self.consequents)
+
+    def matching_rules(self, selected_set) -> List[int]:
+        """Ids of the rules whose antecedents are all in selected_set, in mined order."""
+        hits: Dict[int, int] = {}
+        for item in selected_set:
+            for rule_id in self.by_item.get(item, ()):
+                hits[rule_id] = hits.get(rule_id, 0) + 1
+        return sorted(rule_id for rule_id, count in hits.items() if count == self.antecedent_sizes[rule_id])
+
 
 class AssociationRuleMiner:
     """
     Association Rule Mining engine for gear recommendations.
     
-    Uses Apriori algorithm to find frequent itemsets and generate 
-    association rules from user preset data.
+    Finds frequent itemsets with the selected mlxtend algorithm and
+    generates association rules from pro player (or preset) data.
     """
     
     CACHE_KEY_PREFIX = "association_rules"
-    CACHE_TIMEOUT = 60 * 60 * 24  # 24 hours
+    CACHE_TIMEOUT = 60 * 60 * 24  # 24 hours: soft TTL, older snapshots are refreshed in the background
+    HARD_TIMEOUT = 60 * 60 * 24 * 7  # snapshots are dropped after a week without a refresh
     
-    def __init__(self, min_support: float = 0.05, min_confidence: float = 0.3, min_lift: float = 1.0):
+    def __init__(
+        self,
+        min_support: float = 0.05,
+        min_confidence: float = 0.3,
+        min_lift: float = 1.0,
+        algorithm: str = 'fpgrowth',
+        max_len: Optional[int] = None,
+        sparse: bool = True,
+        source: str = 'pro_players',
+    ):
         """
         Initialize the association rule miner.
         
@@ -37,65 +299,112 @@ class AssociationRuleMiner:
             min_support: Minimum support threshold (0-1)
             min_confidence: Minimum confidence threshold (0-1)
             min_lift: Minimum lift threshold (typically >= 1.0)
+            algorithm: Frequent itemset backend, one of ALGORITHMS
+            max_len: Largest itemset size to mine (None = unlimited, or MAX_ITEMSET_LEN
+                when supports_incremental)
+            sparse: One-hot encode transactions into a sparse DataFrame
+            source: Transactions to mine, one of TRANSACTION_SOURCES
         """
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown algorithm {algorithm!r} (choose from {', '.join(ALGORITHMS)})")
+        if source not in TRANSACTION_SOURCES:
+            raise ValueError(f"Unknown transaction source {source!r} (choose from {', '.join(TRANSACTION_SOURCES)})")
         self.min_support = min_support
         self.min_confidence = min_confidence
         self.min_lift = min_lift
+        self.algorithm = algorithm
+        self.max_len = max_len
+        self.sparse = sparse
+        self.source = source
     
     def build_transaction_data(self) -> pd.DataFrame:
         """
-        Build transaction data from ProPlayerGear model (Pro Player Patterns).
+        Build transaction data from the configured source.
         
         Returns:
-            DataFrame with transaction data in format suitable for Apriori
+            One-hot DataFrame (gear id columns) suitable for the mining backends
         """
-        logger.info("Building transaction data from Pro Players...")
-        
-        from APP01.models import ProPlayer
-        
-        # Fetch all players with their gears
-        # We use ProPlayer as the 'Transaction' and their gears as the 'Items'
-        players = ProPlayer.objects.prefetch_related('proplayergear_set__gear').all()
-        
-        if not players.exists():
-            logger.warning("No pro players found in database")
-            return pd.DataFrame()
-        
-        # Build transactions: each player is a transaction containing gear IDs
-        transactions = []
-        for player in players:
-            gear_ids = [
-                str(pg.gear.gear_id) 
-                for pg in player.proplayergear_set.all() 
-                if pg.gear
-            ]
-            # Only add transactions with at least 2 items (to find associations)
-            if len(gear_ids) >= 2:
-                transactions.append(gear_ids)
-        
-        if not transactions:
-            logger.warning("No valid transactions found (need players with >= 2 items)")
+        transactions = self.build_transaction_matrix()
+        if not len(transactions):
+            logger.warning("No valid transactions found (need transactions with >= 2 items)")
             return pd.DataFrame()
         
-        # Convert to one-hot encoded DataFrame
-        te = TransactionEncoder()
-        te_ary = te.fit(transactions).transform(transactions)
-        df = pd.DataFrame(te_ary, columns=te.columns_)
-        
-        logger.info(f"Built {len(df)} transactions from Pro Players with {len(df.columns)} unique gears")
+        df = transactions.frame(self.min_support, sparse_columns=self.sparse)
+        logger.info(f"Built {len(df)} transactions from {self.source} with {len(df.columns)} frequent gears")
         return df
     
-    def mine_association_rules(self, transaction_df: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    def build_transaction_matrix(self) -> TransactionMatrix:
+        """Stream the source's (transaction, gear) rows into a CSR matrix."""
+        return TransactionMatrix.from_rows(*self.transaction_rows())
+    
+    def transaction_rows(self) -> List[Iterable[Tuple[int, int]]]:
         """
-        Mine association rules using Apriori algorithm.
+        (transaction_id, gear_id) row streams of the configured source.
+        
+        Each ProPlayer or user Preset is a transaction; rows are read with
+        iterator() so large tables are not loaded into memory at once.
+        """
+        streams = []
+        if self.source in ('pro_players', 'all'):
+            streams.append(
+                ProPlayerGear.objects.filter(gear__isnull=False).order_by('player_id')
+                .values_list('player_id', 'gear_id').iterator(chunk_size=ROW_CHUNK_SIZE)
+            )
+        if self.source in ('presets', 'all'):
+            streams.append(
+                PresetGear.objects.order_by('preset_id')
+                .values_list('preset_id', 'gear_id').iterator(chunk_size=ROW_CHUNK_SIZE)
+            )
+        return streams
+    
+    @property
+    def supports_incremental(self) -> bool:
+        """Pro player rules from apriori / fpgrowth can be kept up to date by incremental_rules."""
+        return self.source == 'pro_players' and self.algorithm != 'fpmax'
+    
+    @property
+    def itemset_max_len(self) -> Optional[int]:
+        """Largest itemset size actually mined, the same whether the rules are mined or counted."""
+        if self.max_len is None and self.supports_incremental:
+            return MAX_ITEMSET_LEN
+        return self.max_len
+    
+    def compute_rules(self) -> pd.DataFrame:
+        """Current rules: from the incrementally maintained counts when supported, else mined."""
+        if self.supports_incremental:
+            return get_rule_counts(self).rules_frame()
+        return self.mine_association_rules()
+    
+    def find_frequent_itemsets(self, transaction_df: pd.DataFrame) -> pd.DataFrame:
+        """Frequent itemsets from the selected backend (fpmax: maximal ones plus their subsets' supports)."""
+        mine = ALGORITHMS[self.algorithm]
+        frequent_itemsets = mine(
+            transaction_df,
+            min_support=self.min_support,
+            use_colnames=True,
+            max_len=self.itemset_max_len,
+        )
+        if self.algorithm == 'fpmax' and not frequent_itemsets.empty:
+            # association_rules() needs the support of every antecedent / consequent
+            frequent_itemsets = _with_subset_supports(frequent_itemsets, transaction_df)
+        return frequent_itemsets
+    
+    def mine_association_rules(
+        self, transaction_df: Optional[Union[pd.DataFrame, TransactionMatrix]] = None
+    ) -> pd.DataFrame:
+        """
+        Mine association rules with the selected algorithm.
         
         Args:
-            transaction_df: Pre-built transaction DataFrame. If None, will build from database.
+            transaction_df: Pre-built one-hot DataFrame or TransactionMatrix. If None, will build from database;
+                an empty one (e.g. a Game partition without baskets) gives no rules.
             
         Returns:
             DataFrame containing association rules with metrics (support, confidence, lift)
         """
-        if transaction_df is None or transaction_df.empty:
+        if isinstance(transaction_df, TransactionMatrix):
+            transaction_df = transaction_df.frame(self.min_support, sparse_columns=self.sparse)
+        if transaction_df is None:
             transaction_df = self.build_transaction_data()
         
         if transaction_df.empty:
@@ -104,12 +413,8 @@ class AssociationRuleMiner:
         
         try:
             # Find frequent itemsets
-            logger.info(f"Mining frequent itemsets with min_support={self.min_support}...")
-            frequent_itemsets = apriori(
-                transaction_df, 
-                min_support=self.min_support, 
-                use_colnames=True
-            )
+            logger.info(f"Mining frequent itemsets ({self.algorithm}) with min_support={self.min_support}...")
+            frequent_itemsets = self.find_frequent_itemsets(transaction_df)
             
             if frequent_itemsets.empty:
                 logger.warning("No frequent itemsets found. Try lowering min_support.")
@@ -132,6 +437,11 @@ class AssociationRuleMiner:
             # Filter by lift
             rules = rules[rules['lift'] >= self.min_lift]
             
+            if self.algorithm == 'fpmax':
+                # Only rules that split a maximal itemset
+                maximal = set(frequent_itemsets.loc[frequent_itemsets['maximal'], 'itemsets'])
+                rules = rules[[a | c in maximal for a, c in zip(rules['antecedents'], rules['consequents'])]]
+            
             # Sort by confidence * lift for quality
             rules['score'] = rules['confidence'] * rules['lift']
             rules = rules.sort_values('score', ascending=False)
@@ -143,11 +453,13 @@ class AssociationRuleMiner:
             logger.error(f"Error mining association rules: {e}", exc_info=True)
             return pd.DataFrame()
     
+    @timed('association_rules.get_recommendations')
     def get_recommendations(
         self, 
         gear_ids: List[int], 
         top_n: int = 5,
-        exclude_types: Optional[List[str]] = None
+        exclude_types: Optional[List[str]] = None,
+        game: Optional[int] = None
     ) -> List[Dict]:
         """
         Get gear recommendations based on selected gears using association rules.
@@ -156,98 +468,91 @@ class AssociationRuleMiner:
             gear_ids: List of gear IDs already selected
             top_n: Number of recommendations to return
             exclude_types: Gear types to exclude (e.g., types already in preset)
+            game: Game id whose pros' rules to use (falls back to all pros)
             
         Returns:
             List of dicts with keys: gear_id, gear, confidence, lift, score
         """
-        # Try to get cached rules
-        cache_key = f"{self.CACHE_KEY_PREFIX}_rules"
-        rules = cache.get(cache_key)
-        
-        if rules is None or rules.empty:
-            # Mine rules and cache them
-            rules = self.mine_association_rules()
-            if not rules.empty:
-                cache.set(cache_key, rules, self.CACHE_TIMEOUT)
-        
-        if rules.empty:
+        index = self.get_rule_index(game) if game is not None else None
+        if not index:
+            index = self.get_rule_index()
+        if not index:
+            # Rules are being computed in the background; popular gears fill in meanwhile
             logger.warning("No association rules available for recommendations")
-            return []
         
         # Convert gear_ids to string set (as stored in rules)
         selected_set = set(str(gid) for gid in gear_ids)
         
-        # Find rules where antecedents match selected gears
-        recommendations = []
+        # Only rules whose antecedents are all selected (inverted index lookup).
+        # Collect candidate ids first, keeping the best rule per consequent.
+        best_rule = {}
+        for rule_id in (index.matching_rules(selected_set) if index else ()):
+            for gear_id_str in index.consequents[rule_id]:
+                if gear_id_str in selected_set:
+                    continue
+                try:
+                    gear_id = int(gear_id_str)
+                except ValueError:
+                    continue
+                if gear_id not in best_rule or index.score[rule_id] > index.score[best_rule[gear_id]]:
+                    best_rule[gear_id] = rule_id
         
-        for _, rule in rules.iterrows():
-            antecedents = rule['antecedents']
-            consequents = rule['consequents']
-            
-            # Check if selected gears contain the antecedents
-            if antecedents.issubset(selected_set):
-                # Add consequents that are not already selected
-                for gear_id_str in consequents:
-                    if gear_id_str not in selected_set:
-                        try:
-                            gear_id = int(gear_id_str)
-                            gear = GamingGear.objects.get(gear_id=gear_id)
-                            
-                            # Filter by type if needed
-                            if exclude_types and gear.type in exclude_types:
-                                continue
-                            
-                            # Dampen confidence to be more realistic (max 98%)
-                            # Real world systems rarely show 100% unless it's a hard bundle
-                            # Formula: 70% + (confidence * 25%) 
-                            # This maps 0.5 -> 82.5%, 1.0 -> 95%
-                            realistic_confidence = 0.70 + (float(rule['confidence']) * 0.25)
-                            
-                            recommendations.append({
-                                'gear_id': gear_id,
-                                'gear': gear,
-                                'confidence': realistic_confidence,
-                                'confidence_percent': realistic_confidence * 100,
-                                'lift': float(rule['lift']),
-                                'score': float(rule['score'])
-                            })
-                        except (GamingGear.DoesNotExist, ValueError):
-                            continue
+        # Filter by type from the cached id -> type map, before touching any row
+        if exclude_types:
+            gear_types = get_gear_type_map()
+            best_rule = {
+                gid: rule_id for gid, rule_id in best_rule.items()
+                if gear_types.get(gid) not in exclude_types
+            }
         
-        # Remove duplicates (keep highest score)
-        seen = {}
-        for rec in recommendations:
-            gid = rec['gear_id']
-            if gid not in seen or rec['score'] > seen[gid]['score']:
-                seen[gid] = rec
+        ranked = sorted(best_rule, key=lambda gid: index.score[best_rule[gid]], reverse=True)[:top_n]
+        gears = GamingGear.objects.only(*HYDRATE_FIELDS).in_bulk(ranked) if ranked else {}
         
-        # Sort by score and return top N
-        final_recs = sorted(seen.values(), key=lambda x: x['score'], reverse=True)
+        final_recs = []
+        for gear_id in ranked:
+            gear = gears.get(gear_id)
+            # Deleted since mining, or re-typed since the type map was built
+            if gear is None or (exclude_types and gear.type in exclude_types):
+                continue
+            rule_id = best_rule[gear_id]
+            
+            # Dampen confidence to be more realistic (max 98%)
+            # Real world systems rarely show 100% unless it's a hard bundle
+            # Formula: 70% + (confidence * 25%) 
+            # This maps 0.5 -> 82.5%, 1.0 -> 95%
+            realistic_confidence = 0.70 + (index.confidence[rule_id] * 0.25)
+            
+            final_recs.append({
+                'gear_id': gear_id,
+                'gear': gear,
+                'confidence': realistic_confidence,
+                'confidence_percent': realistic_confidence * 100,
+                'lift': index.lift[rule_id],
+                'score': index.score[rule_id]
+            })
         
         # === Fallback / augmentation for Chair or missing info ===
         # If we don't have enough recommendations (e.g. < 3), add popular items
-        from django.db.models import Count
         if len(final_recs) < top_n:
             needed = top_n - len(final_recs)
             existing_ids = set(r['gear_id'] for r in final_recs) | set(gear_ids)
             
             # Categories to try adding if missing
             # Only add if we don't have a recommendation for this type yet?
-            # Or just general popular items
+            # Or just general popular items (this game's pros first, if given)
             
-            popular = GamingGear.objects.annotate(
-                usage_count=Count('proplayergear')
-            ).exclude(
-                gear_id__in=existing_ids
-            ).order_by('-usage_count')[:10]
+            ranked = top_gear_ids(needed, game=game, exclude=existing_ids) if game is not None else []
+            if len(ranked) < needed:
+                ranked += top_gear_ids(needed - len(ranked), exclude=existing_ids | set(ranked))
+            popular = GamingGear.objects.only(*HYDRATE_FIELDS).in_bulk(ranked) if ranked else {}
             
-            for gear in popular:
+            for gear in (popular[gid] for gid in ranked if gid in popular):
                 if len(final_recs) >= top_n:
                     break
                 
                 # Synthetic confidence for popular items (60-80%)
                 # Based on popularity relative to max
-                pop_score = 0.60 + (min(gear.usage_count, 50) / 200.0) 
+                pop_score = 0.60 + (min(gear.pro_usage_count, 50) / 200.0) 
                 
                 final_recs.append({
                     'gear_id': gear.gear_id,
@@ -260,19 +565,150 @@ class AssociationRuleMiner:
                 
         return final_recs[:top_n]
     
-    def refresh_cache(self) -> bool:
+    def get_rule_index(self, game: Optional[int] = None) -> Optional[RuleIndex]:
+        """
+        The compiled rules of a partition (a Game id, or None for all pros),
+        from this process's copy while the partition's version holds.
+
+        The version key is checked at most every VERSION_CHECK_SECONDS; the
+        payload itself is only fetched (and compiled) when the version changed.
+        Stale-while-revalidate: a snapshot older than CACHE_TIMEOUT is still
+        served while a background job recomputes it, and without a global
+        snapshot (first start, past HARD_TIMEOUT) None is returned while the
+        job runs, so no request pays for mining. Games without enough pros
+        have no partition.
         """
-        Refresh the cached association rules.
+        local = _local.setdefault(game, {'version': None, 'index': None, 'checked_at': 0.0, 'published_at': 0.0})
+        now = time.monotonic()
+        # A Game without a partition is remembered too (index None), until its version moves
+        known = local['index'] is not None or game is not None
+        if known and now - local['checked_at'] < VERSION_CHECK_SECONDS:
+            return local['index']
+
+        version = cache.get(_version_key(game))
+        if known and version == local['version']:
+            local['checked_at'] = now
+            if local['index'] is not None:
+                self._revalidate_if_stale(local['published_at'])
+            return local['index']
+
+        payload = cache.get(self._rules_key(version, game)) if version is not None else None
+        if payload is not None and payload.get('format') == RULES_FORMAT:
+            index = RuleIndex(payload)
+            published_at = payload.get('published_at', 0.0)
+            with _lock:
+                local.update(version=version, index=index, checked_at=now, published_at=published_at)
+            self._revalidate_if_stale(published_at)
+            return index
+
+        if game is None:
+            start_refresh_job(self)
+        else:
+            with _lock:
+                local.update(version=version, index=None, checked_at=now, published_at=0.0)
+        return None
+    
+    def _rules_key(self, version: int, game: Optional[int] = None) -> str:
+        if game is None:
+            return f"{self.CACHE_KEY_PREFIX}_rules_v{version}"
+        return f"{self.CACHE_KEY_PREFIX}_rules_g{game}_v{version}"
+    
+    def _revalidate_if_stale(self, published_at: float):
+        if time.time() - published_at > self.CACHE_TIMEOUT:
+            start_refresh_job(self)
+    
+    def publish_rules(self, rules: pd.DataFrame, game: Optional[int] = None) -> RuleIndex:
+        """Store a partition's rules under a new version; other processes pick it up on their next check."""
+        payload = compact_rules(rules)
+        payload['published_at'] = time.time()
+        version = time.time_ns()
+        # Payload first, so a worker that sees the new version can always load it
+        cache.set(self._rules_key(version, game), payload, self.HARD_TIMEOUT)
+        cache.set(_version_key(game), version, self.HARD_TIMEOUT)
+        index = RuleIndex(payload)
+        with _lock:
+            _local[game] = {
+                'version': version, 'index': index, 'checked_at': time.monotonic(),
+                'published_at': payload['published_at'],
+            }
+        return index
+    
+    def game_transactions(self) -> Dict[int, TransactionMatrix]:
+        """
+        Pro player transactions split by Game, from one ordered ProPlayerGear stream.
+
+        Games with fewer than PARTITION_MIN_TRANSACTIONS usable setups are left
+        out (their users get the global rules). Presets have no game.
+        """
+        if self.source == 'presets':
+            return {}
+        rows = (
+            ProPlayerGear.objects.filter(gear__isnull=False, player__game__isnull=False)
+            .order_by('player__game_id', 'player_id')
+            .values_list('player__game_id', 'player_id', 'gear_id')
+            .iterator(chunk_size=ROW_CHUNK_SIZE)
+        )
+        partitions = {}
+        for game_id, group in itertools.groupby(rows, key=lambda row: row[0]):
+            transactions = TransactionMatrix.from_rows((player_id, gear_id) for _game, player_id, gear_id in group)
+            if len(transactions) >= PARTITION_MIN_TRANSACTIONS:
+                partitions[game_id] = transactions
+        return partitions
+    
+    def refresh_game_partitions(self, max_workers: Optional[int] = None) -> Dict[int, int]:
+        """
+        Mine every Game partition and publish each under its own version key.
+
+        Partitions are mined in a ProcessPoolExecutor (spawned workers that
+        only receive the CSR matrices, so they never touch the database);
+        max_workers=0 mines them in this process, and so does the default
+        (None) while the partitions hold fewer than PARALLEL_MIN_TRANSACTIONS
+        transactions in all. Returns {game_id: rules}.
+        """
+        partitions = self.game_transactions()
+        small = sum(len(m) for m in partitions.values()) < PARALLEL_MIN_TRANSACTIONS
+        if max_workers == 0 or (max_workers is None and small) or len(partitions) <= 1:
+            mined = {game_id: self.mine_association_rules(m) for game_id, m in partitions.items()}
+        else:
+            workers = min(max_workers or os.cpu_count() or 1, len(partitions))
+            with ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context('spawn'), initializer=django.setup,
+            ) as pool:
+                futures = {
+                    game_id: pool.submit(_mine_partition, self.options(), m) for game_id, m in partitions.items()
+                }
+                mined = {game_id: future.result() for game_id, future in futures.items()}
+        
+        for game_id, rules in mined.items():
+            if not rules.empty:
+                self.publish_rules(rules, game=game_id)
+        return {game_id: len(rules) for game_id, rules in mined.items()}
+    
+    def options(self) -> Dict:
+        """Constructor arguments, to rebuild this miner in a worker process."""
+        return {
+            'min_support': self.min_support,
+            'min_confidence': self.min_confidence,
+            'min_lift': self.min_lift,
+            'algorithm': self.algorithm,
+            'max_len': self.max_len,
+            'sparse': self.sparse,
+            'source': self.source,
+        }
+    
+    def refresh_cache(self, max_workers: Optional[int] = None) -> bool:
+        """
+        Refresh the cached association rules (global and per Game).
         
         Returns:
             True if successful, False otherwise
         """
         logger.info("Refreshing association rules cache...")
         try:
-            rules = self.mine_association_rules()
+            rules = self.compute_rules()
             if not rules.empty:
-                cache_key = f"{self.CACHE_KEY_PREFIX}_rules"
-                cache.set(cache_key, rules, self.CACHE_TIMEOUT)
+                self.publish_rules(rules)
+                self.refresh_game_partitions(max_workers)
                 logger.info("Successfully refreshed association rules cache")
                 return True
             return False
@@ -281,6 +717,15 @@ class AssociationRuleMiner:
             return False
 
 
+def _mine_partition(options: Dict, transactions: TransactionMatrix) -> pd.DataFrame:
+    """ProcessPoolExecutor task: mine one partition's transactions."""
+    return AssociationRuleMiner(**options).mine_association_rules(transactions)
+
+
+def _version_key(game: Optional[int] = None) -> str:
+    return RULES_VERSION_KEY if game is None else f"{RULES_VERSION_KEY}_g{game}"
+
+
 # Global instance
 _miner_instance = None
 
@@ -292,7 +737,77 @@ def get_miner() -> AssociationRuleMiner:
     return _miner_instance
 
 
-def get_gear_recommendations(gear_ids: List[int], top_n: int = 5, exclude_types: Optional[List[str]] = None) -> List[Dict]:
+def start_refresh_job(miner: Optional[AssociationRuleMiner] = None, partitions: bool = True) -> Dict:
+    """
+    Recompute the rules in a background thread, one job at a time across processes.
+
+    The lock (cache.add) holds the running job's id, so a caller that finds a
+    job in progress gets that job back instead of starting another.
+    partitions=False only folds logged pro basket changes into the global
+    rules (incremental_rules.py), without re-mining the Game partitions.
+    """
+    miner = miner or get_miner()
+    job_id = uuid.uuid4().hex
+    if not cache.add(REFRESH_LOCK_KEY, job_id, REFRESH_LOCK_TIMEOUT):
+        running = cache.get(REFRESH_LOCK_KEY)
+        return get_refresh_job(running) or {'id': running, 'status': 'running'}
+
+    job = {'id': job_id, 'status': 'queued', 'created_at': time.time()}
+    cache.set(JOB_KEY.format(job_id), job, JOB_TIMEOUT)
+    threading.Thread(
+        target=_refresh_thread, args=(miner, job, partitions), name=f'association-rules-{job_id[:8]}', daemon=True,
+    ).start()
+    return job
+
+
+def get_refresh_job(job_id: Optional[str]) -> Optional[Dict]:
+    """Status of a refresh job: queued / running / done / failed."""
+    return cache.get(JOB_KEY.format(job_id)) if job_id else None
+
+
+def _run_refresh_job(miner: AssociationRuleMiner, job: Dict, partitions: bool = True):
+    job.update(status='running', started_at=time.time())
+    cache.set(JOB_KEY.format(job['id']), job, JOB_TIMEOUT)
+    try:
+        if not partitions:
+            job.update(status='done', players=apply_pending_changes(miner))
+            return
+        rules = miner.compute_rules()
+        if rules.empty:
+            job.update(status='failed', message='Insufficient data for association rules')
+        else:
+            miner.publish_rules(rules)
+            partitions = miner.refresh_game_partitions()
+            job.update(status='done', rules=len(rules), partitions=partitions)
+    except Exception as e:
+        logger.error(f"Association rules refresh job failed: {e}", exc_info=True)
+        job.update(status='failed', message=str(e))
+    finally:
+        job['finished_at'] = time.time()
+        cache.set(JOB_KEY.format(job['id']), job, JOB_TIMEOUT)
+        if job['status'] == 'failed':
+            # Keep the lock a while so stale readers don't retry on every check
+            cache.set(REFRESH_LOCK_KEY, job['id'], REFRESH_RETRY_SECONDS)
+        else:
+            cache.delete(REFRESH_LOCK_KEY)
+            # Basket changes logged while this job held the lock (players=None: another
+            # process is applying them and re-checks the log itself)
+            applied = partitions or job.get('players') is not None
+            if applied and miner.supports_incremental and has_pending_changes():
+                start_refresh_job(miner, partitions=False)
+
+
+def _refresh_thread(miner: AssociationRuleMiner, job: Dict, partitions: bool = True):
+    try:
+        _run_refresh_job(miner, job, partitions)
+    finally:
+        # The thread's own database connection
+        connection.close()
+
+
+def get_gear_recommendations(
+    gear_ids: List[int], top_n: int = 5, exclude_types: Optional[List[str]] = None, game: Optional[int] = None
+) -> List[Dict]:
     """
     Convenience function to get gear recommendations.
     
@@ -300,12 +815,13 @@ def get_gear_recommendations(gear_ids: List[int], top_n: int = 5, exclude_types:
         gear_ids: List of gear IDs already selected
         top_n: Number of recommendations to return
         exclude_types: Gear types to exclude
+        game: Game id to pick that game's rule partition
         
     Returns:
         List of recommendation dicts
     """
     miner = get_miner()
-    return miner.get_recommendations(gear_ids, top_n, exclude_types)
+    return miner.get_recommendations(gear_ids, top_n, exclude_types, game)
 
 
 def refresh_association_rules() -> bool:
@@ -0,0 +1,276 @@
+"""
+Recommender benchmark suite.
+
+Generates synthetic GamingGear / ProPlayer / ProPlayerGear catalogs whose
+spec strings are sampled from the scraped files in data/ (numeric values
+are perturbed), then times the recommender and association rule entry
+points on them. Each operation reports p50/p95 latency, peak traced memory
+and the number of SQL queries, so results can be diffed across commits.
+
+Every catalog is built inside a transaction that is rolled back, and a
+private in-memory cache is used so mined rules never reach the real cache.
+Run it through `python manage.py benchmark_recommender`.
+"""
+
+import json
+import os
+import time
+import tracemalloc
+
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from .association_rules import HYDRATE_FIELDS, TRANSACTION_SOURCES, AssociationRuleMiner
+from .incremental_rules import RuleCounts, load_baskets
+from .leaderboards import popular_gears, reset_leaderboards
+from .models import Game, GamingGear, Preset, PresetGear, ProPlayer, ProPlayerGear, User
+from .pro_usage import recount_all_pro_usage
+from .recommender_hybrid import SETUP_CATEGORIES, HybridRecommender
+from .recommender_vectorized import VectorizedRecommender
+
+SIZES = {'1k': 1_000, '10k': 10_000, '100k': 100_000, '1M': 1_000_000}
+
+DATA_FILES = {
+    'Mouse': 'mice_data.json',
+    'Keyboard': 'keyboards_data.json',
+    'Headset': 'headsets_data.json',
+    'Monitor': 'monitors_data.json',
+    'Chair': 'chairs_data.json',
+}
+
+GAMES = ['Valorant', 'Counter-Strike 2', 'Dota 2', 'League of Legends', 'Apex Legends']
+
+BENCHMARK_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'recommender-benchmark',
+    }
+}
+
+BENCHMARK_PREFS = {'genre': 'FPS', 'hand_size': 'Medium', 'grip': 'Claw'}
+
+# (label, AssociationRuleMiner options) compared on every transaction source;
+# dense apriori is the pre-fpgrowth baseline
+MINING_BACKENDS = [
+    ('apriori,dense', {'algorithm': 'apriori', 'sparse': False}),
+    ('apriori', {'algorithm': 'apriori'}),
+    ('fpgrowth', {'algorithm': 'fpgrowth'}),
+    ('fpmax', {'algorithm': 'fpmax'}),
+]
+
+
+def parse_size(value):
+    """'10k' / '1M' / '2500' -> number of GamingGear rows."""
+    return SIZES.get(value) or int(value)
+
+
+def load_spec_templates():
+    templates = {}
+    for category, filename in DATA_FILES.items():
+        with open(os.path.join(settings.BASE_DIR, 'data', filename), encoding='utf-8') as f:
+            templates[category] = json.load(f)
+    return templates
+
+
+def synthesize_specs(category, template, rng):
+    """Copy a real spec dict and perturb the values the recommenders read."""
+    specs = dict(template)
+    if category == 'Mouse':
+        specs['Weight'] = f"{rng.uniform(40, 120):.0f}"
+        dims = str(specs.get('H / W / L (cm)') or '').split('/')
+        if len(dims) == 3:
+            dims[2] = f"{rng.normal(12.2, 0.6):.2f}"
+            specs['H / W / L (cm)'] = ' / '.join(part.strip() for part in dims)
+    elif category == 'Monitor':
+        specs['Refresh Rate'] = str(rng.choice(['144', '165', '240', '280', '360', '480', '540']))
+        specs['Resolution'] = str(rng.choice(['1920×1080', '2560×1440', '3840×2160']))
+    elif category == 'Chair':
+        specs['Max weight'] = str(rng.choice(['', '120', '130', '150', '180']))
+    # Same distribution as import_real_data: a quarter of the rows have no reviews
+    if rng.random() < 0.75:
+        specs['sentiment_score'] = int(rng.integers(-3, 21)) / 2.0
+    return specs
+
+
+def build_synthetic_catalog(rows, seed=0, batch_size=5000):
+    """
+    Insert `rows` GamingGear rows spread evenly over the setup categories,
+    plus one ProPlayer per 10 gears, each using one gear per category with
+    a Zipf-like popularity skew (so the miners find frequent itemsets), and
+    as many user Presets of 2-5 gears drawn from the same skew.
+
+    Returns {'gears', 'players', 'player_gears', 'presets', 'preset_gears'} counts.
+    """
+    rng = np.random.default_rng(seed)
+    templates = load_spec_templates()
+
+    gears = []
+    for i in range(rows):
+        category = SETUP_CATEGORIES[i % len(SETUP_CATEGORIES)]
+        template = templates[category][(i // len(SETUP_CATEGORIES)) % len(templates[category])]
+        brand = str(template.get('Name', 'Generic')).split(' ')[0]
+        gear = GamingGear(
+            name=f"{template.get('Name', category)} #{i}",
+            type=category,
+            brand=brand,
+            specs=synthesize_specs(category, template, rng),
+        )
+        # bulk_create skips save(), so derive the typed columns here
+        gear.apply_spec_columns()
+        gears.append(gear)
+    GamingGear.objects.bulk_create(gears, batch_size=batch_size)
+
+    games = [Game.objects.get_or_create(name=name)[0] for name in GAMES]
+    player_count = max(rows // 10, 50)
+    players = ProPlayer.objects.bulk_create(
+        [ProPlayer(name=f"Synthetic Pro {i}", game=games[i % len(games)]) for i in range(player_count)],
+        batch_size=batch_size,
+    )
+
+    ids_by_type = {category: [] for category in SETUP_CATEGORIES}
+    for gear_id, gear_type in GamingGear.objects.filter(
+        gear_id__in=[g.gear_id for g in gears]
+    ).values_list('gear_id', 'type'):
+        ids_by_type[gear_type].append(gear_id)
+
+    links = []
+    for category, ids in ids_by_type.items():
+        if not ids:
+            continue
+        weights = 1.0 / np.arange(1, len(ids) + 1) ** 1.5
+        picks = rng.choice(len(ids), size=len(players), p=weights / weights.sum())
+        links.extend(
+            ProPlayerGear(player_id=player.player_id, gear_id=ids[pick])
+            for player, pick in zip(players, picks)
+        )
+    ProPlayerGear.objects.bulk_create(links, batch_size=batch_size)
+    recount_all_pro_usage()
+
+    owner = User.objects.create(username='benchmark', email='benchmark@example.com')
+    presets = Preset.objects.bulk_create(
+        [Preset(name=f"Synthetic Preset {i}", user=owner, share_link=f"benchmark-{i}") for i in range(player_count)],
+        batch_size=batch_size,
+    )
+    categories = [category for category, ids in ids_by_type.items() if ids]
+    skew = {
+        category: (lambda w: w / w.sum())(1.0 / np.arange(1, len(ids_by_type[category]) + 1) ** 1.5)
+        for category in categories
+    }
+    preset_links = []
+    for preset in presets:
+        for category in rng.choice(categories, size=min(int(rng.integers(2, 6)), len(categories)), replace=False):
+            ids = ids_by_type[category]
+            preset_links.append(PresetGear(preset_id=preset.preset_id, gear_id=ids[rng.choice(len(ids), p=skew[category])]))
+    PresetGear.objects.bulk_create(preset_links, batch_size=batch_size)
+
+    return {
+        'gears': rows,
+        'players': len(players),
+        'player_gears': len(links),
+        'presets': len(presets),
+        'preset_gears': len(preset_links),
+    }
+
+
+def measure(fn, repeat):
+    """
+    Time fn() `repeat` times, then run it once more under tracemalloc and a
+    query counter (kept separate so tracing does not skew the latencies).
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            fn()
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'p50_ms': round(float(np.percentile(timings, 50)), 3),
+        'p95_ms': round(float(np.percentile(timings, 95)), 3),
+        'peak_kb': round(peak / 1024, 1),
+        'queries': len(queries),
+        'runs': repeat,
+    }
+
+
+def run_benchmark(rows, repeat=10, mining_repeat=3, seed=0, pool_workers=None):
+    """
+    Benchmark every operation on a fresh synthetic catalog of `rows` gears.
+
+    refresh_game_partitions[pool] uses `pool_workers` processes (default: one
+    per CPU); 0 leaves it out, e.g. in tests, where spawning the workers
+    costs more than the whole run.
+    """
+    with override_settings(CACHES=BENCHMARK_CACHES), transaction.atomic():
+        start = time.perf_counter()
+        counts = build_synthetic_catalog(rows, seed=seed)
+        build_seconds = time.perf_counter() - start
+        reset_leaderboards()
+
+        miner = AssociationRuleMiner()
+        selected = list(
+            GamingGear.objects.filter(type__in=['Mouse', 'Keyboard'])
+            .order_by('-pro_usage_count')
+            .values_list('gear_id', flat=True)[:2]
+        )
+        first_game = Game.objects.order_by('pk').values_list('pk', flat=True).first()
+        # Prime the rule cache so get_recommendations measures the lookup only
+        miner.refresh_cache()
+
+        operations = [
+            ('recommend_mouse', lambda: HybridRecommender().recommend_mouse(BENCHMARK_PREFS), repeat),
+            ('recommend_mouse[sql]', lambda: HybridRecommender().recommend('Mouse', BENCHMARK_PREFS, mode='sql'), repeat),
+            ('recommend_variant_setups', lambda: HybridRecommender().recommend_variant_setups(BENCHMARK_PREFS), repeat),
+            ('recommend_variant_setups[vectorized]',
+             lambda: VectorizedRecommender().recommend_variant_setups(BENCHMARK_PREFS), repeat),
+            ('mine_association_rules', lambda: miner.mine_association_rules(), mining_repeat),
+            ('get_recommendations', lambda: miner.get_recommendations(selected), repeat),
+            # The get_recommendations popularity fallback: sorted query vs leaderboard slice + in_bulk
+            ('popular_gears[order_by]', lambda: list(
+                GamingGear.objects.only(*HYDRATE_FIELDS).exclude(gear_id__in=selected).order_by('-pro_usage_count')[:10]
+            ), repeat),
+            ('popular_gears[leaderboard]',
+             lambda: popular_gears(10, exclude=set(selected), fields=HYDRATE_FIELDS), repeat),
+            ('popular_gears[leaderboard|game]',
+             lambda: popular_gears(10, game=first_game, exclude=set(selected), fields=HYDRATE_FIELDS), repeat),
+        ]
+        # One pro player's basket loses a gear and gets it back, against the full refresh above
+        rule_counts = RuleCounts.build(load_baskets(), min_support=miner.min_support, min_confidence=miner.min_confidence,
+                                  min_lift=miner.min_lift, max_len=miner.itemset_max_len)
+        player_id, basket = next(iter(rule_counts.baskets.items()))
+
+        def toggle_basket():
+            rule_counts.apply({player_id: basket[1:]})
+            rule_counts.apply({player_id: basket})
+        operations.append(('rule_counts.apply', toggle_basket, repeat))
+        # Per-Game partitions, mined one after another vs in the worker pool
+        operations.append(('refresh_game_partitions[serial]', lambda: miner.refresh_game_partitions(max_workers=0),
+                           mining_repeat))
+        pool_workers = os.cpu_count() if pool_workers is None else pool_workers
+        if pool_workers:
+            operations.append(('refresh_game_partitions[pool]',
+                               lambda: miner.refresh_game_partitions(max_workers=pool_workers), mining_repeat))
+
+        for source in TRANSACTION_SOURCES:
+            for label, options in MINING_BACKENDS:
+                backend = AssociationRuleMiner(source=source, **options)
+                operations.append((f'mine[{label}|{source}]', backend.mine_association_rules, mining_repeat))
+        results = {name: measure(fn, n) for name, fn, n in operations}
+
+        transaction.set_rollback(True)
+
+    return {
+        'rows': rows,
+        'catalog': counts,
+        'build_s': round(build_seconds, 2),
+        'operations': results,
+    }
@@ -0,0 +1,131 @@
+"""
+Process-level catalog of recommender candidates, patched incrementally.
+
+get_candidates() returns the same {category: [GamingGear]} bundle as
+load_candidates(), but each process keeps it in memory instead of
+re-querying the catalog per request.
+
+Writers call publish_changes(gear_ids) (GamingGear signals, pro usage
+recounts). After the transaction commits, the shared version counter in
+the cache is bumped and the changed IDs are stored under that version.
+Before serving, every process compares its version with the counter and
+replays the missing deltas: only the listed rows are re-fetched in one
+query, and rows that no longer exist are dropped. A missing delta (cache
+eviction, reset_catalog_index(), too many changes) falls back to a full
+reload.
+"""
+
+import threading
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import GamingGear
+from .recommender_hybrid import CANDIDATE_FIELDS, SETUP_CATEGORIES, load_candidates
+
+VERSION_KEY = 'catalog_index_version'
+DELTA_KEY = 'catalog_index_delta_{}'
+DELTA_TIMEOUT = 60 * 60 * 24
+MAX_DELTAS = 200
+# Larger deltas (full recounts) are published as a reload instead
+MAX_DELTA_IDS = 1000
+RELOAD = '*'
+
+_lock = threading.Lock()
+
+
+class CatalogIndex:
+    """In-memory candidates of one process, keyed by gear_id."""
+
+    def __init__(self):
+        self.version = None
+        self.gears = {}
+        self._bundle = None
+
+    def load(self, version):
+        self.gears = {gear.gear_id: gear for gears in load_candidates().values() for gear in gears}
+        self.version = version
+        self._bundle = None
+
+    def patch(self, gear_ids, version):
+        fresh = GamingGear.objects.filter(
+            gear_id__in=gear_ids, type__in=SETUP_CATEGORIES
+        ).only(*CANDIDATE_FIELDS).in_bulk()
+        for gear_id in gear_ids:
+            if gear_id in fresh:
+                self.gears[gear_id] = fresh[gear_id]
+            else:
+                self.gears.pop(gear_id, None)
+        self.version = version
+        self._bundle = None
+
+    def bundle(self):
+        """{category: [gears]} in gear_id order (shared, treat as read-only)."""
+        if self._bundle is None:
+            bundle = {category: [] for category in SETUP_CATEGORIES}
+            for gear_id in sorted(self.gears):
+                gear = self.gears[gear_id]
+                bundle[gear.type].append(gear)
+            self._bundle = bundle
+        return self._bundle
+
+
+_index = CatalogIndex()
+
+
+def sync_index(index, current):
+    """
+    Bring `index` up to the shared version `current`.
+
+    `index` is anything with a version and load(version) / patch(gear_ids,
+    version), so other per-process views of the catalog can follow the
+    same change log (leaderboards.py).
+    """
+    if index.version is None or current < index.version or current - index.version > MAX_DELTAS:
+        index.load(current)
+        return
+
+    keys = [DELTA_KEY.format(version) for version in range(index.version + 1, current + 1)]
+    deltas = cache.get_many(keys)
+    if len(deltas) != len(keys) or any(delta == RELOAD for delta in deltas.values()):
+        index.load(current)
+        return
+
+    gear_ids = sorted({gear_id for delta in deltas.values() for gear_id in delta})
+    index.patch(gear_ids, current)
+
+
+def get_candidates():
+    """The process-level candidate bundle, synced with the latest version."""
+    current = cache.get(VERSION_KEY, 0)
+    with _lock:
+        if _index.version != current:
+            sync_index(_index, current)
+        return _index.bundle()
+
+
+def _bump_version():
+    try:
+        return cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, 0, None)
+        return cache.incr(VERSION_KEY)
+
+
+def _publish(delta):
+    version = _bump_version()
+    cache.set(DELTA_KEY.format(version), delta, DELTA_TIMEOUT)
+
+
+def publish_changes(gear_ids):
+    """Record changed / deleted gears once the current transaction commits."""
+    gear_ids = sorted({gear_id for gear_id in gear_ids if gear_id is not None})
+    if len(gear_ids) > MAX_DELTA_IDS:
+        reset_catalog_index()
+    elif gear_ids:
+        transaction.on_commit(lambda: _publish(gear_ids))
+
+
+def reset_catalog_index():
+    """Make every process reload the full catalog (bulk edits, imports)."""
+    transaction.on_commit(lambda: _publish(RELOAD))
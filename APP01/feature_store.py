@@ -0,0 +1,248 @@
+"""
+Memory-mapped feature store for the vectorized recommender.
+
+`python manage.py build_feature_store` writes the per-category arrays of
+VectorizedRecommender.build_arrays() as plain .npy files, one per column,
+plus the gear_id of every row, into a new generation directory:
+
+    FEATURE_STORE_DIR/
+        CURRENT                      <- name of the live generation
+        gen-20250101T120000000000/
+            manifest.json
+            Mouse/ids.npy, Mouse/length.npy, Mouse/weight.npy, ...
+
+Workers open the files with numpy.load(mmap_mode='r'), so every gunicorn
+process shares one page-cache copy instead of re-querying and re-parsing
+the catalog. CURRENT is replaced atomically (os.replace) after a generation
+is fully written; current_generation() notices the change with a single
+os.stat() and swaps to the new arrays without a restart.
+
+Only the top-k rows of a ranking are loaded from the database. The store is
+a snapshot: each generation records the catalog index version it was built
+at (catalog_index.py), and get_recommender() only uses it while that version
+is still current. After a gear edit live requests go back to the
+signal-patched catalog index until the store is rebuilt.
+"""
+
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .catalog_index import VERSION_KEY
+from .models import GamingGear
+from .recommender_hybrid import CANDIDATE_FIELDS, SETUP_CATEGORIES, load_candidates
+from .recommender_vectorized import CategoryArrays, VectorizedRecommender
+from .spec_columns import load_specs
+
+POINTER_NAME = 'CURRENT'
+MANIFEST_NAME = 'manifest.json'
+GENERATION_PREFIX = 'gen-'
+
+_lock = threading.Lock()
+_current = {'key': None, 'generation': None}
+
+
+def store_root():
+    return str(settings.FEATURE_STORE_DIR)
+
+
+def _hydrate(gear_ids):
+    """{gear_id: GamingGear} loaded with the same fields as load_candidates()."""
+    return GamingGear.objects.only(*CANDIDATE_FIELDS).in_bulk([int(gid) for gid in gear_ids])
+
+
+class StoredCategory(list):
+    """
+    Candidate list handed to recommend_variant_setups() by the store.
+
+    It only holds the gear with the highest pro usage (all the Pro variant
+    needs); the scorers see the marker and read the mapped arrays instead.
+    """
+
+
+class StoredCategoryArrays(CategoryArrays):
+    """CategoryArrays backed by memory-mapped columns; gear rows are loaded on demand."""
+
+    def __init__(self, category, ids, columns):
+        self.category = category
+        self.ids = ids
+        self.columns = columns
+        self.size = len(ids)
+        self.masks = {}
+        # Filled by prefetch(), keyed by row index
+        self.gears = {}
+        self.specs = {}
+        self.sentiment_raw = {}
+
+    def prefetch(self, indices):
+        missing = [i for i in indices if i not in self.gears]
+        if not missing:
+            return
+        by_id = _hydrate(self.ids[missing])
+        for i in missing:
+            gear = by_id.get(int(self.ids[i]))
+            specs = load_specs(gear.specs) if gear else {}
+            self.gears[i] = gear
+            self.specs[i] = specs
+            self.sentiment_raw[i] = specs.get('sentiment_score', 0)
+
+
+class FeatureStoreGeneration:
+    """One generation directory with every column opened as a read-only memmap."""
+
+    def __init__(self, path):
+        with open(os.path.join(path, MANIFEST_NAME), encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self.name = self.manifest['generation']
+        self.catalog_version = self.manifest.get('catalog_version')
+        self.arrays = {}
+        for category in self.manifest['categories']:
+            category_dir = os.path.join(path, category)
+            ids = np.load(os.path.join(category_dir, 'ids.npy'), mmap_mode='r')
+            columns = {
+                column: np.load(os.path.join(category_dir, f'{column}.npy'), mmap_mode='r')
+                for column in self.manifest['columns']
+            }
+            self.arrays[category] = (ids, columns)
+
+    def is_current(self):
+        """True while no catalog change has been published since this generation was built."""
+        return self.catalog_version == cache.get(VERSION_KEY, 0)
+
+    def category(self, category):
+        if category not in self.arrays:
+            return None
+        ids, columns = self.arrays[category]
+        return StoredCategoryArrays(category, ids, columns)
+
+    def candidate_bundle(self):
+        """{category: StoredCategory([most used gear])}, hydrated with one query."""
+        picks = {}
+        for category, (ids, columns) in self.arrays.items():
+            if len(ids):
+                # argmax keeps the first maximum, like max() over gear_id order
+                picks[category] = int(ids[int(np.argmax(columns['pro_usage']))])
+        gears = _hydrate(picks.values())
+        bundle = {}
+        for category in self.arrays:
+            gear = gears.get(picks.get(category))
+            bundle[category] = StoredCategory([gear] if gear else [])
+        return bundle
+
+
+def current_generation():
+    """The live generation, reopened whenever CURRENT has been replaced."""
+    pointer = os.path.join(store_root(), POINTER_NAME)
+    try:
+        stat = os.stat(pointer)
+    except FileNotFoundError:
+        return None
+
+    key = (pointer, stat.st_ino, stat.st_mtime_ns)
+    if key != _current['key']:
+        with _lock:
+            if key != _current['key']:
+                with open(pointer, encoding='utf-8') as f:
+                    name = f.read().strip()
+                # Old memmaps stay valid for requests still using them
+                _current['generation'] = FeatureStoreGeneration(os.path.join(store_root(), name))
+                _current['key'] = key
+    return _current['generation']
+
+
+class FeatureStoreRecommender(VectorizedRecommender):
+    """
+    VectorizedRecommender that reads the category arrays from the feature
+    store. Falls back to the database when no generation has been written
+    or when explicit candidates are passed.
+    """
+
+    def __init__(self, rules=None):
+        super().__init__(rules)
+        self.generation = current_generation()
+
+    def load_category(self, category, candidates=None):
+        if self.generation is not None and (candidates is None or isinstance(candidates, StoredCategory)):
+            cached = self._catalog.get(category)
+            if cached is not None and cached[0] is self.generation:
+                return cached[1]
+            stored = self.generation.category(category)
+            if stored is not None:
+                self._catalog[category] = (self.generation, stored)
+                return stored
+        return super().load_category(category, candidates)
+
+    def recommend_variant_setups(self, user_prefs, candidates=None):
+        if candidates is None and self.generation is not None:
+            candidates = self.generation.candidate_bundle()
+        return super().recommend_variant_setups(user_prefs, candidates)
+
+
+def get_recommender():
+    """
+    Recommender for live requests: store-backed when a generation exists and
+    matches the live catalog version, otherwise database-backed.
+    """
+    generation = current_generation()
+    if generation is not None and generation.is_current():
+        return FeatureStoreRecommender()
+    return VectorizedRecommender()
+
+
+def write_generation(keep=2):
+    """
+    Build a new generation from the database and make it current.
+
+    The previous `keep - 1` generations are kept for workers that have not
+    swapped yet. Returns the manifest.
+    """
+    root = store_root()
+    os.makedirs(root, exist_ok=True)
+    name = timezone.now().strftime(f'{GENERATION_PREFIX}%Y%m%dT%H%M%S%f')
+    tmp_dir = os.path.join(root, f'.tmp-{name}')
+    os.makedirs(tmp_dir)
+
+    recommender = VectorizedRecommender()
+    # Read before the rows: a change published during the build makes the generation stale
+    catalog_version = cache.get(VERSION_KEY, 0)
+    candidates = load_candidates()
+    manifest = {
+        'generation': name,
+        'created_at': timezone.now().isoformat(),
+        'catalog_version': catalog_version,
+        'columns': [],
+        'categories': {},
+    }
+    try:
+        for category in SETUP_CATEGORIES:
+            arr = recommender.build_arrays(category, candidates[category])
+            category_dir = os.path.join(tmp_dir, category)
+            os.makedirs(category_dir)
+            np.save(os.path.join(category_dir, 'ids.npy'), np.array([g.gear_id for g in arr.gears], dtype=np.int64))
+            for column, values in arr.columns.items():
+                np.save(os.path.join(category_dir, f'{column}.npy'), np.ascontiguousarray(values))
+            manifest['columns'] = list(arr.columns)
+            manifest['categories'][category] = arr.size
+
+        with open(os.path.join(tmp_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.rename(tmp_dir, os.path.join(root, name))
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    pointer_tmp = os.path.join(root, f'.{POINTER_NAME}-{name}')
+    with open(pointer_tmp, 'w', encoding='utf-8') as f:
+        f.write(name)
+    os.replace(pointer_tmp, os.path.join(root, POINTER_NAME))
+
+    generations = sorted(d for d in os.listdir(root) if d.startswith(GENERATION_PREFIX))
+    for old in generations[:-max(keep, 1)]:
+        shutil.rmtree(os.path.join(root, old), ignore_errors=True)
+    return manifest
@@ -2,6 +2,8 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm, PasswordResetForm, SetPasswordForm
 from .models import User, Role, ProPlayer, GamingGear, Preset, Alert, ProPlayerGear, Game # เพิ่ม ProPlayerGear
+from .incremental_rules import defer_basket_changes
+from .pro_usage import defer_pro_usage_refresh
 
 # --- Custom Login Form ---
 class LoginForm(AuthenticationForm):
@@ -82,20 +84,23 @@ class ProPlayerForm(forms.ModelForm):
     def save(self, commit=True):
         player = super().save(commit=False)
         if commit:
-            player.save()
-            
-            # จัดการ Many-to-Many Relationship (ProPlayerGear)
-            if 'gears_text' in self.cleaned_data:
-                # แยกข้อความที่กรอกด้วยเครื่องหมายจุลภาคและลบช่องว่าง
-                gear_list = [name.strip() for name in self.cleaned_data['gears_text'].split(',') if name.strip()]
+            # นับ pro usage ของ Gear ที่เปลี่ยนแค่ครั้งเดียวตอนจบ (แทนการนับทุกแถว)
+            # และอัปเดต association rule counts ของ player นี้ครั้งเดียว
+            with defer_pro_usage_refresh(), defer_basket_changes():
+                player.save()
                 
-                # ลบ Gear เก่าทั้งหมดของ Pro Player นี้ก่อน
-                ProPlayerGear.objects.filter(player=player).delete()
-                
-                # เพิ่ม Gear ใหม่หรือใช้ที่มีอยู่แล้ว
-                for gear_name in gear_list:
-                    gear, created = GamingGear.objects.get_or_create(name=gear_name)
-                    ProPlayerGear.objects.create(player=player, gear=gear)
+                # จัดการ Many-to-Many Relationship (ProPlayerGear)
+                if 'gears_text' in self.cleaned_data:
+                    # แยกข้อความที่กรอกด้วยเครื่องหมายจุลภาคและลบช่องว่าง
+                    gear_list = [name.strip() for name in self.cleaned_data['gears_text'].split(',') if name.strip()]
+                    
+                    # ลบ Gear เก่าทั้งหมดของ Pro Player นี้ก่อน
+                    ProPlayerGear.objects.filter(player=player).delete()
+                    
+                    # เพิ่ม Gear ใหม่หรือใช้ที่มีอยู่แล้ว
+                    for gear_name in gear_list:
+                        gear, created = GamingGear.objects.get_or_create(name=gear_name)
+                        ProPlayerGear.objects.create(player=player, gear=gear)
 
         return player
     
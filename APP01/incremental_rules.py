@@ -0,0 +1,366 @@
+"""
+Association rules over pro player setups, maintained per change.
+
+RuleCounts holds every pro player's basket (gear ids, kept when the player
+has at least two) and the support count of every itemset occurring in a
+basket, up to the miner's max_len (MAX_ITEMSET_LEN when it has none, so a
+basket costs at most a few hundred subsets instead of 2^n). From those counts it keeps the
+candidate rules: splits of frequent itemsets whose confidence reaches
+min_confidence. Lift only depends on the consequent's support and the
+number of baskets, so it is applied when the rules are read.
+
+A basket change touches the subsets of the old and new basket only:
+
+* their counts are adjusted, which can make them (in)frequent;
+* splits of touched itemsets are re-evaluated, and so are splits of
+  frequent itemsets whose antecedent was touched (its confidence moved);
+* only when the number of baskets moves the support threshold to another
+  count is the candidate set rebuilt, still from the counts alone.
+
+ProPlayerGear signals (signals.py) call record_basket_changes() with the
+affected player ids; bulk writers wrap their work in defer_basket_changes()
+so the whole batch is logged as one change. Once the transaction commits,
+the ids are stored under a new change version (like catalog_index.py) and
+the association rules refresh job (association_rules.start_refresh_job)
+applies all pending changes in the background under a cache lock: it
+reloads only those players' baskets, updates the shared RuleCounts and
+publishes the new rules through AssociationRuleMiner.publish_rules(). The
+request that wrote the change only logs it. A missing state or change log
+falls back to a rebuild from one ProPlayerGear scan.
+"""
+
+import itertools
+import logging
+import math
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import ProPlayerGear
+
+logger = logging.getLogger(__name__)
+
+STATE_KEY = 'association_rules_counts'
+# Change version folded into the stored state, readable without unpickling it
+APPLIED_VERSION_KEY = 'association_rules_counts_version'
+CHANGE_VERSION_KEY = 'association_rules_change_version'
+CHANGE_KEY = 'association_rules_change_{}'
+CHANGE_TIMEOUT = 60 * 60 * 24
+LOCK_KEY = 'association_rules_counts_lock'
+MAX_CHANGES = 200
+# Larger batches (imports) are cheaper to recount from scratch
+MAX_CHANGED_PLAYERS = 1000
+# Itemset length counted (and mined, see AssociationRuleMiner.itemset_max_len)
+# when the miner sets no max_len
+MAX_ITEMSET_LEN = 3
+
+_state = threading.local()
+
+
+def _subsets(basket, max_len):
+    top = len(basket) if max_len is None else min(len(basket), max_len)
+    for size in range(1, top + 1):
+        yield from itertools.combinations(basket, size)
+
+
+def _splits(itemset):
+    """(antecedent, consequent) pairs of a sorted itemset, as sorted tuples."""
+    for size in range(1, len(itemset)):
+        for antecedent in itertools.combinations(itemset, size):
+            consequent = tuple(item for item in itemset if item not in antecedent)
+            yield antecedent, consequent
+
+
+def load_baskets(player_ids=None):
+    """{player_id: sorted gear id tuple} from ProPlayerGear (only players given, if any)."""
+    rows = ProPlayerGear.objects.filter(gear__isnull=False)
+    if player_ids is not None:
+        rows = rows.filter(player_id__in=player_ids)
+    baskets = {}
+    for player_id, gear_id in rows.order_by('player_id').values_list('player_id', 'gear_id'):
+        baskets.setdefault(player_id, set()).add(gear_id)
+    return {player_id: tuple(sorted(gear_ids)) for player_id, gear_ids in baskets.items()}
+
+
+class RuleCounts:
+    """Itemset counts and candidate rules for one miner configuration."""
+
+    def __init__(self, min_support, min_confidence, min_lift, max_len=None):
+        self.config = (min_support, min_confidence, min_lift, max_len)
+        self.min_support = min_support
+        self.min_confidence = min_confidence
+        self.min_lift = min_lift
+        self.max_len = max_len
+        self.version = 0  # last applied change version
+        self.baskets = {}  # player_id -> gear id tuple (>= 2 items)
+        self.counts = {}  # itemset tuple -> baskets containing it
+        self.size = 0  # number of baskets
+        self.min_count = 0
+        self.frequent = set()  # frequent itemsets with >= 2 items
+        self.supersets = {}  # itemset -> frequent itemsets strictly containing it
+        self.candidates = {}  # (antecedent, consequent) -> confidence
+
+    @classmethod
+    def build(cls, baskets, **config):
+        counts = cls(**config)
+        for player_id, basket in baskets.items():
+            counts._set_basket(player_id, basket, touched=None)
+        counts._rebuild_candidates()
+        return counts
+
+    def _threshold(self):
+        """Smallest count c with c / size >= min_support (mlxtend compares supports)."""
+        if not self.size:
+            return math.inf
+        c = max(1, math.ceil(self.min_support * self.size))
+        while c > 1 and (c - 1) / self.size >= self.min_support:
+            c -= 1
+        while c / self.size < self.min_support:
+            c += 1
+        return c
+
+    def _set_basket(self, player_id, basket, touched):
+        basket = tuple(basket) if len(basket) >= 2 else ()
+        old = self.baskets.get(player_id, ())
+        if basket == old:
+            return
+        for itemset in _subsets(old, self.max_len):
+            left = self.counts[itemset] - 1
+            if left:
+                self.counts[itemset] = left
+            else:
+                del self.counts[itemset]
+            if touched is not None:
+                touched.add(itemset)
+        for itemset in _subsets(basket, self.max_len):
+            self.counts[itemset] = self.counts.get(itemset, 0) + 1
+            if touched is not None:
+                touched.add(itemset)
+        self.size += bool(basket) - bool(old)
+        if basket:
+            self.baskets[player_id] = basket
+        else:
+            self.baskets.pop(player_id, None)
+
+    def _add_frequent(self, itemset):
+        self.frequent.add(itemset)
+        for part in _subsets(itemset, len(itemset) - 1):
+            self.supersets.setdefault(part, set()).add(itemset)
+
+    def _drop_frequent(self, itemset):
+        self.frequent.discard(itemset)
+        for part in _subsets(itemset, len(itemset) - 1):
+            holders = self.supersets.get(part)
+            if holders is not None:
+                holders.discard(itemset)
+                if not holders:
+                    del self.supersets[part]
+
+    def _evaluate_split(self, antecedent, consequent):
+        union = tuple(sorted(antecedent + consequent))
+        key = (antecedent, consequent)
+        confidence = self.counts[union] / self.counts[antecedent] if union in self.frequent else 0.0
+        if confidence >= self.min_confidence:
+            self.candidates[key] = confidence
+        else:
+            self.candidates.pop(key, None)
+
+    def _rebuild_candidates(self):
+        self.min_count = self._threshold()
+        self.frequent = set()
+        self.supersets = {}
+        self.candidates = {}
+        for itemset, count in self.counts.items():
+            if len(itemset) >= 2 and count >= self.min_count:
+                self._add_frequent(itemset)
+        for itemset in self.frequent:
+            for antecedent, consequent in _splits(itemset):
+                self._evaluate_split(antecedent, consequent)
+
+    def apply(self, baskets):
+        """Replace the given players' baskets ({player_id: gear ids}, empty = gone)."""
+        touched = set()
+        for player_id, basket in baskets.items():
+            self._set_basket(player_id, tuple(sorted(basket)), touched)
+
+        if self._threshold() != self.min_count:
+            self._rebuild_candidates()
+            return len(touched)
+
+        for itemset in touched:
+            if len(itemset) < 2:
+                continue
+            is_frequent = self.counts.get(itemset, 0) >= self.min_count
+            if is_frequent and itemset not in self.frequent:
+                self._add_frequent(itemset)
+            elif not is_frequent and itemset in self.frequent:
+                self._drop_frequent(itemset)
+            for antecedent, consequent in _splits(itemset):
+                self._evaluate_split(antecedent, consequent)
+
+        # Unchanged itemsets whose antecedent count moved
+        for antecedent in touched:
+            for union in self.supersets.get(antecedent, ()):
+                if union not in touched:
+                    consequent = tuple(item for item in union if item not in antecedent)
+                    self._evaluate_split(antecedent, consequent)
+        return len(touched)
+
+    def rules_frame(self):
+        """Rules in the mine_association_rules() shape (gear ids as strings), best score first."""
+        rows = []
+        for (antecedent, consequent), confidence in self.candidates.items():
+            lift = confidence * self.size / self.counts[consequent]
+            if lift >= self.min_lift:
+                rows.append((antecedent, consequent, confidence, lift, confidence * lift))
+        rows.sort(key=lambda row: (-row[4], row[0], row[1]))
+        return pd.DataFrame({
+            'antecedents': [frozenset(map(str, row[0])) for row in rows],
+            'consequents': [frozenset(map(str, row[1])) for row in rows],
+            'confidence': [row[2] for row in rows],
+            'lift': [row[3] for row in rows],
+            'score': [row[4] for row in rows],
+        })
+
+
+def _config(miner):
+    return {
+        'min_support': miner.min_support,
+        'min_confidence': miner.min_confidence,
+        'min_lift': miner.min_lift,
+        'max_len': miner.itemset_max_len,
+    }
+
+
+def _store(counts):
+    cache.set_many({STATE_KEY: counts, APPLIED_VERSION_KEY: counts.version}, None)
+
+
+def has_pending_changes():
+    """True when logged basket changes have not been folded into the state yet."""
+    versions = cache.get_many([APPLIED_VERSION_KEY, CHANGE_VERSION_KEY])
+    return versions.get(APPLIED_VERSION_KEY, 0) != versions.get(CHANGE_VERSION_KEY, 0)
+
+
+def rebuild_rule_counts(miner):
+    """Count every basket from scratch (one ProPlayerGear scan) and store the state."""
+    version = cache.get(CHANGE_VERSION_KEY, 0)
+    counts = RuleCounts.build(load_baskets(), **_config(miner))
+    counts.version = version
+    _store(counts)
+    return counts
+
+
+def get_rule_counts(miner):
+    """The shared state for this miner's thresholds, rebuilt if missing or configured differently."""
+    counts = cache.get(STATE_KEY)
+    if counts is None or counts.config != tuple(_config(miner).values()):
+        return rebuild_rule_counts(miner)
+    if counts.version != cache.get(CHANGE_VERSION_KEY, 0) and apply_pending_changes(miner) is not None:
+        # A change whose writer lost the lock race is still pending
+        counts = cache.get(STATE_KEY)
+    return counts
+
+
+def _bump_version():
+    try:
+        return cache.incr(CHANGE_VERSION_KEY)
+    except ValueError:
+        cache.add(CHANGE_VERSION_KEY, 0, None)
+        return cache.incr(CHANGE_VERSION_KEY)
+
+
+def apply_pending_changes(miner=None):
+    """
+    Fold the logged basket changes into the shared state and publish the rules.
+
+    Returns the number of players re-read, or None if another process holds
+    the lock (it re-checks the log before releasing it).
+    """
+    from .association_rules import REFRESH_LOCK_TIMEOUT, get_miner
+
+    miner = miner or get_miner()
+    if not miner.supports_incremental:
+        return None
+    # As long as a refresh job may run, and renewed every pass, so a long
+    # rebuild cannot let a second job in
+    if not cache.add(LOCK_KEY, 1, REFRESH_LOCK_TIMEOUT):
+        return None
+
+    applied = 0
+    try:
+        while True:
+            cache.touch(LOCK_KEY, REFRESH_LOCK_TIMEOUT)
+            current = cache.get(CHANGE_VERSION_KEY, 0)
+            counts = cache.get(STATE_KEY)
+            if counts is None or counts.config != tuple(_config(miner).values()):
+                counts = rebuild_rule_counts(miner)
+                miner.publish_rules(counts.rules_frame())
+                continue
+            if counts.version == current:
+                return applied
+
+            keys = [CHANGE_KEY.format(version) for version in range(counts.version + 1, current + 1)]
+            changes = cache.get_many(keys) if len(keys) <= MAX_CHANGES else {}
+            player_ids = sorted({player_id for change in changes.values() for player_id in change})
+            if len(changes) != len(keys) or len(player_ids) > MAX_CHANGED_PLAYERS:
+                counts = rebuild_rule_counts(miner)
+            else:
+                fresh = load_baskets(player_ids)
+                counts.apply({player_id: fresh.get(player_id, ()) for player_id in player_ids})
+                counts.version = current
+                _store(counts)
+                applied += len(player_ids)
+            miner.publish_rules(counts.rules_frame())
+    finally:
+        cache.delete(LOCK_KEY)
+
+
+def _log_changes(player_ids):
+    from .association_rules import start_refresh_job
+
+    version = _bump_version()
+    cache.set(CHANGE_KEY.format(version), player_ids, CHANGE_TIMEOUT)
+    try:
+        # A job already running picks the change up before it finishes
+        start_refresh_job(partitions=False)
+    except Exception:
+        # Rules stay at the previous version; the change stays in the log
+        logger.exception("Failed to start applying association rule changes")
+
+
+def record_basket_changes(player_ids):
+    """Log changed pro player baskets once the current transaction commits."""
+    player_ids = {player_id for player_id in player_ids if player_id is not None}
+    if not player_ids:
+        return
+
+    deferred = getattr(_state, 'pending', None)
+    if deferred is not None:
+        deferred.update(player_ids)
+        return
+
+    player_ids = sorted(player_ids)
+    transaction.on_commit(lambda: _log_changes(player_ids))
+
+
+@contextmanager
+def defer_basket_changes():
+    """
+    Collect players touched inside the block and log them as one change on exit.
+
+    Nested blocks share the outer collection.
+    """
+    if getattr(_state, 'pending', None) is not None:
+        yield
+        return
+
+    _state.pending = set()
+    try:
+        yield
+    finally:
+        pending, _state.pending = _state.pending, None
+    record_basket_changes(pending)
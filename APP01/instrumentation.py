@@ -0,0 +1,140 @@
+"""
+Stage-level timing for the recommendation pipeline.
+
+Wrap a piece of work in `with stage('name'):` (or decorate a function with
+@timed('name')) to record its wall time and the SQL queries it issued;
+code that scans candidates reports them with add_rows(n). Stages nest, and
+each one is measured inclusively.
+
+Every finished stage is added to process-wide counters (count, total / max
+milliseconds, rows, queries) served by GET /api/metrics/. During a request,
+StageTimingMiddleware also collects the stages and, when SERVER_TIMING is
+enabled, sends them as a `Server-Timing` header so browser dev tools show
+where a quiz spent its time.
+
+Counters are per process; each worker reports its own.
+"""
+
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.db import connection
+
+_lock = threading.Lock()
+_totals = {}  # name -> [count, total_ms, max_ms, rows, queries]
+
+_request_stages = contextvars.ContextVar('request_stages', default=None)
+_active = contextvars.ContextVar('active_stage', default=None)
+
+
+class Stage:
+    __slots__ = ('name', 'rows', 'queries')
+
+    def __init__(self, name):
+        self.name = name
+        self.rows = 0
+        self.queries = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def stage(name):
+    current = Stage(name)
+    token = _active.set(current)
+    start = time.perf_counter()
+    try:
+        with connection.execute_wrapper(current):
+            yield current
+    finally:
+        elapsed = (time.perf_counter() - start) * 1000
+        _active.reset(token)
+        _record(current, elapsed)
+
+
+def timed(name):
+    """Decorator form of stage()."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def add_rows(n):
+    """Count `n` scanned rows towards the innermost running stage."""
+    current = _active.get()
+    if current is not None:
+        current.rows += n
+
+
+def _record(current, elapsed):
+    with _lock:
+        totals = _totals.get(current.name)
+        if totals is None:
+            totals = _totals[current.name] = [0, 0.0, 0.0, 0, 0]
+        totals[0] += 1
+        totals[1] += elapsed
+        totals[2] = max(totals[2], elapsed)
+        totals[3] += current.rows
+        totals[4] += current.queries
+
+    collected = _request_stages.get()
+    if collected is not None:
+        collected.append((current.name, elapsed, current.rows, current.queries))
+
+
+def metrics_snapshot():
+    """{name: {count, total_ms, avg_ms, max_ms, rows, queries}} for this process."""
+    with _lock:
+        items = [(name, list(values)) for name, values in _totals.items()]
+    stages = {}
+    for name, (count, total, peak, rows, queries) in sorted(items):
+        stages[name] = {
+            'count': count,
+            'total_ms': round(total, 3),
+            'avg_ms': round(total / count, 3) if count else 0.0,
+            'max_ms': round(peak, 3),
+            'rows': rows,
+            'queries': queries,
+        }
+    return {'pid': os.getpid(), 'stages': stages}
+
+
+def reset_metrics():
+    with _lock:
+        _totals.clear()
+
+
+@contextmanager
+def collect_request_stages():
+    """Collect the stages finished inside the block (used by the middleware)."""
+    collected = []
+    token = _request_stages.set(collected)
+    try:
+        yield collected
+    finally:
+        _request_stages.reset(token)
+
+
+def server_timing_header(collected):
+    """Server-Timing value, one metric per stage name (repeated stages are summed)."""
+    merged = {}
+    for name, elapsed, rows, queries in collected:
+        entry = merged.setdefault(name, [0, 0.0, 0, 0])
+        entry[0] += 1
+        entry[1] += elapsed
+        entry[2] += rows
+        entry[3] += queries
+    return ', '.join(
+        f'{name};dur={elapsed:.2f};desc="n={count} rows={rows} q={queries}"'
+        for name, (count, elapsed, rows, queries) in merged.items()
+    )
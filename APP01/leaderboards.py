@@ -0,0 +1,125 @@
+"""
+Pro usage leaderboards: gear ids ranked by popularity, per type and per Game.
+
+A board is a sorted list of (-pro usage, name, gear_id) for one gear type
+(or the whole catalog), counted over all pros or, for a Game, from
+GamingGear.pro_usage_by_game (gears no pro of that game uses are left out).
+top_gear_ids() is a slice of a board, and popular_gears() turns it into
+gears with one in_bulk() query, so callers no longer sort the catalog by
+pro_usage_count for a handful of rows.
+
+Every process keeps its boards in memory (built on first use) and follows
+the catalog index's change log (catalog_index.py): pro usage recounts and
+gear edits already publish the changed ids there, so only those rows are
+re-read (one query) and moved within the boards already built.
+"""
+
+import bisect
+import threading
+
+from django.core.cache import cache
+
+from .catalog_index import VERSION_KEY, sync_index
+from .models import GamingGear
+
+FIELDS = ('gear_id', 'type', 'name', 'pro_usage_count', 'pro_usage_by_game')
+
+_lock = threading.Lock()
+
+
+def _rank(gear_id, entry, key):
+    """The gear's sort key on board `key` = (type, game), or None if it is not on it."""
+    gear_type, name, total, by_game = entry
+    board_type, game = key
+    if board_type is not None and gear_type != board_type:
+        return None
+    if game is None:
+        return (-total, name, gear_id)
+    count = by_game.get(str(game), 0)
+    return (-count, name, gear_id) if count else None
+
+
+class Leaderboards:
+    """Boards of one process, keyed by (type, game); None means all."""
+
+    def __init__(self):
+        self.version = None
+        self.entries = {}  # gear_id -> (type, name, total, {game_id: count})
+        self.boards = {}
+
+    def _fetch(self, queryset):
+        return {
+            gear_id: (gear_type, name, total, by_game or {})
+            for gear_id, gear_type, name, total, by_game in queryset.values_list(*FIELDS)
+        }
+
+    def load(self, version):
+        self.entries = self._fetch(GamingGear.objects.all())
+        self.boards = {}
+        self.version = version
+
+    def patch(self, gear_ids, version):
+        fresh = self._fetch(GamingGear.objects.filter(gear_id__in=gear_ids))
+        for gear_id in gear_ids:
+            old, new = self.entries.pop(gear_id, None), fresh.get(gear_id)
+            for key, board in self.boards.items():
+                rank = _rank(gear_id, old, key) if old is not None else None
+                if rank is not None:
+                    del board[bisect.bisect_left(board, rank)]
+                rank = _rank(gear_id, new, key) if new is not None else None
+                if rank is not None:
+                    bisect.insort(board, rank)
+            if new is not None:
+                self.entries[gear_id] = new
+        self.version = version
+
+    def board(self, gear_type=None, game=None):
+        key = (gear_type, game)
+        board = self.boards.get(key)
+        if board is None:
+            ranks = (_rank(gear_id, entry, key) for gear_id, entry in self.entries.items())
+            board = self.boards[key] = sorted(rank for rank in ranks if rank is not None)
+        return board
+
+
+_boards = Leaderboards()
+
+
+def reset_leaderboards():
+    """Drop this process's boards, for catalogs written without signals (benchmark bulk loads)."""
+    global _boards
+    with _lock:
+        _boards = Leaderboards()
+
+
+def top_gear_ids(n, gear_type=None, game=None, exclude=()):
+    """
+    Ids of the `n` gears most used by pros (of `game`, if given), most used first.
+
+    Ties are broken by name. Ids in `exclude` are skipped.
+    """
+    current = cache.get(VERSION_KEY, 0)
+    with _lock:
+        if _boards.version != current:
+            sync_index(_boards, current)
+        board = _boards.board(gear_type, game)
+        if not exclude:
+            return [gear_id for _count, _name, gear_id in board[:n]]
+        ids = []
+        for _count, _name, gear_id in board:
+            if len(ids) >= n:
+                break
+            if gear_id not in exclude:
+                ids.append(gear_id)
+        return ids
+
+
+def popular_gears(n, gear_type=None, game=None, exclude=(), fields=None):
+    """top_gear_ids() as GamingGear objects (only `fields`, if given), in one query."""
+    ids = top_gear_ids(n, gear_type, game, exclude)
+    if not ids:
+        return []
+    queryset = GamingGear.objects.only(*fields) if fields else GamingGear.objects.all()
+    gears = queryset.in_bulk(ids)
+    # A gear deleted since the last sync is skipped
+    return [gears[gear_id] for gear_id in ids if gear_id in gears]
@@ -0,0 +1,56 @@
+"""
+Django management command to hot-swap the recommender scoring rules.
+
+Validates a rule table file (see APP01/scoring_rules.py), installs it as
+SCORING_RULES_FILE and drops the precomputed quiz results. Running workers
+pick up the new weights on their next request.
+
+Usage:
+    python manage.py activate_scoring_rules my_rules.json
+    python manage.py activate_scoring_rules --check my_rules.json
+    python manage.py activate_scoring_rules --default
+"""
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from APP01.quiz_results import invalidate_quiz_results
+from APP01.scoring_rules import DEFAULT_RULES_FILE, RuleTable, activate_rule_table
+
+
+class Command(BaseCommand):
+    help = "Validate and activate a recommender scoring rule table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', help="Rule table JSON file")
+        parser.add_argument('--check', action='store_true', help="Only validate the file")
+        parser.add_argument('--default', action='store_true', help="Go back to the built-in default table")
+
+    def handle(self, *args, **options):
+        if options['default']:
+            if os.path.exists(settings.SCORING_RULES_FILE):
+                os.remove(settings.SCORING_RULES_FILE)
+            invalidate_quiz_results()
+            self.stdout.write(self.style.SUCCESS(f"Using the default rule table ({DEFAULT_RULES_FILE})."))
+            return
+
+        path = options['path']
+        if not path:
+            raise CommandError("Give a rule table file or --default")
+        try:
+            if options['check']:
+                table = RuleTable.from_file(path)
+            else:
+                table = activate_rule_table(path)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Invalid rule table: {e}")
+
+        rules = sum(len(category.rules) for category in table.categories.values())
+        if options['check']:
+            self.stdout.write(self.style.SUCCESS(f"Rule table v{table.version} is valid ({rules} rules)."))
+            return
+        invalidate_quiz_results()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rule table v{table.version} is live ({rules} rules); quiz results will be recomputed."
+        ))
@@ -0,0 +1,36 @@
+"""
+Django management command to re-derive the typed spec columns on GamingGear.
+
+Parses specs into weight_g, length_cm, refresh_hz, vertical_resolution,
+form_factor, shape, panel and sentiment. Run it after editing specs with
+queryset.update() or raw SQL, which bypass GamingGear.save().
+
+Usage:
+    python manage.py backfill_spec_columns
+    python manage.py backfill_spec_columns --type Mouse
+"""
+from django.core.management.base import BaseCommand
+
+from APP01.catalog_index import reset_catalog_index
+from APP01.models import GamingGear
+from APP01.quiz_results import invalidate_quiz_results
+from APP01.spec_columns import backfill_spec_columns
+
+
+class Command(BaseCommand):
+    help = "Re-derive typed spec columns (weight, length, refresh rate, ...) from GamingGear.specs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--type', help="Only backfill one gear type (e.g. Mouse)")
+
+    def handle(self, *args, **options):
+        gears = GamingGear.objects.all()
+        if options['type']:
+            gears = gears.filter(type=options['type'])
+
+        self.stdout.write("Backfilling spec columns...")
+        changed = backfill_spec_columns(gears)
+        if changed:
+            invalidate_quiz_results()
+            reset_catalog_index()
+        self.stdout.write(self.style.SUCCESS(f"Updated {changed} gears."))
@@ -0,0 +1,79 @@
+"""
+Django management command to benchmark the recommenders on synthetic catalogs.
+
+Creates a temporary test database (like `manage.py test`), builds a
+synthetic catalog per size, times recommend_mouse, recommend_variant_setups,
+mine_association_rules and get_recommendations, and prints the results as
+JSON (p50/p95 ms, peak traced memory, query counts).
+
+Usage:
+    python manage.py benchmark_recommender
+    python manage.py benchmark_recommender --sizes 1k,10k,100k,1M --repeat 20 --output bench.json
+    python manage.py benchmark_recommender --current-db   # run against the configured database
+"""
+import json
+import platform
+import subprocess
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from APP01.benchmark import parse_size, run_benchmark
+
+
+class Command(BaseCommand):
+    help = "Benchmark the recommenders on synthetic 1k/10k/100k/1M-row catalogs and report JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1k,10k', help="Comma separated catalog sizes (1k, 10k, 100k, 1M or a number)")
+        parser.add_argument('--repeat', type=int, default=10, help="Timed runs per recommender operation")
+        parser.add_argument('--mining-repeat', type=int, default=3, help="Timed runs of mine_association_rules")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help="Write the JSON report to this file instead of stdout")
+        parser.add_argument('--current-db', action='store_true',
+                            help="Use the configured database (catalogs are still rolled back)")
+
+    def handle(self, *args, **options):
+        sizes = [parse_size(size.strip()) for size in options['sizes'].split(',') if size.strip()]
+
+        old_name = None
+        if not options['current_db']:
+            old_name = settings.DATABASES['default']['NAME']
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+
+        try:
+            runs = []
+            for rows in sizes:
+                self.stderr.write(f"Benchmarking {rows} rows...")
+                runs.append(run_benchmark(
+                    rows,
+                    repeat=options['repeat'],
+                    mining_repeat=options['mining_repeat'],
+                    seed=options['seed'],
+                ))
+        finally:
+            if old_name is not None:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        report = {
+            'commit': self.git_commit(),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'runs': runs,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(output)
+            self.stderr.write(self.style.SUCCESS(f"Wrote benchmark report to {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    def git_commit(self):
+        try:
+            return subprocess.check_output(
+                ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR, stderr=subprocess.DEVNULL, text=True,
+            ).strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
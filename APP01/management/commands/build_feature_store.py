@@ -0,0 +1,27 @@
+"""
+Django management command to write a new recommender feature store generation.
+
+Dumps the per-category recommender arrays to FEATURE_STORE_DIR as .npy
+files and atomically points CURRENT at them. Running workers pick up the
+new generation on their next request.
+
+Usage:
+    python manage.py build_feature_store
+    python manage.py build_feature_store --keep 3
+"""
+from django.core.management.base import BaseCommand
+
+from APP01.feature_store import store_root, write_generation
+
+
+class Command(BaseCommand):
+    help = "Write the memory-mapped recommender arrays shared by all workers."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep', type=int, default=2, help="Number of generations to keep on disk")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Writing feature store to {store_root()}...")
+        manifest = write_generation(keep=options['keep'])
+        rows = sum(manifest['categories'].values())
+        self.stdout.write(self.style.SUCCESS(f"Generation {manifest['generation']} is current ({rows} gears)."))
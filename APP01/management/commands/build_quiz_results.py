@@ -0,0 +1,21 @@
+"""
+Django management command to precompute quiz results.
+
+Runs the recommender for every genre × hand_size × grip combination the
+quiz can submit and stores the variants in QuizResult.
+
+Usage:
+    python manage.py build_quiz_results
+"""
+from django.core.management.base import BaseCommand
+
+from APP01.quiz_results import rebuild_quiz_results
+
+
+class Command(BaseCommand):
+    help = "Precompute Performance/Balanced/Pro variants for every quiz combination."
+
+    def handle(self, *args, **options):
+        self.stdout.write("Building precomputed quiz results...")
+        count = rebuild_quiz_results()
+        self.stdout.write(self.style.SUCCESS(f"Stored {count} quiz results."))
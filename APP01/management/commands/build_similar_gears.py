@@ -0,0 +1,21 @@
+"""
+Django management command to rebuild the similar-gear index.
+
+Recomputes GamingGear.similar_gear_ids (top-16 nearest gears by specs)
+for every gear type.
+
+Usage:
+    python manage.py build_similar_gears
+"""
+from django.core.management.base import BaseCommand
+
+from APP01.similar_gear import rebuild_similar_gears
+
+
+class Command(BaseCommand):
+    help = "Rebuild the top-16 similar-gear lists shown on the gear detail page."
+
+    def handle(self, *args, **options):
+        self.stdout.write("Building similar-gear index...")
+        changed = rebuild_similar_gears()
+        self.stdout.write(self.style.SUCCESS(f"Updated {changed} gears."))
@@ -5,6 +5,9 @@ from django.core.management.base import BaseCommand
 from django.core.files import File
 from django.conf import settings
 from APP01.models import ProPlayer, GamingGear, ProPlayerGear, Game
+from APP01.incremental_rules import defer_basket_changes
+from APP01.pro_usage import defer_pro_usage_refresh
+from APP01.similar_gear import defer_similar_gear_refresh
 
 class Command(BaseCommand):
     help = 'Import real data from JSON files'
@@ -14,11 +17,13 @@ class Command(BaseCommand):
         
         base_data_dir = os.path.join(settings.BASE_DIR, 'data')
         
-        # 1. Import Gaming Gear
-        self.import_gear(base_data_dir)
+        # 1. Import Gaming Gear (similar-gear lists are rebuilt once per category at the end)
+        with defer_similar_gear_refresh():
+            self.import_gear(base_data_dir)
         
-        # 2. Import Pro Players
-        self.import_pro_players(base_data_dir)
+        # 2. Import Pro Players (pro usage counters and rule counts are updated once at the end)
+        with defer_pro_usage_refresh(), defer_basket_changes():
+            self.import_pro_players(base_data_dir)
         
         self.stdout.write(self.style.SUCCESS("Data import completed successfully!"))
     
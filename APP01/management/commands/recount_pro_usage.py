@@ -0,0 +1,20 @@
+"""
+Django management command to repair the denormalized pro usage counters.
+
+Recounts GamingGear.pro_usage_count and pro_usage_by_game from ProPlayerGear.
+
+Usage:
+    python manage.py recount_pro_usage
+"""
+from django.core.management.base import BaseCommand
+
+from APP01.pro_usage import recount_all_pro_usage
+
+
+class Command(BaseCommand):
+    help = "Recount pro usage counters on every GamingGear from ProPlayerGear."
+
+    def handle(self, *args, **options):
+        self.stdout.write("Recounting pro usage...")
+        changed = recount_all_pro_usage()
+        self.stdout.write(self.style.SUCCESS(f"Updated {changed} gears."))
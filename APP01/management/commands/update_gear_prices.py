@@ -11,6 +11,7 @@ from decimal import Decimal
 from django.core.management.base import BaseCommand
 
 from APP01.models import GamingGear
+from APP01.similar_gear import defer_similar_gear_refresh
 from APP01.management.commands.gear_prices_data import (
     BRAND_CATEGORY_DEFAULTS,
     MODEL_OVERRIDES,
@@ -53,26 +54,28 @@ class Command(BaseCommand):
 
         missing_items = []
 
-        for gear in gears:
-            price = self._get_price(gear)
-            if price is not None:
-                if apply:
-                    gear.price = Decimal(str(price))
-                    gear.save(update_fields=["price"])
-                updated += 1
-                self.stdout.write(
-                    f"  [{'SET' if apply else 'WOULD SET'}] "
-                    f"{gear.type:12s} | {gear.brand:20s} | {gear.name:45s} | ${price:.2f}"
-                )
-            else:
-                missing += 1
-                missing_items.append(gear)
-                self.stdout.write(
-                    self.style.WARNING(
-                        f"  [MISSING]   "
-                        f"{gear.type:12s} | {gear.brand:20s} | {gear.name:45s} | NO PRICE FOUND"
+        # Price feeds the similar-gear features: refresh each category once at the end
+        with defer_similar_gear_refresh():
+            for gear in gears:
+                price = self._get_price(gear)
+                if price is not None:
+                    if apply:
+                        gear.price = Decimal(str(price))
+                        gear.save(update_fields=["price"])
+                    updated += 1
+                    self.stdout.write(
+                        f"  [{'SET' if apply else 'WOULD SET'}] "
+                        f"{gear.type:12s} | {gear.brand:20s} | {gear.name:45s} | ${price:.2f}"
+                    )
+                else:
+                    missing += 1
+                    missing_items.append(gear)
+                    self.stdout.write(
+                        self.style.WARNING(
+                            f"  [MISSING]   "
+                            f"{gear.type:12s} | {gear.brand:20s} | {gear.name:45s} | NO PRICE FOUND"
+                        )
                     )
-                )
 
         self.stdout.write(f"\n{'='*70}")
         self.stdout.write(f"  Results:")
@@ -1,8 +1,12 @@
+from django.conf import settings
 from django.contrib import messages
+from django.contrib.sessions.middleware import SessionMiddleware
 from django.shortcuts import redirect
 from django.contrib.auth import logout
 from django.urls import reverse
 
+from .instrumentation import collect_request_stages, server_timing_header, stage
+
 class BannedUserMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
@@ -33,3 +37,30 @@ class BannedUserMiddleware:
 
         response = self.get_response(request)
         return response
+
+
+class StageTimingMiddleware:
+    """
+    Collect the instrumentation stages of each request (see instrumentation.py)
+    and, when settings.SERVER_TIMING is on, report them in a Server-Timing header.
+    Must sit above TimedSessionMiddleware so session saving is included.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with collect_request_stages() as collected:
+            with stage('request'):
+                response = self.get_response(request)
+
+        if getattr(settings, 'SERVER_TIMING', False) and collected:
+            response['Server-Timing'] = server_timing_header(collected)
+        return response
+
+
+class TimedSessionMiddleware(SessionMiddleware):
+    """SessionMiddleware that times session serialization / saving as a stage."""
+
+    def process_response(self, request, response):
+        with stage('session.save'):
+            return super().process_response(request, response)
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:07
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('APP01', '0012_notification_passwordresetrequest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizResult',
+            fields=[
+                ('quiz_result_id', models.AutoField(primary_key=True, serialize=False)),
+                ('genre', models.CharField(max_length=20)),
+                ('hand_size', models.CharField(max_length=20)),
+                ('grip', models.CharField(max_length=20)),
+                ('variants', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'unique_together': {('genre', 'hand_size', 'grip')},
+            },
+        ),
+    ]
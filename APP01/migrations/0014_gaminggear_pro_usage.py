@@ -0,0 +1,51 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:09
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_pro_usage(apps, schema_editor):
+    GamingGear = apps.get_model('APP01', 'GamingGear')
+    ProPlayerGear = apps.get_model('APP01', 'ProPlayerGear')
+
+    usage = {}
+    rows = ProPlayerGear.objects.values('gear_id', 'player__game_id').annotate(n=Count('id')).order_by()
+    for row in rows:
+        entry = usage.setdefault(row['gear_id'], [0, {}])
+        entry[0] += row['n']
+        if row['player__game_id'] is not None:
+            entry[1][str(row['player__game_id'])] = row['n']
+
+    gears = list(GamingGear.objects.filter(gear_id__in=list(usage)))
+    for gear in gears:
+        gear.pro_usage_count, gear.pro_usage_by_game = usage[gear.gear_id]
+    GamingGear.objects.bulk_update(gears, ['pro_usage_count', 'pro_usage_by_game'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('APP01', '0013_quizresult'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gaminggear',
+            name='pro_usage_by_game',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='gaminggear',
+            name='pro_usage_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='gaminggear',
+            index=models.Index(fields=['type', '-pro_usage_count'], name='gear_type_pro_usage_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gaminggear',
+            index=models.Index(fields=['-pro_usage_count', 'name'], name='gear_pro_usage_idx'),
+        ),
+        migrations.RunPython(backfill_pro_usage, migrations.RunPython.noop),
+    ]
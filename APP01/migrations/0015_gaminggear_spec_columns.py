@@ -0,0 +1,88 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:11
+
+from django.db import migrations, models
+
+from APP01.spec_columns import backfill_spec_columns
+
+
+def backfill(apps, schema_editor):
+    GamingGear = apps.get_model('APP01', 'GamingGear')
+    backfill_spec_columns(GamingGear.objects.all(), fields=[
+        'weight_g', 'length_cm', 'refresh_hz', 'vertical_resolution',
+        'form_factor', 'shape', 'panel', 'sentiment',
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('APP01', '0014_gaminggear_pro_usage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gaminggear',
+            name='form_factor',
+            field=models.CharField(blank=True, choices=[('60%', '60%'), ('65%', '65%'), ('75%', '75%'), ('TKL', 'TKL'), ('Full Size', 'Full Size')], default='', editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='gaminggear',
+            name='length_cm',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='gaminggear',
+            name='panel',
+            field=models.CharField(blank=True, choices=[('OLED', 'OLED'), ('IPS', 'IPS'), ('VA', 'VA'), ('TN', 'TN')], default='', editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='gaminggear',
+            name='refresh_hz',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='gaminggear',
+            name='sentiment',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='gaminggear',
+            name='shape',
+            field=models.CharField(blank=True, choices=[('Ergonomic', 'Ergonomic'), ('Ambidextrous', 'Ambidextrous')], default='', editable=False, max_length=15),
+        ),
+        migrations.AddField(
+            model_name='gaminggear',
+            name='vertical_resolution',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='gaminggear',
+            name='weight_g',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='gaminggear',
+            index=models.Index(fields=['type', 'weight_g'], name='gear_type_weight_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gaminggear',
+            index=models.Index(fields=['type', 'length_cm'], name='gear_type_length_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gaminggear',
+            index=models.Index(fields=['type', 'refresh_hz'], name='gear_type_refresh_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gaminggear',
+            index=models.Index(fields=['type', 'form_factor'], name='gear_type_form_factor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gaminggear',
+            index=models.Index(fields=['type', 'shape'], name='gear_type_shape_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gaminggear',
+            index=models.Index(fields=['type', '-sentiment'], name='gear_type_sentiment_idx'),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:13
+
+from django.db import migrations, models
+
+from APP01.spec_columns import backfill_spec_columns
+
+
+def backfill(apps, schema_editor):
+    GamingGear = apps.get_model('APP01', 'GamingGear')
+    backfill_spec_columns(GamingGear.objects.filter(type='Chair'), fields=[
+        'max_weight_kg', 'material', 'lumbar_adjustable',
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('APP01', '0015_gaminggear_spec_columns'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gaminggear',
+            name='lumbar_adjustable',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='gaminggear',
+            name='material',
+            field=models.CharField(blank=True, choices=[('Fabric', 'Fabric'), ('Real Leather', 'Real Leather'), ('Artificial Leather', 'Artificial Leather'), ('Mesh', 'Mesh')], default='', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='gaminggear',
+            name='max_weight_kg',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
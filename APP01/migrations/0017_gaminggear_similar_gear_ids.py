@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('APP01', '0016_gaminggear_chair_spec_columns'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gaminggear',
+            name='similar_gear_ids',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+    ]
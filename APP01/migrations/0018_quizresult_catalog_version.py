@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('APP01', '0017_gaminggear_similar_gear_ids'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizresult',
+            name='catalog_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
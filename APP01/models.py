@@ -146,6 +146,11 @@ class ProPlayer(models.Model):
 # --- GamingGear Model ---
 from django.contrib.postgres.indexes import GinIndex
 
+from .spec_columns import (
+    FORM_FACTOR_CHOICES, MATERIAL_CHOICES, PANEL_CHOICES, SHAPE_CHOICES, SPEC_COLUMNS,
+    derive_spec_columns,
+)
+
 class GamingGear(models.Model):
     gear_id = models.AutoField(primary_key=True)
     name = models.CharField(max_length=100)
@@ -158,12 +163,52 @@ class GamingGear(models.Model):
     image = models.ImageField(upload_to='gaming_gears/', blank=True, null=True) # เปลี่ยนจาก URL เป็น ImageField
     created_at = models.DateTimeField(default=timezone.now)
 
+    # Denormalized pro usage (maintained by pro_usage.py, repair with `recount_pro_usage`)
+    pro_usage_count = models.PositiveIntegerField(default=0, editable=False)
+    pro_usage_by_game = models.JSONField(default=dict, blank=True, editable=False) # {game_id: count}
+
+    # Typed copies of specs values (derived on save, repair with `backfill_spec_columns`)
+    weight_g = models.FloatField(null=True, blank=True, editable=False)
+    length_cm = models.FloatField(null=True, blank=True, editable=False)
+    refresh_hz = models.FloatField(null=True, blank=True, editable=False)
+    vertical_resolution = models.PositiveIntegerField(null=True, blank=True, editable=False) # 1080, 1440, 2160
+    form_factor = models.CharField(max_length=10, choices=FORM_FACTOR_CHOICES, blank=True, default='', editable=False)
+    shape = models.CharField(max_length=15, choices=SHAPE_CHOICES, blank=True, default='', editable=False)
+    panel = models.CharField(max_length=10, choices=PANEL_CHOICES, blank=True, default='', editable=False)
+    sentiment = models.FloatField(null=True, blank=True, editable=False) # 0 - 9.9 ตามที่แสดงผล
+    max_weight_kg = models.FloatField(null=True, blank=True, editable=False) # Chair
+    material = models.CharField(max_length=20, choices=MATERIAL_CHOICES, blank=True, default='', editable=False)
+    lumbar_adjustable = models.BooleanField(default=False, editable=False)
+
+    # Top-16 most similar gears of the same type (maintained by similar_gear.py)
+    similar_gear_ids = models.JSONField(default=list, blank=True, editable=False)
+
     def __str__(self):
         return f"{self.brand} {self.name} ({self.type})"
 
+    def apply_spec_columns(self):
+        """Copy the parsed specs values onto the typed columns."""
+        for field, value in derive_spec_columns(self.specs).items():
+            setattr(self, field, value)
+
+    def save(self, *args, **kwargs):
+        self.apply_spec_columns()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'specs' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | set(SPEC_COLUMNS)
+        super().save(*args, **kwargs)
+
     class Meta:
         indexes = [
             GinIndex(fields=['specs'], name='specs_gin_index'),
+            models.Index(fields=['type', '-pro_usage_count'], name='gear_type_pro_usage_idx'),
+            models.Index(fields=['-pro_usage_count', 'name'], name='gear_pro_usage_idx'),
+            models.Index(fields=['type', 'weight_g'], name='gear_type_weight_idx'),
+            models.Index(fields=['type', 'length_cm'], name='gear_type_length_idx'),
+            models.Index(fields=['type', 'refresh_hz'], name='gear_type_refresh_idx'),
+            models.Index(fields=['type', 'form_factor'], name='gear_type_form_factor_idx'),
+            models.Index(fields=['type', 'shape'], name='gear_type_shape_idx'),
+            models.Index(fields=['type', '-sentiment'], name='gear_type_sentiment_idx'),
         ]
         constraints = [
             models.CheckConstraint(check=models.Q(price__gte=0), name='price_gte_0'),
@@ -283,4 +328,26 @@ class Notification(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
 
     def __str__(self):
-        return f"To {self.recipient.username}: {self.subject}"
\ No newline at end of file
+        return f"To {self.recipient.username}: {self.subject}"
+
+# --- Quiz Result Model (Precomputed quiz recommendations) ---
+class QuizResult(models.Model):
+    """
+    Materialized output of recommend_variant_setups for one quiz answer
+    combination (genre × hand_size × grip), stored in the same shape
+    process_quiz keeps in the session.
+    """
+    quiz_result_id = models.AutoField(primary_key=True)
+    genre = models.CharField(max_length=20)
+    hand_size = models.CharField(max_length=20)
+    grip = models.CharField(max_length=20)
+    variants = models.JSONField(default=dict)
+    # quiz_results_version the variants were computed against
+    catalog_version = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ('genre', 'hand_size', 'grip')
+
+    def __str__(self):
+        return f"Quiz result: {self.genre} / {self.hand_size} / {self.grip}"
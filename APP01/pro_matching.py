@@ -0,0 +1,140 @@
+"""
+"Pros who play like you": nearest pro players by eDPI and sensitivity.
+
+Each Game gets an in-memory KD-tree (scipy cKDTree) over its players'
+(eDPI, sensitivity), both divided by their spread within the game so one
+axis does not dominate. The tree and a small table of player fields are
+built on first use in each process; a query is then a single tree lookup
+with no database access.
+
+ProPlayer changes (signals.py) bump a shared version in the cache once
+their transaction commits. Every process notices the new version at most
+VERSION_CHECK_SECONDS later and rebuilds its trees lazily; a tree whose
+build started before the bump is not kept.
+"""
+
+import math
+import threading
+import time
+
+import numpy as np
+from django.core.cache import cache
+from django.db import transaction
+from scipy.spatial import cKDTree
+
+from .models import ProPlayer
+
+VERSION_CACHE_KEY = 'pro_matching_version'
+VERSION_CHECK_SECONDS = 5
+DEFAULT_MATCHES = 5
+MAX_MATCHES = 20
+
+_lock = threading.Lock()
+_indexes = {}  # game_id -> GamePlayerIndex
+_version = {'value': None, 'checked_at': 0.0}
+
+
+class GamePlayerIndex:
+    """KD-tree over one game's players."""
+
+    def __init__(self, players):
+        self.players = players
+        points = np.array([[p['edpi'], p['sensitivity']] for p in players], dtype=float).reshape(-1, 2)
+        spread = points.std(axis=0) if len(players) > 1 else np.ones(2)
+        self.scale = np.where(spread > 0, spread, 1.0)
+        self.tree = cKDTree(points / self.scale) if len(players) else None
+
+    def query(self, edpi, sensitivity, k=DEFAULT_MATCHES):
+        if self.tree is None:
+            return []
+        k = min(k, len(self.players))
+        distances, indices = self.tree.query(np.array([edpi, sensitivity]) / self.scale, k=k)
+        distances, indices = np.atleast_1d(distances), np.atleast_1d(indices)
+        return [
+            {**self.players[i], 'distance': round(float(d), 4)}
+            for d, i in zip(distances, indices)
+        ]
+
+
+def build_game_index(game_id):
+    """Load one game's players that have both eDPI and sensitivity."""
+    players = []
+    rows = (
+        ProPlayer.objects.filter(game_id=game_id, edpi__isnull=False, sensitivity__isnull=False)
+        .order_by('player_id')
+        .only('player_id', 'name', 'edpi', 'sensitivity', 'image', 'settings')
+    )
+    for player in rows:
+        settings = player.settings if isinstance(player.settings, dict) else {}
+        mouse_settings = settings.get('mouse_settings') or {}
+        players.append({
+            'player_id': player.player_id,
+            'name': player.name,
+            'edpi': float(player.edpi),
+            'sensitivity': float(player.sensitivity),
+            'dpi': mouse_settings.get('DPI'),
+            'image_url': player.image.url if player.image else None,
+        })
+    return GamePlayerIndex(players)
+
+
+def _check_version():
+    """Drop local trees if another process (or a signal) bumped the version."""
+    now = time.monotonic()
+    if now - _version['checked_at'] < VERSION_CHECK_SECONDS:
+        return
+    current = cache.get(VERSION_CACHE_KEY, 0)
+    with _lock:
+        if current != _version['value']:
+            _indexes.clear()
+            _version['value'] = current
+        _version['checked_at'] = now
+
+
+def get_game_index(game_id):
+    _check_version()
+    index = _indexes.get(game_id)
+    if index is None:
+        version = _version['value']
+        index = build_game_index(game_id)
+        with _lock:
+            # Rows read before an invalidation must not outlive it
+            if _version['value'] == version:
+                _indexes[game_id] = index
+    return index
+
+
+def parse_setting(value):
+    """A DPI or sensitivity from user input; ValueError unless finite and positive."""
+    number = float(value)
+    if not math.isfinite(number) or number <= 0:
+        raise ValueError(f"Expected a positive number, got {value!r}")
+    return number
+
+
+def find_similar_pros(game_id, dpi, sensitivity, k=DEFAULT_MATCHES):
+    """
+    Nearest pros of a game for a user's DPI and in-game sensitivity.
+
+    eDPI is DPI × sensitivity, the same figure stored on ProPlayer.
+    """
+    k = max(1, min(int(k), MAX_MATCHES))
+    edpi = float(dpi) * float(sensitivity)
+    return get_game_index(game_id).query(edpi, float(sensitivity), k)
+
+
+def _bump_version():
+    try:
+        version = cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        version = 1
+        cache.set(VERSION_CACHE_KEY, version, None)
+    with _lock:
+        _indexes.clear()
+        _version['value'] = version
+        _version['checked_at'] = time.monotonic()
+
+
+def invalidate_pro_matching():
+    """Called on ProPlayer changes: every process rebuilds its trees once the change is committed."""
+    transaction.on_commit(_bump_version)
@@ -0,0 +1,97 @@
+"""
+Denormalized pro usage counters on GamingGear.
+
+GamingGear.pro_usage_count (total pros using the gear) and
+GamingGear.pro_usage_by_game ({game_id: count}) replace the on-the-fly
+Count('proplayergear') joins on listing pages and in the recommenders.
+
+Counters are kept in sync by ProPlayerGear / ProPlayer signals (signals.py),
+which recount only the affected gears. Bulk writers (ProPlayerForm.save,
+import_real_data) wrap their work in defer_pro_usage_refresh() so each
+touched gear is recounted once at the end instead of once per row.
+`python manage.py recount_pro_usage` rebuilds every counter from scratch.
+"""
+
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.db.models import Count
+
+from .catalog_index import publish_changes
+from .models import GamingGear, ProPlayerGear
+
+_state = threading.local()
+
+
+def _count_usage(gear_ids=None):
+    """Return {gear_id: (total, {game_id: count})} from ProPlayerGear."""
+    rows = ProPlayerGear.objects.all()
+    if gear_ids is not None:
+        rows = rows.filter(gear_id__in=gear_ids)
+    rows = rows.values('gear_id', 'player__game_id').annotate(n=Count('id')).order_by()
+
+    usage = defaultdict(lambda: [0, {}])
+    for row in rows:
+        entry = usage[row['gear_id']]
+        entry[0] += row['n']
+        if row['player__game_id'] is not None:
+            entry[1][str(row['player__game_id'])] = row['n']
+    return usage
+
+
+def refresh_pro_usage(gear_ids):
+    """Recount usage for the given gears only."""
+    gear_ids = {gid for gid in gear_ids if gid is not None}
+    if not gear_ids:
+        return
+
+    deferred = getattr(_state, 'pending', None)
+    if deferred is not None:
+        deferred.update(gear_ids)
+        return
+
+    usage = _count_usage(gear_ids)
+    gears = list(GamingGear.objects.filter(gear_id__in=gear_ids).only('gear_id'))
+    for gear in gears:
+        total, by_game = usage.get(gear.gear_id, (0, {}))
+        gear.pro_usage_count = total
+        gear.pro_usage_by_game = by_game
+    # bulk_update does not send post_save, so quiz results are not invalidated twice
+    GamingGear.objects.bulk_update(gears, ['pro_usage_count', 'pro_usage_by_game'])
+    publish_changes(gear_ids)
+
+
+def recount_all_pro_usage(batch_size=500):
+    """Rebuild every gear's counters. Returns the number of gears updated."""
+    usage = _count_usage()
+    gears = list(GamingGear.objects.only('gear_id', 'pro_usage_count', 'pro_usage_by_game'))
+    changed = []
+    for gear in gears:
+        total, by_game = usage.get(gear.gear_id, (0, {}))
+        if gear.pro_usage_count != total or gear.pro_usage_by_game != by_game:
+            gear.pro_usage_count = total
+            gear.pro_usage_by_game = by_game
+            changed.append(gear)
+    GamingGear.objects.bulk_update(changed, ['pro_usage_count', 'pro_usage_by_game'], batch_size=batch_size)
+    publish_changes(gear.gear_id for gear in changed)
+    return len(changed)
+
+
+@contextmanager
+def defer_pro_usage_refresh():
+    """
+    Collect gear IDs touched inside the block and recount them once on exit.
+
+    Nested blocks share the outer collection.
+    """
+    if getattr(_state, 'pending', None) is not None:
+        yield
+        return
+
+    _state.pending = set()
+    try:
+        yield
+    finally:
+        pending, _state.pending = _state.pending, None
+    refresh_pro_usage(pending)
@@ -0,0 +1,166 @@
+"""
+Precomputed quiz results.
+
+The quiz only has a small, fixed answer space (genre × hand_size × grip),
+so every combination's Performance / Balanced / Pro variants can be
+computed ahead of time and stored in QuizResult. process_quiz then does a
+single keyed lookup instead of scanning the catalog.
+
+Rows are rebuilt by `python manage.py build_quiz_results` and dropped
+automatically (see signals.py) once a GamingGear or ProPlayerGear change
+commits; a missing row is recomputed and stored on the next quiz submission.
+Each row is tagged with the shared version it was computed against, and
+only rows of the current version are served, so a result computed while
+the catalog changed is never kept.
+"""
+
+import logging
+from itertools import product
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .catalog_index import get_candidates
+from .feature_store import FeatureStoreRecommender, get_recommender
+from .instrumentation import timed
+from .models import QuizResult
+from .recommender_hybrid import SETUP_CATEGORIES, load_candidates
+from .recommender_vectorized import VectorizedRecommender
+
+logger = logging.getLogger(__name__)
+
+QUIZ_GENRES = ['FPS', 'MOBA', 'MMO']
+QUIZ_HAND_SIZES = ['Small', 'Medium', 'Large']
+QUIZ_GRIPS = ['Palm', 'Claw', 'Fingertip']
+
+VERSION_KEY = 'quiz_results_version'
+
+
+def quiz_combinations():
+    """All (genre, hand_size, grip) answers the quiz form can submit."""
+    return list(product(QUIZ_GENRES, QUIZ_HAND_SIZES, QUIZ_GRIPS))
+
+
+def is_quiz_combination(user_prefs):
+    return (
+        user_prefs.get('genre') in QUIZ_GENRES
+        and user_prefs.get('hand_size') in QUIZ_HAND_SIZES
+        and user_prefs.get('grip') in QUIZ_GRIPS
+    )
+
+
+def serialize_variants(variants):
+    """
+    Convert recommend_variant_setups() output into the JSON-safe structure
+    stored in the session (gear objects replaced by their IDs).
+    """
+    variants_data = {}
+    for v_name, v_data in variants.items():
+        variants_data[v_name] = {
+            'desc': v_data.get('desc', ''),
+            'badge': v_data.get('badge', ''),
+            'analysis': v_data.get('analysis', ''),
+            'pros': v_data.get('pros', []),
+            'cons': v_data.get('cons', []),
+            'score': v_data.get('score', 0),
+            'gears': {}
+        }
+        for cat in SETUP_CATEGORIES:
+            g_entry = v_data.get(cat)
+            if g_entry:
+                variants_data[v_name]['gears'][cat] = {
+                    'id': g_entry['gear'].gear_id,
+                    'reasons': g_entry.get('reasons', []),
+                    'score': float(g_entry.get('score', 0))
+                }
+    return variants_data
+
+
+def compute_quiz_variants(user_prefs, recommender=None, candidates=None):
+    if recommender is None:
+        # Live requests read the shared feature store when one has been built,
+        # otherwise this process's signal-patched catalog index
+        recommender = get_recommender()
+        if candidates is None and not isinstance(recommender, FeatureStoreRecommender):
+            candidates = get_candidates()
+    return serialize_variants(recommender.recommend_variant_setups(user_prefs, candidates))
+
+
+@timed('get_quiz_variants')
+def get_quiz_variants(user_prefs):
+    """
+    Return serialized variants for a quiz submission.
+
+    Known combinations are served from QuizResult (filled on first miss);
+    anything outside the quiz answer space is computed live.
+    """
+    if not is_quiz_combination(user_prefs):
+        return compute_quiz_variants(user_prefs)
+
+    key = {
+        'genre': user_prefs['genre'],
+        'hand_size': user_prefs['hand_size'],
+        'grip': user_prefs['grip'],
+    }
+    version = cache.get(VERSION_KEY, 0)
+    stored = (
+        QuizResult.objects.filter(catalog_version=version, **key)
+        .values_list('variants', flat=True).first()
+    )
+    if stored is not None:
+        return stored
+
+    variants_data = compute_quiz_variants(user_prefs)
+    # Not stored if the catalog changed while computing
+    if cache.get(VERSION_KEY, 0) == version:
+        QuizResult.objects.update_or_create(
+            defaults={'variants': variants_data, 'catalog_version': version}, **key
+        )
+    return variants_data
+
+
+def rebuild_quiz_results():
+    """
+    Recompute every quiz combination in one batch, so the catalog is read
+    from the database only once.
+
+    Returns the number of stored combinations.
+    """
+    version = cache.get(VERSION_KEY, 0)
+    combinations = quiz_combinations()
+    prefs_list = [
+        {'genre': genre, 'hand_size': hand_size, 'grip': grip}
+        for genre, hand_size, grip in combinations
+    ]
+    results = VectorizedRecommender().recommend_variant_setups_batch(prefs_list, load_candidates())
+    rows = [
+        QuizResult(
+            genre=genre, hand_size=hand_size, grip=grip,
+            variants=serialize_variants(variants), catalog_version=version,
+        )
+        for (genre, hand_size, grip), variants in zip(combinations, results)
+    ]
+
+    with transaction.atomic():
+        QuizResult.objects.all().delete()
+        QuizResult.objects.bulk_create(rows)
+
+    logger.info(f"Rebuilt {len(rows)} precomputed quiz results")
+    return len(rows)
+
+
+def _invalidate():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, 0, None)
+        cache.incr(VERSION_KEY)
+    QuizResult.objects.all().delete()
+
+
+def invalidate_quiz_results():
+    """
+    Once the current transaction commits, drop all stored quiz results
+    (they are refilled lazily or by the command).
+    """
+    transaction.on_commit(_invalidate)
@@ -1,9 +1,66 @@
-import json
+import heapq
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from .instrumentation import add_rows, stage, timed
 from .models import GamingGear
+from .recommender_sql import rank_in_db
+from .spec_columns import SPEC_COLUMNS, load_specs
+
+SETUP_CATEGORIES = ['Mouse', 'Keyboard', 'Headset', 'Monitor', 'Chair']
+
+# Entries returned by each recommend_<category>() call
+TOP_K = 5
+
+# Columns the scorers and the budget optimizer read; description / image / store_url are skipped
+CANDIDATE_FIELDS = ('gear_id', 'name', 'type', 'brand', 'price', 'specs', 'pro_usage_count') + SPEC_COLUMNS
+
+
+def load_candidates(categories=SETUP_CATEGORIES):
+    """
+    Fetch every candidate for the given categories in a single query.
+
+    Pro usage comes from the denormalized `pro_usage_count` column,
+    so the Pro variant needs no extra query.
+    Returns {category: [GamingGear, ...]} in gear_id order.
+    """
+    bundle = {category: [] for category in categories}
+    queryset = (
+        GamingGear.objects.filter(type__in=categories)
+        .only(*CANDIDATE_FIELDS)
+        .order_by('gear_id')
+    )
+    with stage('load_candidates'):
+        for gear in queryset:
+            bundle[gear.type].append(gear)
+        add_rows(sum(len(gears) for gears in bundle.values()))
+    return bundle
+
+
+def profile_key(user_prefs):
+    """The answers the scorers actually read; equal keys give equal setups."""
+    return (user_prefs.get('genre'), user_prefs.get('hand_size'), user_prefs.get('grip'))
+
+
+# Per-process state for recommend_variant_setups_batch(workers=N)
+_worker_recommender = None
+_worker_candidates = None
+
+
+def _init_batch_worker(recommender_class, candidates):
+    global _worker_recommender, _worker_candidates
+    _worker_recommender = recommender_class()
+    _worker_candidates = candidates
+
+
+def _score_batch_chunk(profiles):
+    return [_worker_recommender.recommend_variant_setups(prefs, _worker_candidates) for prefs in profiles]
+
 
 class HybridRecommender:
     def __init__(self):
-        pass
+        # The budget optimizer raises this to rank more candidates per category
+        self.top_k = TOP_K
 
     def _format_sentiment(self, raw_score):
         try:
@@ -17,85 +74,132 @@ class HybridRecommender:
             return val
         except:
             return 0
+
+    def recommend(self, category, user_prefs, candidates=None, mode='python'):
+        """
+        Top `self.top_k` gears of one category.
+
+        mode='python' scores every candidate in Python (recommend_<category>);
+        mode='sql' ranks inside the database and fetches only the top_k rows
+        (see recommender_sql.py). In SQL mode `candidates` may be a GamingGear
+        queryset to narrow the search.
+        """
+        if mode == 'sql':
+            if candidates is not None and not hasattr(candidates, 'query'):
+                raise ValueError("mode='sql' needs a GamingGear queryset as candidates")
+            return rank_in_db(category, user_prefs, candidates, self.top_k)
+        if mode != 'python':
+            raise ValueError(f"Unknown recommendation mode: {mode}")
+        if candidates is None:
+            # Same tie order as the SQL mode
+            candidates = GamingGear.objects.filter(type=category).order_by('gear_id')
+        return getattr(self, f'recommend_{category.lower()}')(user_prefs, candidates)
             
-    def recommend_chair(self, user_prefs):
+    def _rank_candidates(self, candidates, score_fn, explain_fn, include_specs=False):
+        """
+        Two-stage ranking shared by the recommend_<category>() methods.
+
+        score_fn(specs) is pure arithmetic and runs for every candidate;
+        explain_fn(specs) renders the reason strings and only runs for the
+        top_k entries that are returned.
+        """
+        gears = list(candidates)
+        add_rows(len(gears))
+        scores = [score_fn(load_specs(gear.specs)) for gear in gears]
+
+        # nlargest() keeps catalog order on ties, like a stable sort(reverse=True)
+        results = []
+        for i in heapq.nlargest(self.top_k, range(len(gears)), key=scores.__getitem__):
+            gear, score = gears[i], scores[i]
+            specs = load_specs(gear.specs)
+            entry = {
+                'gear': gear,
+                'score': score,
+                'reasons': explain_fn(specs),
+                'sentiment': specs.get('sentiment_score', 0),
+            }
+            if include_specs:
+                entry['specs'] = specs
+            results.append(entry)
+        return results
+
+    def _parse_max_weight(self, specs):
+        try:
+            return float(specs.get('Max weight', '100') or '100')
+        except (ValueError, TypeError):
+            return 100.0
+
+    @timed('recommend_chair')
+    def recommend_chair(self, user_prefs, candidates=None):
         # Chair logic is tricky without height/weight from user, but we can use 'hand_size' as a proxy for body size
         # Small hand -> Small/Medium Chair?
         # Large hand -> Large Chair?
         # Or just recommend generally good ergonomic chairs.
-        
         hand_size = user_prefs.get('hand_size', 'Medium')
-        candidates = GamingGear.objects.filter(type='Chair')
-        scores = []
-        
-        for gear in candidates:
-            score = 0
-            reasons = []
-            if isinstance(gear.specs, str):
-                try:
-                    specs = json.loads(gear.specs)
-                except:
-                    specs = {}
-            else:
-                specs = gear.specs
-                
-            try:
-                max_weight_str = specs.get('Max weight', '100')
-                if not max_weight_str:
-                    max_weight_str = '100'
-                max_weight = float(max_weight_str)
-            except (ValueError, TypeError):
-                max_weight = 100.0
-            
-            # Simple Size Logic
-            if hand_size == 'Large': 
-                if max_weight >= 130:
-                    score += 20
-                    reasons.append(f"High durability {max_weight}kg")
-            elif hand_size == 'Small':
-                # No penalty for durable chairs, but maybe prefer slightly smaller ones if we had dimensions
-                pass
-                
-            # Material Logic (Random proxy for now as we don't ask for it)
-            material = specs.get('Material', '')
-            if 'Fabric' in material:
-                score += 10
-                reasons.append("Breathable Fabric")
-            elif 'Real Leather' in material:
-                score += 15
-                reasons.append("Premium Real Leather")
-                
-            # Lumbar Support
-            if 'Adjustable' in specs.get('Lumbar support', ''):
-                score += 10
-                reasons.append("Adjustable Lumbar Support")
-                
-            # Sentiment
-            sentiment = specs.get('sentiment_score', 0)
-            if sentiment:
-                try:
-                    sent_val = self._format_sentiment(sentiment)
-                    score += min(sent_val * 2, 30)
-                    if sent_val > 5:
-                        reasons.append(f"High reviewer sentiment ({sent_val}/10)")
-                except: pass
-                
-            scores.append({'gear': gear, 'score': score, 'reasons': reasons, 'sentiment': sentiment})
-            
-        scores.sort(key=lambda x: x['score'], reverse=True)
-        return scores[:5]
+        if candidates is None:
+            candidates = GamingGear.objects.filter(type='Chair')
+        return self._rank_candidates(
+            candidates,
+            lambda specs: self._score_chair(specs, hand_size),
+            lambda specs: self._explain_chair(specs, hand_size),
+        )
+
+    def _score_chair(self, specs, hand_size):
+        score = 0
+        # Simple Size Logic (no dimensions yet, so Small hands get no preference)
+        if hand_size == 'Large' and self._parse_max_weight(specs) >= 130:
+            score += 20
+
+        # Material Logic (Random proxy for now as we don't ask for it)
+        material = specs.get('Material', '')
+        if 'Fabric' in material:
+            score += 10
+        elif 'Real Leather' in material:
+            score += 15
+
+        # Lumbar Support
+        if 'Adjustable' in specs.get('Lumbar support', ''):
+            score += 10
+
+        sentiment = specs.get('sentiment_score', 0)
+        if sentiment:
+            score += min(self._format_sentiment(sentiment) * 2, 30)
+        return score
+
+    def _explain_chair(self, specs, hand_size):
+        reasons = []
+        max_weight = self._parse_max_weight(specs)
+        if hand_size == 'Large' and max_weight >= 130:
+            reasons.append(f"High durability {max_weight}kg")
+
+        material = specs.get('Material', '')
+        if 'Fabric' in material:
+            reasons.append("Breathable Fabric")
+        elif 'Real Leather' in material:
+            reasons.append("Premium Real Leather")
+
+        if 'Adjustable' in specs.get('Lumbar support', ''):
+            reasons.append("Adjustable Lumbar Support")
+
+        sentiment = specs.get('sentiment_score', 0)
+        if sentiment:
+            sent_val = self._format_sentiment(sentiment)
+            if sent_val > 5:
+                reasons.append(f"High reviewer sentiment ({sent_val}/10)")
+        return reasons
 
     def recommend_setup(self, user_prefs):
         """
         Recommend a full setup (Mouse, Keyboard, Headset, Monitor, Chair) based on user profile.
         Returns a dictionary of recommendations for each category.
         """
-        # Get top candidates
-        mice = self.recommend_mouse(user_prefs)
-        keyboards = self.recommend_keyboard(user_prefs)
-        headsets = self.recommend_headset(user_prefs)
-        monitors = self.recommend_monitor(user_prefs)
-        chairs = self.recommend_chair(user_prefs)
+        # Get top candidates (one query for all categories)
+        candidates = load_candidates()
+        mice = self.recommend_mouse(user_prefs, candidates['Mouse'])
+        keyboards = self.recommend_keyboard(user_prefs, candidates['Keyboard'])
+        headsets = self.recommend_headset(user_prefs, candidates['Headset'])
+        monitors = self.recommend_monitor(user_prefs, candidates['Monitor'])
+        chairs = self.recommend_chair(user_prefs, candidates['Chair'])
         
         # Take the best one for legacy compatibility
         setup = {
@@ -107,36 +211,42 @@ class HybridRecommender:
         }
         return setup
 
-    def recommend_variant_setups(self, user_prefs):
+    @timed('recommend_variant_setups')
+    def recommend_variant_setups(self, user_prefs, candidates=None):
         """
         Returns 3 distinct setups: Performance, Balanced, Pro.
         Each includes an AI-generated analysis with pros/cons.
+
+        `candidates` is an optional bundle from load_candidates(); when omitted
+        it is loaded here, so the whole call costs a single query.
         """
         genre = user_prefs.get('genre', 'Gaming')
         hand_size = user_prefs.get('hand_size', 'Medium')
         grip = user_prefs.get('grip', 'Palm')
 
+        if candidates is None:
+            candidates = load_candidates()
+
         # Get Candidates (Top 5)
-        mice = self.recommend_mouse(user_prefs)
-        keyboards = self.recommend_keyboard(user_prefs)
-        headsets = self.recommend_headset(user_prefs)
-        monitors = self.recommend_monitor(user_prefs)
-        chairs = self.recommend_chair(user_prefs)
+        mice = self.recommend_mouse(user_prefs, candidates['Mouse'])
+        keyboards = self.recommend_keyboard(user_prefs, candidates['Keyboard'])
+        headsets = self.recommend_headset(user_prefs, candidates['Headset'])
+        monitors = self.recommend_monitor(user_prefs, candidates['Monitor'])
+        chairs = self.recommend_chair(user_prefs, candidates['Chair'])
 
         variants = {}
 
         # === Helper: extract key spec safely ===
+        # Specs are parsed once per gear (mouse entries already carry them)
+        parsed_specs = {}
+
         def _spec(gear_entry, key, default='-'):
             if not gear_entry:
                 return default
-            try:
-                if isinstance(gear_entry['gear'].specs, str):
-                    specs = json.loads(gear_entry['gear'].specs)
-                else:
-                    specs = gear_entry['gear'].specs
-                return specs.get(key, default)
-            except (json.JSONDecodeError, AttributeError, TypeError): # Catch specific errors for robustness
-                return default
+            gear = gear_entry['gear']
+            if gear.gear_id not in parsed_specs:
+                parsed_specs[gear.gear_id] = gear_entry.get('specs') or load_specs(gear.specs)
+            return parsed_specs[gear.gear_id].get(key, default)
 
         # Helper to calculate total score for a setup
         def calculate_variant_score(variant_gears):
@@ -314,29 +424,22 @@ class HybridRecommender:
         # ======================================================
         # 3. Pro Choice (Most Used by Pros)
         # ======================================================
-        from django.db.models import Count
-        
+        @timed('get_pro_choice')
         def get_pro_choice(category):
             # Find the gear with the highest pro usage count
-            # We use 'proplayergear' which is the default related name lookup for Count
-            popular = GamingGear.objects.filter(type=category).annotate(p_count=Count('proplayergear')).order_by('-p_count').first()
-            
-            if not popular:
+            # pro_usage_count is loaded by load_candidates(), no extra query needed
+            category_gears = candidates.get(category)
+            if not category_gears:
                 return None
+            add_rows(len(category_gears))
+            popular = max(category_gears, key=lambda g: g.pro_usage_count)
                 
             # Create a gear entry structure similar to recommend_X functions
             reasons = [f"Most used {category} among Pro Players"]
-            if popular.p_count > 0:
-                reasons.append(f"Used by {popular.p_count} Pros in our database")
-            
-            # Helper to get specs safely
-            specs = popular.specs if isinstance(popular.specs, dict) else {}
-            if isinstance(popular.specs, str):
-                try:
-                    specs = json.loads(popular.specs)
-                except:
-                    specs = {}
+            if popular.pro_usage_count > 0:
+                reasons.append(f"Used by {popular.pro_usage_count} Pros in our database")
             
+            specs = load_specs(popular.specs)
             sentiment = specs.get('sentiment_score', 0)
             
             return {
@@ -366,7 +469,7 @@ class HybridRecommender:
 
         pro_mouse = pro_gears_list[0]
         if pro_mouse:
-            p_count = pro_mouse['gear'].p_count
+            p_count = pro_mouse['gear'].pro_usage_count
             if p_count > 2:
                 pro_pros.append(f"Mouse is a dominant choice with {p_count} pro users")
             
@@ -395,6 +498,43 @@ class HybridRecommender:
 
         return variants
 
+    def recommend_variant_setups_batch(self, prefs_list, candidates=None, workers=None, chunk_size=200):
+        """
+        recommend_variant_setups() for many profiles at once.
+
+        The catalog is loaded once and every distinct (genre, hand_size, grip)
+        profile is scored only once; profiles with the same answers share the
+        same result dict. Returns a list aligned with prefs_list.
+
+        With `workers` > 1 the distinct profiles are split into chunks of
+        `chunk_size` and scored in a process pool. Workers receive the
+        candidate bundle up front and never touch the database.
+        """
+        if candidates is None:
+            candidates = load_candidates()
+
+        distinct = {}
+        for user_prefs in prefs_list:
+            distinct.setdefault(profile_key(user_prefs), user_prefs)
+        profiles = list(distinct.values())
+
+        if workers and workers > 1 and len(profiles) > chunk_size:
+            chunks = [profiles[i:i + chunk_size] for i in range(0, len(profiles), chunk_size)]
+            # fork keeps the configured Django app registry in the workers
+            context = multiprocessing.get_context('fork') if 'fork' in multiprocessing.get_all_start_methods() else None
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=context,
+                initializer=_init_batch_worker,
+                initargs=(type(self), candidates),
+            ) as pool:
+                results = [variants for chunk in pool.map(_score_batch_chunk, chunks) for variants in chunk]
+        else:
+            results = [self.recommend_variant_setups(user_prefs, candidates) for user_prefs in profiles]
+
+        by_key = dict(zip(distinct, results))
+        return [by_key[profile_key(user_prefs)] for user_prefs in prefs_list]
+
     def _parse_mouse_specs(self, specs):
         """Helper to extract mouse length and weight robustly."""
         # 1. Length from "H / W / L (cm)"
@@ -418,276 +558,295 @@ class HybridRecommender:
             
         return length, weight
 
-    def recommend_mouse(self, user_prefs):
+    @timed('recommend_mouse')
+    def recommend_mouse(self, user_prefs, candidates=None):
         """
         Ranking Algorithm for Mice based on User Preferences & NLP Sentiment.
         """
         genre = user_prefs.get('genre', 'FPS')
         hand_size = user_prefs.get('hand_size', 'Medium')
         grip = user_prefs.get('grip', 'Palm')
-        
-        candidates = GamingGear.objects.filter(type='Mouse')
-        scores = []
-        
-        for gear in candidates:
-            score = 0
-            reasons = []
-            if isinstance(gear.specs, str):
-                try:
-                    specs = json.loads(gear.specs)
-                except:
-                    specs = {}
-            else:
-                specs = gear.specs
-                
-            # Parse Specs
-            length, weight = self._parse_mouse_specs(specs)
-            shape = specs.get('Shape', 'Ambidextrous') # Ambidextrous / Ergonomic
-
-            # --- 1. Hand Size Logic (Critical) ---
-            # Small: < 17cm -> Mouse Length < 12.0cm
-            # Medium: 17-19cm -> Mouse Length 11.5 - 12.5cm
-            # Large: > 19cm -> Mouse Length > 12.5cm
-            
-            fit_score = 0
-            if hand_size == 'Small':
-                if length > 0 and length < 12.0:
-                    fit_score = 30
-                    reasons.append(f"Compact size ({length}cm) fits Small Hands")
-                elif length > 12.5:
-                    score -= 20 # Too big
-            elif hand_size == 'Large':
-                if length > 12.4:
-                    fit_score = 30
-                    reasons.append(f"Large size ({length}cm) fits Large Hands")
-                elif length > 0 and length < 11.8:
-                    score -= 10 # Too small
-            else: # Medium fits most, but prefer balanced
-                if 11.5 <= length <= 12.6:
-                     fit_score = 15
-                
-            score += fit_score
-                
-            # --- 2. Grip Logic ---
-            # Palm -> Ergonomic (Usually) or High Profile Amb
-            # Claw -> Ambidextrous (Usually)
-            # Fingertip -> Small/Low Profile Ambidextrous
-            
-            grip_score = 0
-            if grip == 'Palm':
-                if 'Ergonomic' in shape:
-                    grip_score = 25
-                    reasons.append(f"Ergonomic shape perfect for Palm Grip")
-                elif length > 12.5: # Large Ambi also works for Palm
-                    grip_score = 10
-            elif grip == 'Claw':
-                # Claw is versatile, usually Ambi or Ergo works, but weight matters
-                if 'Ambidextrous' in shape:
-                    grip_score = 15
-                    reasons.append("Ambidextrous shape good for Claw")
-            elif grip == 'Fingertip':
-                if length > 0 and length < 12.1:
-                    grip_score = 30
-                    reasons.append(f"Short length ({length}cm) ideal for Fingertip")
-                if 'Ergonomic' in shape:
-                    score -= 10 # Ergo usually bad for fingertip
-            
-            score += grip_score
-                
-            # --- 3. Genre (Weight & Features) ---
-            genre_score = 0
-            if genre == 'FPS':
-                if weight < 65:
-                    genre_score = 35 # Huge bonus for lightweight in FPS
-                    reasons.append(f"Ultra-light ({weight}g) for fast FPS aim")
-                elif weight < 80:
-                    genre_score = 15
-            elif genre == 'MOBA':
-                if 60 <= weight <= 90:
-                    genre_score = 20
-                    reasons.append(f"Balanced weight ({weight}g) for MOBA")
-            elif genre in ['MMO', 'RPG']:
-                # MMO often prefers buttons (not tracked well here) but heavier/stable is ok
-                if weight > 75:
-                    genre_score = 20
-                    reasons.append(f"Stable weight ({weight}g) for MMO/RPG")
-                
-            score += genre_score
 
-            # --- 4. Sentiment Boost ---
-            sentiment = specs.get('sentiment_score', 0)
-            if sentiment:
-                try:
-                    sent_val = self._format_sentiment(sentiment)
-                    # Reduced sentiment weight so Fit/Genre matters more
-                    boost = min(sent_val * 1.5, 15) 
-                    score += boost
-                    if sent_val > 8.0:
-                        reasons.append(f"Top rated by reviewers ({sent_val}/10)")
-                except:
-                    pass
-            
-            scores.append({
-                'gear': gear,
-                'score': score,
-                'reasons': reasons,
-                'sentiment': sentiment,
-                'specs': specs
-            })
-        
-        # Sort and return best
-        scores.sort(key=lambda x: x['score'], reverse=True)
-        return scores[:5]
+        if candidates is None:
+            candidates = GamingGear.objects.filter(type='Mouse')
+        return self._rank_candidates(
+            candidates,
+            lambda specs: self._score_mouse(specs, genre, hand_size, grip),
+            lambda specs: self._explain_mouse(specs, genre, hand_size, grip),
+            include_specs=True,
+        )
 
-    def recommend_keyboard(self, user_prefs):
+    def _score_mouse(self, specs, genre, hand_size, grip):
+        length, weight = self._parse_mouse_specs(specs)
+        shape = specs.get('Shape', 'Ambidextrous') # Ambidextrous / Ergonomic
+        score = 0
+
+        # --- 1. Hand Size Logic (Critical) ---
+        # Small: < 17cm -> Mouse Length < 12.0cm
+        # Medium: 17-19cm -> Mouse Length 11.5 - 12.5cm
+        # Large: > 19cm -> Mouse Length > 12.5cm
+        fit_score = 0
+        if hand_size == 'Small':
+            if length > 0 and length < 12.0:
+                fit_score = 30
+            elif length > 12.5:
+                score -= 20 # Too big
+        elif hand_size == 'Large':
+            if length > 12.4:
+                fit_score = 30
+            elif length > 0 and length < 11.8:
+                score -= 10 # Too small
+        else: # Medium fits most, but prefer balanced
+            if 11.5 <= length <= 12.6:
+                fit_score = 15
+        score += fit_score
+
+        # --- 2. Grip Logic ---
+        # Palm -> Ergonomic (Usually) or High Profile Amb
+        # Claw -> Ambidextrous (Usually)
+        # Fingertip -> Small/Low Profile Ambidextrous
+        grip_score = 0
+        if grip == 'Palm':
+            if 'Ergonomic' in shape:
+                grip_score = 25
+            elif length > 12.5: # Large Ambi also works for Palm
+                grip_score = 10
+        elif grip == 'Claw':
+            # Claw is versatile, usually Ambi or Ergo works, but weight matters
+            if 'Ambidextrous' in shape:
+                grip_score = 15
+        elif grip == 'Fingertip':
+            if length > 0 and length < 12.1:
+                grip_score = 30
+            if 'Ergonomic' in shape:
+                score -= 10 # Ergo usually bad for fingertip
+        score += grip_score
+
+        # --- 3. Genre (Weight & Features) ---
+        genre_score = 0
+        if genre == 'FPS':
+            if weight < 65:
+                genre_score = 35 # Huge bonus for lightweight in FPS
+            elif weight < 80:
+                genre_score = 15
+        elif genre == 'MOBA':
+            if 60 <= weight <= 90:
+                genre_score = 20
+        elif genre in ['MMO', 'RPG']:
+            # MMO often prefers buttons (not tracked well here) but heavier/stable is ok
+            if weight > 75:
+                genre_score = 20
+        score += genre_score
+
+        # --- 4. Sentiment Boost ---
+        sentiment = specs.get('sentiment_score', 0)
+        if sentiment:
+            # Reduced sentiment weight so Fit/Genre matters more
+            score += min(self._format_sentiment(sentiment) * 1.5, 15)
+        return score
+
+    def _explain_mouse(self, specs, genre, hand_size, grip):
+        length, weight = self._parse_mouse_specs(specs)
+        shape = specs.get('Shape', 'Ambidextrous')
+        reasons = []
+
+        if hand_size == 'Small' and length > 0 and length < 12.0:
+            reasons.append(f"Compact size ({length}cm) fits Small Hands")
+        elif hand_size == 'Large' and length > 12.4:
+            reasons.append(f"Large size ({length}cm) fits Large Hands")
+
+        if grip == 'Palm' and 'Ergonomic' in shape:
+            reasons.append(f"Ergonomic shape perfect for Palm Grip")
+        elif grip == 'Claw' and 'Ambidextrous' in shape:
+            reasons.append("Ambidextrous shape good for Claw")
+        elif grip == 'Fingertip' and length > 0 and length < 12.1:
+            reasons.append(f"Short length ({length}cm) ideal for Fingertip")
+
+        if genre == 'FPS' and weight < 65:
+            reasons.append(f"Ultra-light ({weight}g) for fast FPS aim")
+        elif genre == 'MOBA' and 60 <= weight <= 90:
+            reasons.append(f"Balanced weight ({weight}g) for MOBA")
+        elif genre in ['MMO', 'RPG'] and weight > 75:
+            reasons.append(f"Stable weight ({weight}g) for MMO/RPG")
+
+        sentiment = specs.get('sentiment_score', 0)
+        if sentiment:
+            sent_val = self._format_sentiment(sentiment)
+            if sent_val > 8.0:
+                reasons.append(f"Top rated by reviewers ({sent_val}/10)")
+        return reasons
+
+    @timed('recommend_keyboard')
+    def recommend_keyboard(self, user_prefs, candidates=None):
         genre = user_prefs.get('genre', 'FPS')
-        candidates = GamingGear.objects.filter(type='Keyboard')
-        scores = []
-        
-        for gear in candidates:
-            score = 0
-            reasons = []
-            if isinstance(gear.specs, str):
-                try:
-                    specs = json.loads(gear.specs)
-                except:
-                    specs = {}
-            else:
-                specs = gear.specs
-            
-            form_factor = specs.get('Form Factor', '')
-            
-            # Genre Logic
-            if genre == 'FPS':
-                if any(x in form_factor for x in ['60%', '65%', '75%']):
-                    score += 35
-                    reasons.append(f"Compact {form_factor} layout: Max mouse space")
-                elif 'TKL' in form_factor:
-                    score += 20
-                    reasons.append("TKL: Good balance for FPS")
-            elif genre == 'MOBA':
-                if 'TKL' in form_factor:
-                    score += 25
-                    reasons.append("TKL: Perfect size for MOBA")
-            elif genre in ['MMO', 'RPG']:
-                if 'Full Size' in form_factor:
-                    score += 35
-                    reasons.append("Full Size: Numpad & extra keys for macros")
-            
-            # Sentiment
-            sentiment = specs.get('sentiment_score', 0)
-            if sentiment:
-                try:
-                    sent_val = self._format_sentiment(sentiment)
-                    score += min(sent_val * 2, 20)
-                except: pass
-                
-            scores.append({'gear': gear, 'score': score, 'reasons': reasons, 'sentiment': sentiment})
-            
-        scores.sort(key=lambda x: x['score'], reverse=True)
-        return scores[:5]
+        if candidates is None:
+            candidates = GamingGear.objects.filter(type='Keyboard')
+        return self._rank_candidates(
+            candidates,
+            lambda specs: self._score_keyboard(specs, genre),
+            lambda specs: self._explain_keyboard(specs, genre),
+        )
 
-    def recommend_headset(self, user_prefs):
-        genre = user_prefs.get('genre', 'FPS')
-        candidates = GamingGear.objects.filter(type='Headset')
-        scores = []
-        
-        for gear in candidates:
-            score = 0
-            reasons = []
-            if isinstance(gear.specs, str):
-                try:
-                    specs = json.loads(gear.specs)
-                except:
-                    specs = {}
-            else:
-                specs = gear.specs
-                
-            # Headset logic is simple as specs are limited
-            # FPS -> Imaging crucial (Open back often better but Wireless is convenient)
-            
-            connection = specs.get('Connection', '')
-            
-            if genre == 'FPS':
-                # No strong preference, but many pros use IEMs or closed back for isolation
-                pass
-            
-            # Sentiment is king for headsets as sound is subjective
-            sentiment = specs.get('sentiment_score', 0)
-            if sentiment:
-                try:
-                    sent_val = self._format_sentiment(sentiment)
-                    score += min(sent_val * 4, 60) # High weight for audio quality
-                    if sent_val > 7:
-                        reasons.append(f"Excellent Sound Quality ({sent_val}/10)")
-                except: pass
-                
-            scores.append({'gear': gear, 'score': score, 'reasons': reasons, 'sentiment': sentiment})
-            
-        scores.sort(key=lambda x: x['score'], reverse=True)
-        return scores[:5]
+    def _score_keyboard(self, specs, genre):
+        form_factor = specs.get('Form Factor', '')
+        score = 0
+
+        # Genre Logic
+        if genre == 'FPS':
+            if any(x in form_factor for x in ['60%', '65%', '75%']):
+                score += 35
+            elif 'TKL' in form_factor:
+                score += 20
+        elif genre == 'MOBA':
+            if 'TKL' in form_factor:
+                score += 25
+        elif genre in ['MMO', 'RPG']:
+            if 'Full Size' in form_factor:
+                score += 35
+
+        sentiment = specs.get('sentiment_score', 0)
+        if sentiment:
+            score += min(self._format_sentiment(sentiment) * 2, 20)
+        return score
+
+    def _explain_keyboard(self, specs, genre):
+        form_factor = specs.get('Form Factor', '')
+        if genre == 'FPS':
+            if any(x in form_factor for x in ['60%', '65%', '75%']):
+                return [f"Compact {form_factor} layout: Max mouse space"]
+            if 'TKL' in form_factor:
+                return ["TKL: Good balance for FPS"]
+        elif genre == 'MOBA':
+            if 'TKL' in form_factor:
+                return ["TKL: Perfect size for MOBA"]
+        elif genre in ['MMO', 'RPG']:
+            if 'Full Size' in form_factor:
+                return ["Full Size: Numpad & extra keys for macros"]
+        return []
+
+    @timed('recommend_headset')
+    def recommend_headset(self, user_prefs, candidates=None):
+        if candidates is None:
+            candidates = GamingGear.objects.filter(type='Headset')
+        # Headset logic is simple as specs are limited: no genre preference yet
+        # (many FPS pros use IEMs or closed back for isolation)
+        return self._rank_candidates(candidates, self._score_headset, self._explain_headset)
+
+    def _score_headset(self, specs):
+        # Sentiment is king for headsets as sound is subjective
+        sentiment = specs.get('sentiment_score', 0)
+        if sentiment:
+            return min(self._format_sentiment(sentiment) * 4, 60) # High weight for audio quality
+        return 0
+
+    def _explain_headset(self, specs):
+        sentiment = specs.get('sentiment_score', 0)
+        if sentiment:
+            sent_val = self._format_sentiment(sentiment)
+            if sent_val > 7:
+                return [f"Excellent Sound Quality ({sent_val}/10)"]
+        return []
+
+    def _parse_refresh_rate(self, specs):
+        try:
+            # Handle "360" or "360Hz"
+            return float(str(specs.get('Refresh Rate', '60')).replace('Hz', ''))
+        except:
+            return 60
 
-    def recommend_monitor(self, user_prefs):
+    @timed('recommend_monitor')
+    def recommend_monitor(self, user_prefs, candidates=None):
         genre = user_prefs.get('genre', 'FPS')
-        candidates = GamingGear.objects.filter(type='Monitor')
-        scores = []
-        
-        for gear in candidates:
-            score = 0
-            reasons = []
-            if isinstance(gear.specs, str):
-                try:
-                    specs = json.loads(gear.specs)
-                except:
-                    specs = {}
-            else:
-                specs = gear.specs
-                 
-            try:
-                # Handle "360" or "360Hz"
-                hz_str = str(specs.get('Refresh Rate', '60')).replace('Hz','')
-                hz = float(hz_str)
-            except:
-                hz = 60
-                
+        if candidates is None:
+            candidates = GamingGear.objects.filter(type='Monitor')
+        return self._rank_candidates(
+            candidates,
+            lambda specs: self._score_monitor(specs, genre),
+            lambda specs: self._explain_monitor(specs, genre),
+        )
+
+    def _score_monitor(self, specs, genre):
+        hz = self._parse_refresh_rate(specs)
+        res = specs.get('Resolution', '')
+        score = 0
+
+        if genre == 'FPS':
+            if hz >= 360:
+                score += 40
+            elif hz >= 240:
+                score += 30
+            elif hz >= 144:
+                score += 10
+
+            # FPS players often prefer 1080p for frames, or 1440p OLED
+            if '1080' in res:
+                score += 10
+
+        elif genre in ['MOBA', 'MMO', 'RPG']:
+            # Resolution matters more
+            if '1440' in res or '2160' in res:
+                score += 35
+            elif '1080' in res:
+                score -= 10 # 1080p less desirable for RPGs
+
+            panel_tech = specs.get('Panel Tech', '')
+            if 'OLED' in panel_tech or 'IPS' in panel_tech:
+                score += 20
+
+        sentiment = specs.get('sentiment_score', 0)
+        if sentiment:
+            score += min(self._format_sentiment(sentiment) * 2, 20)
+        return score
+
+    def _explain_monitor(self, specs, genre):
+        reasons = []
+        if genre == 'FPS':
+            hz = self._parse_refresh_rate(specs)
+            if hz >= 360:
+                reasons.append(f"Pro-level {int(hz)}Hz motion clarity")
+            elif hz >= 240:
+                reasons.append(f"Competitive {int(hz)}Hz refresh rate")
+        elif genre in ['MOBA', 'MMO', 'RPG']:
             res = specs.get('Resolution', '')
-            
-            if genre == 'FPS':
-                if hz >= 360:
-                    score += 40
-                    reasons.append(f"Pro-level {int(hz)}Hz motion clarity")
-                elif hz >= 240:
-                    score += 30
-                    reasons.append(f"Competitive {int(hz)}Hz refresh rate")
-                elif hz >= 144:
-                    score += 10
-                    
-                # FPS players often prefer 1080p for frames, or 1440p OLED
-                if '1080' in res:
-                    score += 10
-                    
-            elif genre in ['MOBA', 'MMO', 'RPG']:
-                # Resolution matters more
-                if '1440' in res or '2160' in res:
-                    score += 35
-                    reasons.append(f"High Resolution ({res}) for visuals")
-                elif '1080' in res:
-                    score -= 10 # 1080p less desirable for RPGs
-                    
-                panel_tech = specs.get('Panel Tech', '')
-                if 'OLED' in panel_tech or 'IPS' in panel_tech:
-                    score += 20
-                    reasons.append(f"Vibrant {panel_tech} colors")
-
-            # Sentiment
-            sentiment = specs.get('sentiment_score', 0)
-            if sentiment:
-                try:
-                    sent_val = self._format_sentiment(sentiment)
-                    score += min(sent_val * 2, 20)
-                except: pass
-                
-            scores.append({'gear': gear, 'score': score, 'reasons': reasons, 'sentiment': sentiment})
-            
-        scores.sort(key=lambda x: x['score'], reverse=True)
-        return scores[:5]
+            if '1440' in res or '2160' in res:
+                reasons.append(f"High Resolution ({res}) for visuals")
+            panel_tech = specs.get('Panel Tech', '')
+            if 'OLED' in panel_tech or 'IPS' in panel_tech:
+                reasons.append(f"Vibrant {panel_tech} colors")
+        return reasons
+
+    @timed('recommend_mousepad')
+    def recommend_mousepad(self, user_prefs, candidates=None):
+        """Only used by the budget optimizer (setup_optimizer.py) when a mousepad is requested."""
+        genre = user_prefs.get('genre', 'FPS')
+        if candidates is None:
+            candidates = GamingGear.objects.filter(type='Mousepad')
+        return self._rank_candidates(
+            candidates,
+            lambda specs: self._score_mousepad(specs, genre),
+            lambda specs: self._explain_mousepad(specs, genre),
+        )
+
+    def _score_mousepad(self, specs, genre):
+        glide = str(specs.get('Glide', ''))
+        score = 0
+        if genre == 'FPS':
+            # Control pads help micro-adjustments in tactical shooters
+            if 'Control' in glide:
+                score += 20
+        elif 'Speed' in glide or 'Medium' in glide:
+            score += 15
+
+        sentiment = specs.get('sentiment_score', 0)
+        if sentiment:
+            score += min(self._format_sentiment(sentiment) * 2, 20)
+        return score
+
+    def _explain_mousepad(self, specs, genre):
+        glide = str(specs.get('Glide', ''))
+        if genre == 'FPS':
+            if 'Control' in glide:
+                return [f"{glide} glide for precise aim"]
+        elif 'Speed' in glide or 'Medium' in glide:
+            return [f"{glide} glide for fast camera movement"]
+        return []
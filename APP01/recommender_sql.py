@@ -0,0 +1,226 @@
+"""
+DB-side ranking for the Hybrid Recommender.
+
+HybridRecommender.recommend(category, user_prefs, mode='sql') expresses the
+same hand-size / grip / genre / sentiment rules as the Python scorers with
+Case/When annotations over the typed GamingGear spec columns, and lets the
+database do `ORDER BY score DESC LIMIT 5`. Only the five winning rows are
+fetched; reason flags are annotated alongside the score so the reason text
+is rendered for those rows only.
+
+Results have the same shape as the Python path:
+{'gear', 'score', 'reasons', 'sentiment'} ('specs' is included for mice).
+"""
+
+from django.db.models import BooleanField, Case, F, FloatField, Q, Value, When
+from django.db.models.functions import Coalesce, Least
+
+from .models import GamingGear
+from .spec_columns import COMPACT_FORM_FACTORS, load_specs
+
+TOP_K = 5
+
+# Typed columns with the defaults the Python scorers fall back to
+COLUMN_DEFAULTS = {
+    'length': ('length_cm', 0.0),
+    'weight': ('weight_g', 999.0),
+    'hz': ('refresh_hz', 60.0),
+    'max_weight': ('max_weight_kg', 100.0),
+    'review_score': ('sentiment', 0.0),
+}
+
+
+def _points(*rules, default=0):
+    """Case/When over (condition, points) pairs; the first matching rule wins."""
+    return Case(
+        *[When(condition, then=Value(float(points))) for condition, points in rules],
+        default=Value(float(default)),
+        output_field=FloatField(),
+    )
+
+
+def _capped(column, factor, cap):
+    return Least(F(column) * Value(float(factor)), Value(float(cap)), output_field=FloatField())
+
+
+# ----------------------------------------------------------------------
+# Per-category rules: each returns (score expression, [(condition, formatter)])
+# ----------------------------------------------------------------------
+def mouse_rules(user_prefs):
+    genre = user_prefs.get('genre', 'FPS')
+    hand_size = user_prefs.get('hand_size', 'Medium')
+    grip = user_prefs.get('grip', 'Palm')
+
+    has_length = Q(length__gt=0)
+    ergonomic = Q(shape='Ergonomic')
+    score = Value(0.0)
+    reasons = []
+
+    # --- 1. Hand Size ---
+    if hand_size == 'Small':
+        fit = has_length & Q(length__lt=12.0)
+        score += _points((fit, 30), (Q(length__gt=12.5), -20))
+        reasons.append((fit, lambda g: f"Compact size ({g.length}cm) fits Small Hands"))
+    elif hand_size == 'Large':
+        fit = Q(length__gt=12.4)
+        score += _points((fit, 30), (has_length & Q(length__lt=11.8), -10))
+        reasons.append((fit, lambda g: f"Large size ({g.length}cm) fits Large Hands"))
+    else:
+        score += _points((Q(length__gte=11.5, length__lte=12.6), 15))
+
+    # --- 2. Grip ---
+    if grip == 'Palm':
+        score += _points((ergonomic, 25), (Q(length__gt=12.5), 10))
+        reasons.append((ergonomic, lambda g: "Ergonomic shape perfect for Palm Grip"))
+    elif grip == 'Claw':
+        ambidextrous = Q(shape='Ambidextrous')
+        score += _points((ambidextrous, 15))
+        reasons.append((ambidextrous, lambda g: "Ambidextrous shape good for Claw"))
+    elif grip == 'Fingertip':
+        short = has_length & Q(length__lt=12.1)
+        score += _points((short, 30)) - _points((ergonomic, 10))
+        reasons.append((short, lambda g: f"Short length ({g.length}cm) ideal for Fingertip"))
+
+    # --- 3. Genre ---
+    if genre == 'FPS':
+        ultra_light = Q(weight__lt=65)
+        score += _points((ultra_light, 35), (Q(weight__lt=80), 15))
+        reasons.append((ultra_light, lambda g: f"Ultra-light ({g.weight}g) for fast FPS aim"))
+    elif genre == 'MOBA':
+        balanced = Q(weight__gte=60, weight__lte=90)
+        score += _points((balanced, 20))
+        reasons.append((balanced, lambda g: f"Balanced weight ({g.weight}g) for MOBA"))
+    elif genre in ['MMO', 'RPG']:
+        stable = Q(weight__gt=75)
+        score += _points((stable, 20))
+        reasons.append((stable, lambda g: f"Stable weight ({g.weight}g) for MMO/RPG"))
+
+    # --- 4. Sentiment ---
+    score += _capped('review_score', 1.5, 15)
+    reasons.append((Q(review_score__gt=8.0), lambda g: f"Top rated by reviewers ({g.review_score}/10)"))
+    return score, reasons
+
+
+def keyboard_rules(user_prefs):
+    genre = user_prefs.get('genre', 'FPS')
+    compact = Q(form_factor__in=COMPACT_FORM_FACTORS)
+    tkl = Q(form_factor='TKL')
+    score = Value(0.0)
+    reasons = []
+
+    if genre == 'FPS':
+        score += _points((compact, 35), (tkl, 20))
+        reasons.append((compact, lambda g: f"Compact {load_specs(g.specs).get('Form Factor', '')} layout: Max mouse space"))
+        reasons.append((~compact & tkl, lambda g: "TKL: Good balance for FPS"))
+    elif genre == 'MOBA':
+        score += _points((tkl, 25))
+        reasons.append((tkl, lambda g: "TKL: Perfect size for MOBA"))
+    elif genre in ['MMO', 'RPG']:
+        full = Q(form_factor='Full Size')
+        score += _points((full, 35))
+        reasons.append((full, lambda g: "Full Size: Numpad & extra keys for macros"))
+
+    score += _capped('review_score', 2, 20)
+    return score, reasons
+
+
+def headset_rules(user_prefs):
+    score = _capped('review_score', 4, 60)
+    reasons = [(Q(review_score__gt=7), lambda g: f"Excellent Sound Quality ({g.review_score}/10)")]
+    return score, reasons
+
+
+def monitor_rules(user_prefs):
+    genre = user_prefs.get('genre', 'FPS')
+    res_1080 = Q(vertical_resolution=1080)
+    score = Value(0.0)
+    reasons = []
+
+    if genre == 'FPS':
+        pro = Q(hz__gte=360)
+        competitive = ~pro & Q(hz__gte=240)
+        score += _points((pro, 40), (Q(hz__gte=240), 30), (Q(hz__gte=144), 10))
+        score += _points((res_1080, 10))
+        reasons.append((pro, lambda g: f"Pro-level {int(g.hz)}Hz motion clarity"))
+        reasons.append((competitive, lambda g: f"Competitive {int(g.hz)}Hz refresh rate"))
+    elif genre in ['MOBA', 'MMO', 'RPG']:
+        high_res = Q(vertical_resolution__in=(1440, 2160))
+        vivid = Q(panel__in=('OLED', 'IPS'))
+        score += _points((high_res, 35), (res_1080, -10))
+        score += _points((vivid, 20))
+        reasons.append((high_res, lambda g: f"High Resolution ({load_specs(g.specs).get('Resolution', '')}) for visuals"))
+        reasons.append((vivid, lambda g: f"Vibrant {load_specs(g.specs).get('Panel Tech', '')} colors"))
+
+    score += _capped('review_score', 2, 20)
+    return score, reasons
+
+
+def chair_rules(user_prefs):
+    hand_size = user_prefs.get('hand_size', 'Medium')
+    fabric = Q(material='Fabric')
+    leather = Q(material='Real Leather')
+    lumbar = Q(lumbar_adjustable=True)
+    score = Value(0.0)
+    reasons = []
+
+    if hand_size == 'Large':
+        durable = Q(max_weight__gte=130)
+        score += _points((durable, 20))
+        reasons.append((durable, lambda g: f"High durability {g.max_weight}kg"))
+
+    score += _points((fabric, 10), (leather, 15))
+    reasons.append((fabric, lambda g: "Breathable Fabric"))
+    reasons.append((leather, lambda g: "Premium Real Leather"))
+
+    score += _points((lumbar, 10))
+    reasons.append((lumbar, lambda g: "Adjustable Lumbar Support"))
+
+    score += _capped('review_score', 2, 30)
+    reasons.append((Q(review_score__gt=5), lambda g: f"High reviewer sentiment ({g.review_score}/10)"))
+    return score, reasons
+
+
+CATEGORY_RULES = {
+    'Mouse': mouse_rules,
+    'Keyboard': keyboard_rules,
+    'Headset': headset_rules,
+    'Monitor': monitor_rules,
+    'Chair': chair_rules,
+}
+
+
+def rank_in_db(category, user_prefs, queryset=None, top_k=TOP_K):
+    """
+    Score and rank one category inside the database, returning the best `top_k`.
+
+    `queryset` narrows the candidates (defaults to every gear of the category).
+    Ties keep gear_id order, like the stable sort of the Python path.
+    """
+    if queryset is None:
+        queryset = GamingGear.objects.all()
+    score, reasons = CATEGORY_RULES[category](user_prefs)
+
+    flags = {
+        f'reason_{n}': Case(When(condition, then=Value(True)), default=Value(False), output_field=BooleanField())
+        for n, (condition, _fmt) in enumerate(reasons)
+    }
+    rows = (
+        queryset.filter(type=category)
+        .annotate(**{name: Coalesce(column, Value(default)) for name, (column, default) in COLUMN_DEFAULTS.items()})
+        .annotate(score=score, **flags)
+        .order_by('-score', 'gear_id')[:top_k]
+    )
+
+    results = []
+    for gear in rows:
+        specs = load_specs(gear.specs)
+        entry = {
+            'gear': gear,
+            'score': gear.score,
+            'reasons': [fmt(gear) for n, (_condition, fmt) in enumerate(reasons) if getattr(gear, f'reason_{n}')],
+            'sentiment': specs.get('sentiment_score', 0),
+        }
+        if category == 'Mouse':
+            entry['specs'] = specs
+        results.append(entry)
+    return results
@@ -0,0 +1,235 @@
+"""
+Vectorized scoring engine for the Hybrid Recommender.
+
+Each gear category is loaded once into NumPy column arrays (length, weight,
+refresh rate, form-factor / shape codes, sentiment, ...) built from the typed
+GamingGear spec columns, and every candidate
+is scored for a (genre, hand_size, grip) profile in a single array pass.
+The weights and conditions come from the declarative rule table in
+scoring_rules.py. The top 5 are picked with argpartition, and reason strings
+are only rendered for those 5 entries.
+
+The output is identical to HybridRecommender: a list of
+{'gear', 'score', 'reasons', 'sentiment'} dicts ('specs' is included for mice).
+"""
+
+import numpy as np
+
+from .instrumentation import add_rows, stage, timed
+from .models import GamingGear
+from .recommender_hybrid import TOP_K, HybridRecommender
+from .spec_columns import COMPACT_FORM_FACTORS, load_specs
+
+# Shape codes (GamingGear.shape is a single choice, coded through SHAPE_CODES)
+SHAPE_ERGONOMIC = 1
+SHAPE_AMBIDEXTROUS = 2
+
+# Keyboard form-factor codes
+FORM_COMPACT = 1   # 60% / 65% / 75%
+FORM_TKL = 2
+FORM_FULL = 4      # Full Size
+
+# Monitor resolution (bit flags) / panel codes
+RES_1080 = 1
+RES_HIGH = 2       # 1440p / 2160p
+PANEL_VIVID = 1    # OLED / IPS
+
+SHAPE_CODES = {'Ergonomic': SHAPE_ERGONOMIC, 'Ambidextrous': SHAPE_AMBIDEXTROUS}
+FORM_CODES = {**{f: FORM_COMPACT for f in COMPACT_FORM_FACTORS}, 'TKL': FORM_TKL, 'Full Size': FORM_FULL}
+PANEL_CODES = {'OLED': PANEL_VIVID, 'IPS': PANEL_VIVID}
+
+# Chair material codes
+MATERIAL_FABRIC = 1
+MATERIAL_REAL_LEATHER = 2
+MATERIAL_CODES = {'Fabric': MATERIAL_FABRIC, 'Real Leather': MATERIAL_REAL_LEATHER}
+
+
+def _column(gears, field, default):
+    """Float array of a typed GamingGear field, NULLs replaced by default."""
+    return np.array(
+        [default if getattr(gear, field) is None else getattr(gear, field) for gear in gears],
+        dtype=float,
+    )
+
+
+def _coded(gears, field, codes):
+    """int8 array mapping a choice field through codes (unknown values -> 0)."""
+    return np.array([codes.get(getattr(gear, field), 0) for gear in gears], dtype=np.int8)
+
+
+def _top_k(scores, k=TOP_K):
+    """
+    Indices of the k best scores, highest first.
+
+    Ties are broken by catalog order, the same way a stable
+    `list.sort(reverse=True)` does in the Python engine.
+    """
+    n = scores.shape[0]
+    if n > k:
+        part = np.argpartition(-scores, k - 1)[:k]
+        threshold = scores[part].min()
+        # Keep every tie at the cut-off so the stable order below stays exact
+        idx = np.flatnonzero(scores >= threshold)
+    else:
+        idx = np.arange(n)
+    order = np.argsort(-scores[idx], kind='stable')
+    return idx[order][:k]
+
+
+class CategoryArrays:
+    """Column-oriented snapshot of one gear category."""
+
+    def __init__(self, category, gears, specs, columns, sentiment_raw):
+        self.category = category
+        self.gears = gears
+        self.specs = specs
+        self.columns = columns
+        self.sentiment_raw = sentiment_raw
+        self.size = len(gears)
+        # Rule condition masks, filled by RuleTable.evaluate()
+        self.masks = {}
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def prefetch(self, indices):
+        """Hook for stores that load gear rows on demand (see feature_store.py)."""
+
+
+class VectorizedRecommender(HybridRecommender):
+    """
+    Drop-in replacement for HybridRecommender that scores whole categories
+    with NumPy instead of looping over GamingGear rows.
+
+    Categories are converted to arrays once per candidate source (the
+    database, or the list / queryset passed in) and kept for the lifetime of
+    the instance; recommend_variant_setups() hands every scorer the
+    single-query bundle from load_candidates().
+    """
+
+    def __init__(self, rules=None):
+        super().__init__()
+        self._catalog = {}
+        if rules is None:
+            # Imported here: scoring_rules reads the array codes defined above
+            from .scoring_rules import current_rule_table
+            rules = current_rule_table()
+        # One table per instance, so a hot swap never mixes weights within a request
+        self.rules = rules
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+    def load_category(self, category, candidates=None):
+        # category -> (candidates the arrays were built from, arrays)
+        cached = self._catalog.get(category)
+        if cached is None or cached[0] is not candidates:
+            rows = GamingGear.objects.filter(type=category) if candidates is None else candidates
+            with stage('build_arrays'):
+                gears = list(rows)
+                add_rows(len(gears))
+                cached = self._catalog[category] = (candidates, self.build_arrays(category, gears))
+        return cached[1]
+
+    def build_arrays(self, category, gears):
+        """Columns come from the typed GamingGear fields (see spec_columns.py)."""
+        length = _column(gears, 'length_cm', 0.0)
+        weight = _column(gears, 'weight_g', 999.0)
+        hz = _column(gears, 'refresh_hz', 60.0)
+        max_weight = _column(gears, 'max_weight_kg', 100.0)
+        sentiment = _column(gears, 'sentiment', 0.0)
+        shape = _coded(gears, 'shape', SHAPE_CODES)
+        form = _coded(gears, 'form_factor', FORM_CODES)
+        panel = _coded(gears, 'panel', PANEL_CODES)
+        material = _coded(gears, 'material', MATERIAL_CODES)
+        lumbar = np.array([gear.lumbar_adjustable for gear in gears], dtype=bool)
+        vertical = _column(gears, 'vertical_resolution', 0.0)
+        res = np.where(vertical == 1080, RES_1080, 0) | np.where(np.isin(vertical, (1440, 2160)), RES_HIGH, 0)
+
+        # Raw specs are only needed to render reasons / the 'sentiment' entry
+        specs_list = [load_specs(gear.specs) for gear in gears]
+        sentiment_raw = [specs.get('sentiment_score', 0) for specs in specs_list]
+
+        columns = {
+            'length': length,
+            'weight': weight,
+            'hz': hz,
+            'max_weight': max_weight,
+            'sentiment': sentiment,
+            'shape': shape,
+            'form': form,
+            'res': res,
+            'panel': panel,
+            'material': material,
+            'lumbar': lumbar,
+            'pro_usage': np.array([gear.pro_usage_count for gear in gears], dtype=np.int64),
+        }
+        return CategoryArrays(category, gears, specs_list, columns, sentiment_raw)
+
+    # ------------------------------------------------------------------
+    # Ranking helpers
+    # ------------------------------------------------------------------
+    def _rank(self, arr, score, reasons, include_specs=False):
+        """
+        Pick the top `self.top_k` rows and render their reasons.
+
+        `reasons` is an ordered list of (mask, formatter) pairs; formatter(i)
+        builds the reason text for row i and is only called for returned rows.
+        """
+        results = []
+        seen = 0
+        k = self.top_k
+        while True:
+            top = _top_k(score, k)
+            fresh = top[seen:]
+            arr.prefetch(fresh)
+            for i in fresh:
+                gear = arr.gears[i]
+                if gear is None or gear.type != arr.category:
+                    # Deleted or re-typed since a stored snapshot was written
+                    continue
+                entry = {
+                    'gear': gear,
+                    'score': float(score[i]),
+                    'reasons': [fmt(i) for mask, fmt in reasons if mask[i]],
+                    'sentiment': arr.sentiment_raw[i],
+                }
+                if include_specs:
+                    entry['specs'] = arr.specs[i]
+                results.append(entry)
+                if len(results) == self.top_k:
+                    return results
+            seen = len(top)
+            if seen >= arr.size:
+                return results
+            # Keep walking the ranking past the rows that dropped out
+            k *= 2
+
+    # ------------------------------------------------------------------
+    # Per-category scorers
+    # ------------------------------------------------------------------
+    def _score_with_rules(self, category, user_prefs, candidates, include_specs=False):
+        arr = self.load_category(category, candidates)
+        add_rows(arr.size)
+        score, reasons = self.rules.evaluate(category, user_prefs, arr)
+        return self._rank(arr, score, reasons, include_specs)
+
+    @timed('recommend_mouse')
+    def recommend_mouse(self, user_prefs, candidates=None):
+        return self._score_with_rules('Mouse', user_prefs, candidates, include_specs=True)
+
+    @timed('recommend_keyboard')
+    def recommend_keyboard(self, user_prefs, candidates=None):
+        return self._score_with_rules('Keyboard', user_prefs, candidates)
+
+    @timed('recommend_headset')
+    def recommend_headset(self, user_prefs, candidates=None):
+        return self._score_with_rules('Headset', user_prefs, candidates)
+
+    @timed('recommend_monitor')
+    def recommend_monitor(self, user_prefs, candidates=None):
+        return self._score_with_rules('Monitor', user_prefs, candidates)
+
+    @timed('recommend_chair')
+    def recommend_chair(self, user_prefs, candidates=None):
+        return self._score_with_rules('Chair', user_prefs, candidates)
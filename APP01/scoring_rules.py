@@ -0,0 +1,280 @@
+"""
+Declarative scoring rule tables for the vectorized recommender.
+
+The per-category scoring logic (hand size, grip, genre, form factor,
+refresh rate, ...) lives in a versioned JSON file instead of Python
+branches. Each rule is
+
+    {"group": "grip", "when": {"grip": "Palm"},
+     "if": [["shape", "has", "Ergonomic"]],
+     "points": 25, "reason": "Ergonomic shape perfect for Palm Grip"}
+
+* `when` matches the quiz profile (a value, a list, or {"not": [...]});
+* `if` is a list of conditions on CategoryArrays columns, all of which must
+  hold. Coded columns (shape, form, res, panel, material) are compared by
+  name through CODE_NAMES;
+* rules sharing a `group` behave like if / elif: only the first matching
+  rule of the group counts for a row;
+* `reason` is a str.format template over the row's columns and its raw
+  `specs` ("{hz!i}" renders an int). Reasons keep the file order.
+
+`terms` add capped linear terms (min(column * scale, max)).
+
+A file is compiled once into column predicates; scoring a profile is then
+one array operation per applicable rule. The live table is SCORING_RULES_FILE
+(falling back to default_scoring_rules.json next to this module);
+current_rule_table() notices a replaced file with a single os.stat(), so
+`python manage.py activate_scoring_rules <file>` swaps weights without a
+deploy. The Python and SQL engines implement the default table.
+"""
+
+import itertools
+import json
+import operator
+import os
+import string
+import threading
+
+import numpy as np
+from django.conf import settings
+
+from .recommender_hybrid import SETUP_CATEGORIES
+from .recommender_vectorized import (
+    FORM_COMPACT, FORM_FULL, FORM_TKL, MATERIAL_FABRIC, MATERIAL_REAL_LEATHER, PANEL_VIVID, RES_1080,
+    RES_HIGH, SHAPE_AMBIDEXTROUS, SHAPE_ERGONOMIC,
+)
+
+DEFAULT_RULES_FILE = os.path.join(os.path.dirname(__file__), 'default_scoring_rules.json')
+
+PROFILE_KEYS = ('genre', 'hand_size', 'grip')
+
+CODE_NAMES = {
+    'shape': {'Ergonomic': SHAPE_ERGONOMIC, 'Ambidextrous': SHAPE_AMBIDEXTROUS},
+    'form': {'Compact': FORM_COMPACT, 'TKL': FORM_TKL, 'Full Size': FORM_FULL},
+    'res': {'1080p': RES_1080, 'High': RES_HIGH},
+    'panel': {'Vivid': PANEL_VIVID},
+    'material': {'Fabric': MATERIAL_FABRIC, 'Real Leather': MATERIAL_REAL_LEATHER},
+}
+NUMERIC_COLUMNS = {'length', 'weight', 'hz', 'max_weight', 'sentiment', 'lumbar', 'pro_usage'}
+COLUMNS = NUMERIC_COLUMNS | set(CODE_NAMES)
+
+OPERATORS = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '==': operator.eq,
+    '!=': operator.ne,
+    'has': lambda column, flag: (column & flag) > 0,
+}
+
+_lock = threading.Lock()
+_current = {'key': None, 'table': None}
+_serials = itertools.count()
+
+
+class _Specs(dict):
+    """Raw specs for reason templates; missing keys render as ''."""
+
+    def __missing__(self, key):
+        return ''
+
+
+class ReasonFormatter(string.Formatter):
+    """str.format with an extra "!i" conversion (int)."""
+
+    def convert_field(self, value, conversion):
+        if conversion == 'i':
+            return int(value)
+        return super().convert_field(value, conversion)
+
+
+FORMATTER = ReasonFormatter()
+
+
+def _matches_profile(when, user_prefs, defaults):
+    for key, expected in when.items():
+        value = user_prefs.get(key, defaults.get(key))
+        if isinstance(expected, dict):
+            if value in expected['not']:
+                return False
+        elif isinstance(expected, list):
+            if value not in expected:
+                return False
+        elif value != expected:
+            return False
+    return True
+
+
+def _compile_condition(condition, where):
+    try:
+        column, op, value = condition
+    except (TypeError, ValueError):
+        raise ValueError(f"{where}: condition must be [column, operator, value], got {condition!r}")
+    if column not in COLUMNS:
+        raise ValueError(f"{where}: unknown column {column!r}")
+    if op not in OPERATORS:
+        raise ValueError(f"{where}: unknown operator {op!r}")
+    if isinstance(value, str):
+        codes = CODE_NAMES.get(column, {})
+        if value not in codes:
+            raise ValueError(f"{where}: {column!r} has no value {value!r} (known: {sorted(codes)})")
+        value = codes[value]
+    elif op == 'has':
+        raise ValueError(f"{where}: 'has' needs a named {column!r} value")
+    compare = OPERATORS[op]
+    return lambda columns: compare(columns[column], value)
+
+
+def _compile_reason(template, where):
+    fields = set()
+    for _text, field, _spec, _conversion in FORMATTER.parse(template):
+        if field is None:
+            continue
+        name = field.split('[', 1)[0].split('.', 1)[0]
+        if name != 'specs' and name not in COLUMNS:
+            raise ValueError(f"{where}: unknown field {name!r} in reason {template!r}")
+        fields.add(name)
+    fields.discard('specs')
+
+    def render(arr, i):
+        values = {name: float(arr[name][i]) for name in fields}
+        return FORMATTER.format(template, specs=_Specs(arr.specs[i]), **values)
+    return render
+
+
+class Rule:
+    def __init__(self, index, data, where):
+        self.index = index
+        self.group = data.get('group')
+        self.when = data.get('when', {})
+        for key in self.when:
+            if key not in PROFILE_KEYS:
+                raise ValueError(f"{where}: unknown profile key {key!r}")
+        self.conditions = [_compile_condition(c, where) for c in data.get('if', [])]
+        self.points = float(data.get('points', 0))
+        self.reason = _compile_reason(data['reason'], where) if data.get('reason') else None
+
+    def mask(self, arr):
+        result = np.ones(arr.size, dtype=bool)
+        for condition in self.conditions:
+            result &= condition(arr.columns)
+        return result
+
+
+class CategoryRules:
+    def __init__(self, category, data):
+        self.category = category
+        self.rules = [
+            Rule(i, rule, f"{category} rule {i}") for i, rule in enumerate(data.get('rules', []))
+        ]
+        self.terms = []
+        for term in data.get('terms', []):
+            if term.get('column') not in NUMERIC_COLUMNS:
+                raise ValueError(f"{category}: unknown term column {term.get('column')!r}")
+            self.terms.append((term['column'], float(term.get('scale', 1)), term.get('max')))
+
+
+class RuleTable:
+    """One compiled rule file."""
+
+    def __init__(self, data, source=''):
+        self.version = data.get('version')
+        if self.version is None:
+            raise ValueError(f"{source}: rule table has no version")
+        self.source = source
+        self.defaults = data.get('defaults', {})
+        self.categories = {
+            category: CategoryRules(category, rules) for category, rules in data.get('categories', {}).items()
+        }
+        missing = [category for category in SETUP_CATEGORIES if category not in self.categories]
+        if missing:
+            raise ValueError(f"{source}: rule table has no rules for {', '.join(missing)}")
+        # Distinguishes compiled tables in CategoryArrays.masks, even with equal versions
+        self.serial = next(_serials)
+        self._profiles = {}
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f), source=path)
+
+    def rules_for(self, category, user_prefs):
+        """Rules of a category whose `when` matches the profile (memoised per profile)."""
+        key = (category,) + tuple(user_prefs.get(k) for k in PROFILE_KEYS)
+        if key not in self._profiles:
+            self._profiles[key] = [
+                rule for rule in self.categories[category].rules
+                if _matches_profile(rule.when, user_prefs, self.defaults)
+            ]
+        return self._profiles[key]
+
+    def evaluate(self, category, user_prefs, arr):
+        """
+        Score every row of `arr` for a profile.
+
+        Returns (score array, [(mask, formatter(i))]) in the shape
+        VectorizedRecommender._rank() expects.
+        """
+        score = np.zeros(arr.size)
+        reasons = []
+        taken = {}
+        for rule in self.rules_for(category, user_prefs):
+            # Condition masks only depend on the arrays, so they are shared by all profiles
+            mask_key = (self.serial, rule.index)
+            mask = arr.masks.get(mask_key)
+            if mask is None:
+                mask = arr.masks[mask_key] = rule.mask(arr)
+            if rule.group is not None:
+                earlier = taken.get(rule.group)
+                if earlier is not None:
+                    mask = mask & ~earlier
+                    taken[rule.group] = earlier | mask
+                else:
+                    taken[rule.group] = mask
+            if rule.points:
+                score[mask] += rule.points
+            if rule.reason is not None:
+                reasons.append((mask, lambda i, render=rule.reason: render(arr, i)))
+
+        for column, scale, cap in self.categories[category].terms:
+            term = arr[column] * scale
+            score += term if cap is None else np.minimum(term, cap)
+        return score, reasons
+
+
+def rules_path():
+    configured = str(getattr(settings, 'SCORING_RULES_FILE', '') or '')
+    if configured and os.path.exists(configured):
+        return configured
+    return DEFAULT_RULES_FILE
+
+
+def current_rule_table():
+    """The live table, recompiled whenever the rules file has been replaced."""
+    path = rules_path()
+    stat = os.stat(path)
+    key = (path, stat.st_ino, stat.st_mtime_ns)
+    if key != _current['key']:
+        with _lock:
+            if key != _current['key']:
+                _current['table'] = RuleTable.from_file(path)
+                _current['key'] = key
+    return _current['table']
+
+
+def activate_rule_table(source):
+    """
+    Validate a rules file and make it the live table for every worker.
+
+    The file is copied next to SCORING_RULES_FILE and moved into place with
+    os.replace(), so workers never read a half-written table.
+    """
+    table = RuleTable.from_file(source)
+    target = str(settings.SCORING_RULES_FILE)
+    os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+    tmp = f'{target}.tmp'
+    with open(source, encoding='utf-8') as src, open(tmp, 'w', encoding='utf-8') as dst:
+        dst.write(src.read())
+    os.replace(tmp, target)
+    return table
@@ -0,0 +1,194 @@
+"""
+Budget-constrained full-setup optimizer.
+
+recommend_setup() and the variant setups take the best entry of each
+category and ignore GamingGear.price. recommend_budget_setups() instead
+picks one gear per category (Mouse, Keyboard, Headset, Monitor, Chair and
+optionally Mousepad) so that the summed recommender score is maximal while
+the summed price stays within the user's budget.
+
+Each category is ranked by the vectorized recommender (top `per_category`
+entries, gears without a price are skipped). The search is a depth-first
+branch-and-bound over those lists:
+
+* per category, a gear that at least `top` other gears beat on both score
+  and price can never be part of the best `top` setups, so it is dropped;
+* the bound for the remaining categories is, for each of them, the best
+  score affordable with what is left after paying the cheapest gear of the
+  others (a bisect into a price-sorted prefix maximum);
+* branches are explored highest score first, so good setups are found early
+  and the bound cuts most of the tree.
+
+Prices are compared in integer cents.
+"""
+
+import heapq
+import math
+from bisect import bisect_right
+from decimal import Decimal, InvalidOperation
+from itertools import count
+
+from .recommender_hybrid import SETUP_CATEGORIES, load_candidates
+from .recommender_vectorized import VectorizedRecommender
+
+OPTIONAL_CATEGORIES = ['Mousepad']
+DEFAULT_CANDIDATES = 100
+DEFAULT_SETUPS = 3
+
+SCORERS = {
+    'Mouse': 'recommend_mouse',
+    'Keyboard': 'recommend_keyboard',
+    'Headset': 'recommend_headset',
+    'Monitor': 'recommend_monitor',
+    'Chair': 'recommend_chair',
+    'Mousepad': 'recommend_mousepad',
+}
+
+
+def to_cents(value):
+    """Decimal / float / str price -> int cents (None when not a number)."""
+    try:
+        return int((Decimal(str(value)) * 100).quantize(Decimal('1')))
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+
+
+class CategoryOptions:
+    """Priced candidates of one category, prepared for the search."""
+
+    def __init__(self, category, entries, top):
+        self.category = category
+        items = [(float(entry['score']), to_cents(entry['gear'].price), entry) for entry in entries]
+        items = [item for item in items if item[1] is not None]
+
+        # Drop gears beaten on score and price by `top` others (cheapest first)
+        kept, best_scores = [], []
+        for item in sorted(items, key=lambda item: (item[1], -item[0])):
+            if len(best_scores) < top or item[0] > best_scores[0]:
+                kept.append(item)
+            heapq.heappush(best_scores, item[0])
+            if len(best_scores) > top:
+                heapq.heappop(best_scores)
+
+        # Branching order: highest score first
+        self.items = sorted(kept, key=lambda item: -item[0])
+        self.min_price = min((item[1] for item in kept), default=None)
+
+        # Bound lookup: best score among gears costing at most a price
+        self.prices, self.best_upto = [], []
+        best = float('-inf')
+        for score, price, _entry in kept:
+            best = max(best, score)
+            self.prices.append(price)
+            self.best_upto.append(best)
+
+    def best_within(self, cents):
+        i = bisect_right(self.prices, cents)
+        return self.best_upto[i - 1] if i else None
+
+
+def optimize_setup(scored, budget, top=DEFAULT_SETUPS):
+    """
+    Best `top` setups for {category: [recommender entries]} within `budget`.
+
+    Returns a list of {'score', 'price', 'items': {category: entry}},
+    highest score first. Categories without an affordable priced gear make
+    the problem infeasible and give an empty list.
+    """
+    budget_cents = to_cents(budget)
+    if budget_cents is None or top < 1:
+        return []
+
+    options = [CategoryOptions(category, entries, top) for category, entries in scored.items()]
+    if any(option.min_price is None for option in options):
+        return []
+    # Fewest choices first keeps the upper levels of the tree narrow
+    options.sort(key=lambda option: len(option.items))
+    depth = len(options)
+
+    # suffix_min[d]: cheapest completion of categories d..end
+    suffix_min = [0] * (depth + 1)
+    for d in range(depth - 1, -1, -1):
+        suffix_min[d] = suffix_min[d + 1] + options[d].min_price
+    if suffix_min[0] > budget_cents:
+        return []
+    # suffix_best[d]: best scores of categories d..end ignoring the budget
+    suffix_best = [0.0] * (depth + 1)
+    for d in range(depth - 1, -1, -1):
+        suffix_best[d] = suffix_best[d + 1] + options[d].items[0][0]
+
+    def upper_bound(d, remaining):
+        total = 0.0
+        for option in options[d:]:
+            best = option.best_within(remaining - (suffix_min[d] - option.min_price))
+            if best is None:
+                return None
+            total += best
+        return total
+
+    best = []  # min-heap of (score, -sequence, price, picks)
+    sequence = count()
+    picks = [None] * depth
+
+    def search(d, score, spent):
+        if d == depth:
+            setup = (score, -next(sequence), spent, list(picks))
+            if len(best) < top:
+                heapq.heappush(best, setup)
+            else:
+                heapq.heappushpop(best, setup)
+            return
+
+        remaining = budget_cents - spent
+        for item_score, price, entry in options[d].items:
+            # Leave enough for the cheapest gear of every later category
+            if price + suffix_min[d + 1] > remaining:
+                continue
+            if len(best) == top:
+                if score + item_score + suffix_best[d + 1] <= best[0][0]:
+                    # Items are sorted by score: no later item can do better
+                    break
+                bound = upper_bound(d + 1, remaining - price)
+                if bound is None or score + item_score + bound <= best[0][0]:
+                    # A cheaper item further down may still leave room for a better completion
+                    continue
+            picks[d] = entry
+            search(d + 1, score + item_score, spent + price)
+
+    search(0, 0.0, 0)
+
+    setups = []
+    for score, _sequence, spent, chosen in sorted(best, reverse=True):
+        items = {option.category: entry for option, entry in zip(options, chosen)}
+        setups.append({
+            'score': round(score, 2),
+            'price': Decimal(spent) / 100,
+            'items': {category: items[category] for category in scored},
+        })
+    return setups
+
+
+def parse_budget(value):
+    """A budget from user input; ValueError unless finite and positive."""
+    budget = float(value)
+    if not math.isfinite(budget) or budget <= 0:
+        raise ValueError(f"Expected a positive budget, got {value!r}")
+    return budget
+
+
+def recommend_budget_setups(user_prefs, budget, include_mousepad=False, top=DEFAULT_SETUPS,
+                            per_category=DEFAULT_CANDIDATES, recommender=None):
+    """
+    Rank each category for the quiz profile and return the best setups
+    whose total price is within `budget`.
+    """
+    categories = SETUP_CATEGORIES + (OPTIONAL_CATEGORIES if include_mousepad else [])
+    recommender = recommender or VectorizedRecommender()
+    recommender.top_k = per_category
+
+    candidates = load_candidates(categories)
+    scored = {
+        category: getattr(recommender, SCORERS[category])(user_prefs, candidates[category])
+        for category in categories
+    }
+    return optimize_setup(scored, budget, top)
@@ -0,0 +1,83 @@
+"""
+Model signal handlers for APP01.
+
+Connected in App01Config.ready().
+"""
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .association_rules import invalidate_gear_type_map
+from .catalog_index import publish_changes
+from .incremental_rules import record_basket_changes
+from .models import GamingGear, ProPlayer, ProPlayerGear
+from .pro_matching import invalidate_pro_matching
+from .pro_usage import refresh_pro_usage
+from .quiz_results import invalidate_quiz_results
+from .similar_gear import update_similar_gear
+
+
+@receiver(post_save, sender=GamingGear)
+@receiver(post_delete, sender=GamingGear)
+@receiver(post_save, sender=ProPlayerGear)
+@receiver(post_delete, sender=ProPlayerGear)
+def catalog_changed(sender, **kwargs):
+    """Gear or pro usage changed: precomputed quiz results are stale."""
+    invalidate_quiz_results()
+
+
+# --- Pro usage counters (GamingGear.pro_usage_count / pro_usage_by_game) ---
+
+@receiver(pre_save, sender=ProPlayerGear)
+def remember_previous_gear(sender, instance, **kwargs):
+    # An edited link moves a usage from the old gear to the new one
+    if instance.pk:
+        instance._previous_gear_id, instance._previous_player_id = (
+            ProPlayerGear.objects.filter(pk=instance.pk).values_list('gear_id', 'player_id').first()
+            or (None, None)
+        )
+
+
+@receiver(post_save, sender=ProPlayerGear)
+@receiver(post_delete, sender=ProPlayerGear)
+def pro_player_gear_changed(sender, instance, **kwargs):
+    # refresh_pro_usage also publishes the recounted gears to the catalog index
+    refresh_pro_usage([instance.gear_id, getattr(instance, '_previous_gear_id', None)])
+    # Association rule counts (incremental_rules.py) for the player's old and new basket
+    record_basket_changes([instance.player_id, getattr(instance, '_previous_player_id', None)])
+
+
+@receiver(post_save, sender=ProPlayer)
+def pro_player_changed(sender, instance, created, **kwargs):
+    # The player's game may have changed, which moves the per-game breakdown
+    if not created:
+        refresh_pro_usage(instance.proplayergear_set.values_list('gear_id', flat=True))
+
+
+# --- Similar-gear index (GamingGear.similar_gear_ids) ---
+
+@receiver(pre_save, sender=GamingGear)
+def remember_previous_type(sender, instance, **kwargs):
+    # A gear moved to another type must also leave its old category's lists
+    if instance.pk:
+        instance._previous_type = (
+            GamingGear.objects.filter(pk=instance.pk).values_list('type', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=GamingGear)
+@receiver(post_delete, sender=GamingGear)
+def gear_changed(sender, instance, **kwargs):
+    update_similar_gear(instance.gear_id, instance.type, getattr(instance, '_previous_type', None))
+    # Patch this row in every process's catalog index (catalog_index.py)
+    publish_changes([instance.gear_id])
+    # id -> type map used by the association-rule type filter
+    invalidate_gear_type_map()
+
+
+# --- eDPI / sensitivity KD-trees (pro_matching.py) ---
+
+@receiver(post_save, sender=ProPlayer)
+@receiver(post_delete, sender=ProPlayer)
+def pro_player_settings_changed(sender, **kwargs):
+    invalidate_pro_matching()
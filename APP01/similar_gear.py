@@ -0,0 +1,217 @@
+"""
+Similar-gear index for the gear detail page.
+
+Each category is turned into a spec feature matrix (standardised typed
+spec columns and price, plus one-hot encoded low-cardinality spec values
+such as Shape, Connection or Panel Tech), and a BallTree NearestNeighbors
+model picks the 16 closest gears for every gear. The IDs are stored in
+GamingGear.similar_gear_ids, so gear_detail reads them with a single
+in_bulk() instead of scanning the category.
+
+A saved or deleted gear is patched in (signals.py, update_similar_gear()):
+its distances to the rest of its category give its own list, and only the
+lists it enters or leaves are recomputed, in one read and one bulk write.
+Features are standardised over the category at patch time, so untouched
+lists can drift slightly from a full rebuild. Bulk writers wrap their work
+in defer_similar_gear_refresh() to refresh each touched category once
+with refresh_similar_gears(). `python manage.py build_similar_gears`
+rebuilds the whole index.
+"""
+
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+from sklearn.neighbors import NearestNeighbors
+
+from .models import GamingGear
+from .spec_columns import load_specs
+
+NEIGHBOURS = 16
+
+NUMERIC_FIELDS = (
+    'weight_g', 'length_cm', 'refresh_hz', 'vertical_resolution', 'max_weight_kg', 'sentiment', 'price',
+)
+CATEGORICAL_FIELDS = ('shape', 'form_factor', 'panel', 'material', 'lumbar_adjustable')
+
+# Spec keys with more distinct values than this (names, sensors, ...) are not one-hot encoded
+MAX_SPEC_VALUES = 12
+IGNORED_SPEC_KEYS = {'Name', 'sentiment_score'}
+
+# A mismatch on one categorical value costs the same distance as one standard deviation
+ONE_HOT_WEIGHT = 1 / np.sqrt(2)
+
+_state = threading.local()
+
+
+def build_feature_matrix(rows):
+    """Feature matrix for one category; rows are dicts from GamingGear.values()."""
+    columns = []
+
+    for field in NUMERIC_FIELDS:
+        values = np.array([np.nan if row[field] is None else float(row[field]) for row in rows])
+        if np.isnan(values).all():
+            continue
+        std = np.nanstd(values)
+        scaled = (values - np.nanmean(values)) / std if std > 0 else np.zeros(len(rows))
+        # Missing values sit at the category mean
+        columns.append(np.nan_to_num(scaled))
+
+    categorical = [[row[field] for row in rows] for field in CATEGORICAL_FIELDS]
+    specs_list = [load_specs(row['specs']) for row in rows]
+    spec_keys = sorted({key for specs in specs_list for key in specs} - IGNORED_SPEC_KEYS)
+    for key in spec_keys:
+        values = [str(specs.get(key) or '') for specs in specs_list]
+        if 2 <= len(set(values)) <= MAX_SPEC_VALUES:
+            categorical.append(values)
+
+    for values in categorical:
+        for level in sorted(set(values), key=str):
+            if level in ('', None):
+                continue
+            columns.append(np.array([value == level for value in values], dtype=float) * ONE_HOT_WEIGHT)
+
+    if not columns:
+        return np.zeros((len(rows), 1))
+    return np.column_stack(columns)
+
+
+def compute_neighbours(rows, k=NEIGHBOURS):
+    """Return {gear_id: [k nearest gear_ids]} for one category."""
+    ids = [row['gear_id'] for row in rows]
+    if len(ids) < 2:
+        return {gear_id: [] for gear_id in ids}
+
+    features = build_feature_matrix(rows)
+    model = NearestNeighbors(n_neighbors=min(k + 1, len(ids)), algorithm='ball_tree').fit(features)
+    _distances, indices = model.kneighbors(features)
+    return {
+        gear_id: [ids[j] for j in indices[i] if j != i][:k]
+        for i, gear_id in enumerate(ids)
+    }
+
+
+def refresh_similar_gears(categories, batch_size=500):
+    """
+    Recompute neighbour lists for the given gear types.
+
+    Returns the number of gears whose list changed.
+    """
+    categories = {category for category in categories if category}
+    if not categories:
+        return 0
+
+    deferred = getattr(_state, 'pending', None)
+    if deferred is not None:
+        deferred.update(categories)
+        return 0
+
+    changed = []
+    for category in categories:
+        rows = list(
+            GamingGear.objects.filter(type=category).order_by('gear_id')
+            .values('gear_id', 'specs', 'similar_gear_ids', *NUMERIC_FIELDS, *CATEGORICAL_FIELDS)
+        )
+        neighbours = compute_neighbours(rows)
+        changed.extend(
+            GamingGear(gear_id=row['gear_id'], similar_gear_ids=neighbours[row['gear_id']])
+            for row in rows
+            if row['similar_gear_ids'] != neighbours[row['gear_id']]
+        )
+    # bulk_update does not send post_save, so this does not trigger itself
+    GamingGear.objects.bulk_update(changed, ['similar_gear_ids'], batch_size=batch_size)
+    return len(changed)
+
+
+def _patch_category(category, gear_id, batch_size):
+    """Bring the lists of `category` up to date after `gear_id` was added, changed or removed there."""
+    rows = list(
+        GamingGear.objects.filter(type=category).order_by('gear_id')
+        .values('gear_id', 'specs', 'similar_gear_ids', *NUMERIC_FIELDS, *CATEGORICAL_FIELDS)
+    )
+    if not rows:
+        return 0
+    ids = [row['gear_id'] for row in rows]
+    position = {gid: i for i, gid in enumerate(ids)}
+    features = build_feature_matrix(rows)
+    k = min(NEIGHBOURS, len(ids) - 1)
+
+    def distances(i):
+        d = np.linalg.norm(features - features[i], axis=1)
+        d[i] = np.inf
+        return d
+
+    def nearest(i):
+        return [ids[j] for j in np.argsort(distances(i), kind='stable')[:k]]
+
+    x = position.get(gear_id)
+    updates = {}
+    if x is not None:
+        updates[gear_id] = nearest(x)
+        from_x = distances(x)
+
+    for i, row in enumerate(rows):
+        if i == x:
+            continue
+        old = row['similar_gear_ids'] or []
+        current = [n for n in old if n in position and n != row['gear_id']]
+        if gear_id in old or len(current) != len(old):
+            # The gear moved or left (or the list points at rows that are gone): recompute exactly
+            new = nearest(i)
+        elif x is None:
+            continue
+        elif len(current) < k or from_x[i] < np.linalg.norm(features[i] - features[position[current[-1]]]):
+            # The gear enters this list: merge it in and drop the farthest
+            d = distances(i)
+            new = sorted(current + [gear_id], key=lambda n: d[position[n]])[:k]
+        else:
+            continue
+        if new != old:
+            updates[row['gear_id']] = new
+
+    changed = [
+        GamingGear(gear_id=gid, similar_gear_ids=neighbours)
+        for gid, neighbours in updates.items()
+        if neighbours != rows[position[gid]]['similar_gear_ids']
+    ]
+    GamingGear.objects.bulk_update(changed, ['similar_gear_ids'], batch_size=batch_size)
+    return len(changed)
+
+
+def update_similar_gear(gear_id, gear_type, previous_type=None, batch_size=500):
+    """
+    Patch the neighbour lists after one gear was saved or deleted.
+
+    Inside defer_similar_gear_refresh() the categories are refreshed in full
+    on exit instead. Returns the number of gears whose list changed.
+    """
+    categories = [category for category in {gear_type, previous_type} if category]
+    deferred = getattr(_state, 'pending', None)
+    if deferred is not None:
+        deferred.update(categories)
+        return 0
+    return sum(_patch_category(category, gear_id, batch_size) for category in categories)
+
+
+def rebuild_similar_gears():
+    categories = GamingGear.objects.values_list('type', flat=True).distinct().order_by()
+    return refresh_similar_gears(set(categories))
+
+
+@contextmanager
+def defer_similar_gear_refresh():
+    """
+    Collect gear types touched inside the block and refresh them once on exit.
+
+    Nested blocks share the outer collection.
+    """
+    if getattr(_state, 'pending', None) is not None:
+        yield
+        return
+
+    _state.pending = set()
+    try:
+        yield
+    finally:
+        pending, _state.pending = _state.pending, None
+    refresh_similar_gears(pending)
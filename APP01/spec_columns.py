@@ -0,0 +1,201 @@
+"""
+Typed spec columns derived from GamingGear.specs.
+
+The scraped specs JSON stores everything as free-form strings
+("3.99 / 6.39 / 12.71", "360Hz", "QD OLED", ...). derive_spec_columns()
+parses the keys the recommenders use into typed values once, when a gear is
+saved, so scoring and filtering can read indexed columns instead of
+re-parsing strings on every request.
+
+Parsing follows the rules HybridRecommender applies to the raw specs.
+"""
+
+import json
+
+FORM_FACTOR_CHOICES = [
+    ('60%', '60%'),
+    ('65%', '65%'),
+    ('75%', '75%'),
+    ('TKL', 'TKL'),
+    ('Full Size', 'Full Size'),
+]
+COMPACT_FORM_FACTORS = ('60%', '65%', '75%')
+
+SHAPE_CHOICES = [
+    ('Ergonomic', 'Ergonomic'),
+    ('Ambidextrous', 'Ambidextrous'),
+]
+
+PANEL_CHOICES = [
+    ('OLED', 'OLED'),
+    ('IPS', 'IPS'),
+    ('VA', 'VA'),
+    ('TN', 'TN'),
+]
+
+# Ordered by scoring precedence: a chair listing several materials is
+# classified by the first one found
+MATERIAL_CHOICES = [
+    ('Fabric', 'Fabric'),
+    ('Real Leather', 'Real Leather'),
+    ('Artificial Leather', 'Artificial Leather'),
+    ('Mesh', 'Mesh'),
+]
+
+# GamingGear fields written by derive_spec_columns()
+SPEC_COLUMNS = (
+    'weight_g', 'length_cm', 'refresh_hz', 'vertical_resolution',
+    'form_factor', 'shape', 'panel', 'sentiment',
+    'max_weight_kg', 'material', 'lumbar_adjustable',
+)
+
+
+def load_specs(specs):
+    """Return specs as a dict (legacy rows may hold a JSON string)."""
+    if isinstance(specs, str):
+        try:
+            return json.loads(specs)
+        except (json.JSONDecodeError, TypeError):
+            return {}
+    return specs if isinstance(specs, dict) else {}
+
+
+def parse_length_cm(specs):
+    """Length is the last value of "H / W / L (cm)"."""
+    parts = str(specs.get('H / W / L (cm)') or '').split('/')
+    if len(parts) == 3:
+        try:
+            return float(parts[2].strip())
+        except ValueError:
+            pass
+    return None
+
+
+def parse_weight_g(specs):
+    w_str = specs.get('Weight') or specs.get('W (g)')
+    if w_str:
+        try:
+            return float(str(w_str).replace('g', '').strip())
+        except ValueError:
+            pass
+    return None
+
+
+def parse_refresh_hz(specs):
+    value = specs.get('Refresh Rate')
+    if value in (None, ''):
+        return None
+    try:
+        return float(str(value).replace('Hz', ''))
+    except ValueError:
+        return None
+
+
+def parse_vertical_resolution(specs):
+    """"2560×1440" -> 1440."""
+    resolution = str(specs.get('Resolution') or '').replace('x', '×')
+    if '×' not in resolution:
+        return None
+    try:
+        return int(resolution.split('×')[-1].strip().rstrip('p'))
+    except ValueError:
+        return None
+
+
+def parse_form_factor(specs):
+    form_factor = str(specs.get('Form Factor') or '')
+    for compact in COMPACT_FORM_FACTORS:
+        if compact in form_factor:
+            return compact
+    if 'TKL' in form_factor:
+        return 'TKL'
+    if 'Full Size' in form_factor:
+        return 'Full Size'
+    return ''
+
+
+def parse_shape(specs):
+    # A missing Shape is treated as Ambidextrous, an empty one as unknown
+    shape = str(specs.get('Shape', 'Ambidextrous') or '')
+    if 'Ergonomic' in shape:
+        return 'Ergonomic'
+    if 'Ambidextrous' in shape:
+        return 'Ambidextrous'
+    return ''
+
+
+def parse_panel(specs):
+    panel = str(specs.get('Panel Tech') or '')
+    for code, _label in PANEL_CHOICES:
+        if code in panel:
+            return code
+    return ''
+
+
+def parse_max_weight_kg(specs):
+    try:
+        return float(specs.get('Max weight') or '')
+    except (ValueError, TypeError):
+        return None
+
+
+def parse_material(specs):
+    material = str(specs.get('Material') or '')
+    for code, _label in MATERIAL_CHOICES:
+        if code in material:
+            return code
+    return ''
+
+
+def parse_lumbar_adjustable(specs):
+    # Case-sensitive on purpose, matching the recommender rule
+    return 'Adjustable' in str(specs.get('Lumbar support') or '')
+
+
+def parse_sentiment(specs):
+    """Review sentiment as displayed to users: capped at 9.9, one decimal."""
+    raw = specs.get('sentiment_score', 0)
+    if not raw:
+        return None
+    try:
+        return round(min(float(raw), 9.9), 1)
+    except (ValueError, TypeError):
+        return 0.0
+
+
+def derive_spec_columns(specs):
+    """Return {column: value} for every field in SPEC_COLUMNS."""
+    specs = load_specs(specs)
+    return {
+        'weight_g': parse_weight_g(specs),
+        'length_cm': parse_length_cm(specs),
+        'refresh_hz': parse_refresh_hz(specs),
+        'vertical_resolution': parse_vertical_resolution(specs),
+        'form_factor': parse_form_factor(specs),
+        'shape': parse_shape(specs),
+        'panel': parse_panel(specs),
+        'sentiment': parse_sentiment(specs),
+        'max_weight_kg': parse_max_weight_kg(specs),
+        'material': parse_material(specs),
+        'lumbar_adjustable': parse_lumbar_adjustable(specs),
+    }
+
+
+def backfill_spec_columns(queryset, fields=SPEC_COLUMNS, batch_size=500):
+    """
+    Re-derive the typed columns for every gear in queryset with bulk_update
+    (no post_save, so stored quiz results are left alone).
+
+    Migrations pass the historical GamingGear queryset and the `fields`
+    that exist at that point. Returns the number of gears whose columns changed.
+    """
+    fields = list(fields)
+    changed = []
+    for gear in queryset.only('gear_id', 'specs', *fields).iterator(chunk_size=batch_size):
+        columns = derive_spec_columns(gear.specs)
+        if any(getattr(gear, field) != columns[field] for field in fields):
+            for field in fields:
+                setattr(gear, field, columns[field])
+            changed.append(gear)
+    queryset.model.objects.bulk_update(changed, fields, batch_size=batch_size)
+    return len(changed)
@@ -1,3 +1,898 @@
-from django.test import TestCase
+import itertools
+import json
+import os
+import random
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+import pandas as pd
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from . import association_rules, catalog_index, incremental_rules, leaderboards, pro_matching, quiz_results
+from .association_rules import AssociationRuleMiner, RuleIndex, TransactionMatrix
+from .benchmark import run_benchmark
+from .instrumentation import metrics_snapshot, reset_metrics
+from .feature_store import FeatureStoreRecommender, current_generation, get_recommender, write_generation
+from .models import Game, GamingGear, Preset, PresetGear, ProPlayer, ProPlayerGear, QuizResult, User
+from .pro_matching import find_similar_pros
+from .pro_usage import defer_pro_usage_refresh, recount_all_pro_usage
+from .quiz_results import (
+    QUIZ_GENRES, QUIZ_GRIPS, QUIZ_HAND_SIZES, get_quiz_variants, rebuild_quiz_results,
+    serialize_variants,
+)
+from .recommender_hybrid import HybridRecommender, load_candidates
+from .setup_optimizer import recommend_budget_setups
+from .recommender_vectorized import VectorizedRecommender
+from .scoring_rules import DEFAULT_RULES_FILE, RuleTable, activate_rule_table, current_rule_table
+from .similar_gear import (
+    CATEGORICAL_FIELDS, NEIGHBOURS, NUMERIC_FIELDS, compute_neighbours, defer_similar_gear_refresh, update_similar_gear,
+)
+
+
+def load_sample_catalog(per_category=40):
+    """Create GamingGear rows from the real scraped data files in data/."""
+    files = {
+        'Mouse': 'mice_data.json',
+        'Keyboard': 'keyboards_data.json',
+        'Headset': 'headsets_data.json',
+        'Monitor': 'monitors_data.json',
+        'Chair': 'chairs_data.json',
+    }
+    with defer_similar_gear_refresh():
+        for category, filename in files.items():
+            with open(os.path.join(settings.BASE_DIR, 'data', filename), encoding='utf-8') as f:
+                items = json.load(f)[:per_category]
+            for i, item in enumerate(items):
+                specs = dict(item)
+                # Spread sentiment over the same range import_real_data produces
+                if i % 4:
+                    specs['sentiment_score'] = (i * 7 % 23) / 2.0 - 1.5
+                GamingGear.objects.create(
+                    name=item.get('Name', f'{category} {i}'),
+                    type=category,
+                    brand=item.get('Name', 'Unknown').split(' ')[0],
+                    specs=specs,
+                )
+
+
+class VectorizedRecommenderParityTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        load_sample_catalog()
+
+    def assertSameEntries(self, expected, actual):
+        self.assertEqual([e['gear'].gear_id for e in expected], [e['gear'].gear_id for e in actual])
+        for exp, act in zip(expected, actual):
+            self.assertAlmostEqual(exp['score'], act['score'])
+            self.assertEqual(exp['reasons'], act['reasons'])
+            self.assertEqual(exp['sentiment'], act['sentiment'])
+
+    def test_category_rankings_match_python_engine(self):
+        python_engine = HybridRecommender()
+        vectorized = VectorizedRecommender()
+        methods = ['recommend_mouse', 'recommend_keyboard', 'recommend_headset',
+                   'recommend_monitor', 'recommend_chair']
+        for genre in QUIZ_GENRES + ['RPG']:
+            for hand_size in QUIZ_HAND_SIZES:
+                for grip in QUIZ_GRIPS:
+                    prefs = {'genre': genre, 'hand_size': hand_size, 'grip': grip}
+                    for method in methods:
+                        with self.subTest(prefs=prefs, method=method):
+                            self.assertSameEntries(
+                                getattr(python_engine, method)(prefs),
+                                getattr(vectorized, method)(prefs),
+                            )
+
+    def test_category_arrays_follow_the_candidates_passed(self):
+        prefs = {'genre': 'FPS', 'hand_size': 'Small', 'grip': 'Claw'}
+        vectorized = VectorizedRecommender()
+        everything = vectorized.recommend_mouse(prefs)
+        subset = list(GamingGear.objects.filter(type='Mouse').order_by('gear_id')[:3])
+        self.assertEqual(
+            {e['gear'].gear_id for e in vectorized.recommend_mouse(prefs, subset)}, {g.gear_id for g in subset}
+        )
+        with self.assertNumQueries(0):
+            vectorized.recommend_mouse(prefs, subset)
+        self.assertSameEntries(everything, vectorized.recommend_mouse(prefs))
+
+    def test_variant_setups_match_python_engine(self):
+        prefs = {'genre': 'FPS', 'hand_size': 'Small', 'grip': 'Claw'}
+        expected = HybridRecommender().recommend_variant_setups(prefs)
+        with self.assertNumQueries(1):
+            actual = VectorizedRecommender().recommend_variant_setups(prefs)
+        for variant in ['Performance', 'Balanced', 'Pro']:
+            self.assertEqual(expected[variant]['pros'], actual[variant]['pros'])
+            self.assertAlmostEqual(expected[variant]['score'], actual[variant]['score'])
+            for category in ['Mouse', 'Keyboard', 'Headset', 'Monitor', 'Chair']:
+                self.assertEqual(expected[variant][category]['gear'], actual[variant][category]['gear'])
+                self.assertEqual(expected[variant][category]['reasons'], actual[variant][category]['reasons'])
+
+
+class QuizResultStoreTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        load_sample_catalog(per_category=10)
+
+    def test_rebuild_covers_every_combination(self):
+        self.assertEqual(rebuild_quiz_results(), len(QUIZ_GENRES) * len(QUIZ_HAND_SIZES) * len(QUIZ_GRIPS))
+        prefs = {'genre': 'MOBA', 'hand_size': 'Large', 'grip': 'Palm'}
+        with self.assertNumQueries(1):
+            variants = get_quiz_variants(prefs)
+        self.assertEqual(set(variants), {'Performance', 'Balanced', 'Pro'})
+
+    def test_gear_change_invalidates_results(self):
+        rebuild_quiz_results()
+        gear = GamingGear.objects.filter(type='Mouse').first()
+        gear.specs = {**gear.specs, 'Weight': '50'}
+        with self.captureOnCommitCallbacks(execute=True):
+            gear.save()
+            self.assertTrue(QuizResult.objects.exists())
+        self.assertFalse(QuizResult.objects.exists())
+
+    def test_result_computed_during_a_change_is_not_served(self):
+        prefs = {'genre': 'FPS', 'hand_size': 'Small', 'grip': 'Claw'}
+        compute = quiz_results.compute_quiz_variants
+        def compute_then_commit_change(user_prefs):
+            variants = compute(user_prefs)
+            with self.captureOnCommitCallbacks(execute=True):
+                GamingGear.objects.filter(type='Mouse').first().save()
+            return variants
+        with mock.patch.object(quiz_results, 'compute_quiz_variants', compute_then_commit_change):
+            get_quiz_variants(prefs)
+        self.assertFalse(QuizResult.objects.exists())
+
+        get_quiz_variants(prefs)
+        version = cache.get(quiz_results.VERSION_KEY)
+        self.assertEqual(QuizResult.objects.get().catalog_version, version)
+        # A row of an older version is recomputed, not served
+        QuizResult.objects.update(catalog_version=version - 1, variants={})
+        self.assertNotEqual(get_quiz_variants(prefs), {})
+        self.assertEqual(QuizResult.objects.get().catalog_version, version)
+
+
+class ProUsageCounterTest(TestCase):
+    def setUp(self):
+        self.game = Game.objects.create(name='Valorant')
+        self.player = ProPlayer.objects.create(name='TenZ', game=self.game)
+        self.gear = GamingGear.objects.create(name='XM2we', type='Mouse', brand='Endgame')
+
+    def test_counters_follow_pro_player_gear_changes(self):
+        link = ProPlayerGear.objects.create(player=self.player, gear=self.gear)
+        self.gear.refresh_from_db()
+        self.assertEqual(self.gear.pro_usage_count, 1)
+        self.assertEqual(self.gear.pro_usage_by_game, {str(self.game.pk): 1})
+
+        link.delete()
+        self.gear.refresh_from_db()
+        self.assertEqual(self.gear.pro_usage_count, 0)
+        self.assertEqual(self.gear.pro_usage_by_game, {})
+
+    def test_deferred_refresh_and_recount(self):
+        other = ProPlayer.objects.create(name='Demon1', game=self.game)
+        with defer_pro_usage_refresh():
+            ProPlayerGear.objects.create(player=self.player, gear=self.gear)
+            ProPlayerGear.objects.create(player=other, gear=self.gear)
+            self.gear.refresh_from_db()
+            self.assertEqual(self.gear.pro_usage_count, 0)
+        self.gear.refresh_from_db()
+        self.assertEqual(self.gear.pro_usage_count, 2)
+
+        GamingGear.objects.filter(pk=self.gear.pk).update(pro_usage_count=99)
+        self.assertEqual(recount_all_pro_usage(), 1)
+        self.gear.refresh_from_db()
+        self.assertEqual(self.gear.pro_usage_count, 2)
+
+
+class SpecColumnsTest(TestCase):
+    def test_columns_follow_specs_on_save(self):
+        gear = GamingGear.objects.create(name='Viper V3 Pro', type='Mouse', brand='Razer', specs={
+            'Weight': '54g', 'H / W / L (cm)': '3.99 / 6.39 / 12.71', 'Shape': 'Ambidextrous',
+            'sentiment_score': 12,
+        })
+        self.assertEqual((gear.weight_g, gear.length_cm, gear.shape, gear.sentiment), (54.0, 12.71, 'Ambidextrous', 9.9))
+
+        gear.specs = {'Form Factor': '65%', 'Refresh Rate': '240', 'Resolution': '2560×1440', 'Panel Tech': 'QD OLED'}
+        gear.save(update_fields=['specs'])
+        gear.refresh_from_db()
+        self.assertEqual(gear.weight_g, None)
+        self.assertEqual((gear.form_factor, gear.refresh_hz, gear.vertical_resolution, gear.panel), ('65%', 240.0, 1440, 'OLED'))
+
+
+class SQLRankingModeTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        load_sample_catalog()
+
+    def test_sql_mode_matches_python_mode(self):
+        recommender = HybridRecommender()
+        for genre in QUIZ_GENRES + ['RPG']:
+            for hand_size in QUIZ_HAND_SIZES:
+                for grip in QUIZ_GRIPS:
+                    prefs = {'genre': genre, 'hand_size': hand_size, 'grip': grip}
+                    for category in ['Mouse', 'Keyboard', 'Headset', 'Monitor', 'Chair']:
+                        with self.subTest(prefs=prefs, category=category):
+                            expected = recommender.recommend(category, prefs)
+                            with self.assertNumQueries(1):
+                                actual = recommender.recommend(category, prefs, mode='sql')
+                            VectorizedRecommenderParityTest.assertSameEntries(self, expected, actual)
+
+    def test_sql_mode_follows_top_k(self):
+        recommender = HybridRecommender()
+        recommender.top_k = 8
+        prefs = {'genre': 'FPS', 'hand_size': 'Medium', 'grip': 'Claw'}
+        expected = recommender.recommend('Mouse', prefs)
+        self.assertEqual(len(expected), 8)
+        VectorizedRecommenderParityTest.assertSameEntries(self, expected, recommender.recommend('Mouse', prefs, mode='sql'))
+
+
+class VariantSetupsBatchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        load_sample_catalog(per_category=10)
+
+    def test_batch_matches_single_calls(self):
+        prefs_list = [
+            {'genre': 'FPS', 'hand_size': 'Small', 'grip': 'Claw'},
+            {'genre': 'MMO', 'hand_size': 'Large', 'grip': 'Palm'},
+            {'genre': 'FPS', 'hand_size': 'Small', 'grip': 'Claw', 'email': 'a@b.c'},
+        ]
+        recommender = VectorizedRecommender()
+        expected = [serialize_variants(recommender.recommend_variant_setups(p)) for p in prefs_list]
+        with self.assertNumQueries(1):
+            batch = recommender.recommend_variant_setups_batch(prefs_list)
+        self.assertIs(batch[0], batch[2])
+        self.assertEqual([serialize_variants(v) for v in batch], expected)
+
+        pooled = HybridRecommender().recommend_variant_setups_batch(prefs_list, workers=2, chunk_size=1)
+        self.assertEqual([serialize_variants(v) for v in pooled], expected)
+
+
+class BenchmarkSuiteTest(TestCase):
+    def test_run_benchmark_reports_and_rolls_back(self):
+        # No worker pool in a unit test
+        report = run_benchmark(100, repeat=1, mining_repeat=1, pool_workers=0)
+        self.assertEqual(report['catalog']['gears'], 100)
+        self.assertIn('refresh_game_partitions[serial]', report['operations'])
+        self.assertNotIn('refresh_game_partitions[pool]', report['operations'])
+        self.assertEqual(set(report['operations']['recommend_mouse']), {'p50_ms', 'p95_ms', 'peak_kb', 'queries', 'runs'})
+        self.assertFalse(GamingGear.objects.exists())
+
+
+class SimilarGearIndexTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        load_sample_catalog(per_category=20)
+
+    def test_neighbours_are_same_type_and_follow_changes(self):
+        mice = list(GamingGear.objects.filter(type='Mouse').order_by('gear_id'))
+        self.assertEqual(len(mice[0].similar_gear_ids), NEIGHBOURS)
+        self.assertNotIn(mice[0].gear_id, mice[0].similar_gear_ids)
+        self.assertEqual(
+            set(GamingGear.objects.filter(gear_id__in=mice[0].similar_gear_ids).values_list('type', flat=True)),
+            {'Mouse'},
+        )
+
+        # A copy of a mouse becomes that mouse's nearest neighbour
+        twin = GamingGear.objects.create(name='Twin', type='Mouse', brand='Test', specs=mice[3].specs)
+        mice[3].refresh_from_db()
+        self.assertEqual(mice[3].similar_gear_ids[0], twin.gear_id)
+
+        twin.delete()
+        mice[3].refresh_from_db()
+        self.assertNotIn(twin.gear_id, mice[3].similar_gear_ids)
+
+    def test_single_save_patches_only_affected_lists(self):
+        mouse = GamingGear.objects.filter(type='Mouse').order_by('gear_id')[5]
+        GamingGear.objects.filter(pk=mouse.pk).update(weight_g=1)
+        # One category read, one bulk write (no per-category rebuild)
+        with self.assertNumQueries(2):
+            update_similar_gear(mouse.gear_id, mouse.type)
+        rows = list(
+            GamingGear.objects.filter(type='Mouse').order_by('gear_id')
+            .values('gear_id', 'specs', 'similar_gear_ids', *NUMERIC_FIELDS, *CATEGORICAL_FIELDS)
+        )
+        expected = compute_neighbours(rows)
+        self.assertEqual(
+            set(GamingGear.objects.get(pk=mouse.pk).similar_gear_ids), set(expected[mouse.gear_id])
+        )
+        for row in rows:
+            self.assertEqual(len(row['similar_gear_ids']), NEIGHBOURS)
+
+
+class ProMatchingTest(TestCase):
+    def setUp(self):
+        pro_matching._indexes.clear()
+        self.game = Game.objects.create(name='Valorant')
+        for name, edpi, sens in [('Low', 200, 0.25), ('Mid', 280, 0.35), ('High', 640, 0.8)]:
+            ProPlayer.objects.create(name=name, game=self.game, edpi=edpi, sensitivity=sens)
+
+    def test_nearest_pros_and_rebuild_on_change(self):
+        response = self.client.get('/api/pro-matches/', {'game': self.game.pk, 'dpi': 800, 'sensitivity': 0.36})
+        self.assertEqual([p['name'] for p in response.json()['players']], ['Mid', 'Low', 'High'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ProPlayer.objects.create(name='Twin', game=self.game, edpi=288, sensitivity=0.36)
+        with self.assertNumQueries(1):
+            matches = find_similar_pros(self.game.pk, 800, 0.36, k=1)
+        self.assertEqual(matches[0]['name'], 'Twin')
+        with self.assertNumQueries(0):
+            find_similar_pros(self.game.pk, 400, 0.7)
+
+        response = self.client.get('/wizard/pro-match/', {'game': self.game.pk, 'dpi': 800, 'sensitivity': 0.36})
+        self.assertContains(response, 'Twin')
+
+    def test_trees_follow_committed_changes_only(self):
+        find_similar_pros(self.game.pk, 800, 0.36)
+        with self.captureOnCommitCallbacks() as callbacks:
+            ProPlayer.objects.create(name='Twin', game=self.game, edpi=288, sensitivity=0.36)
+            # Not committed yet: the current trees are still served
+            with self.assertNumQueries(0):
+                self.assertEqual(find_similar_pros(self.game.pk, 800, 0.36, k=1)[0]['name'], 'Mid')
+
+        # A build that was running when the change committed is not kept
+        build = pro_matching.build_game_index
+        def build_then_commit(game_id):
+            index = build(game_id)
+            for callback in callbacks:
+                callback()
+            return index
+        with mock.patch.object(pro_matching, 'build_game_index', build_then_commit):
+            pro_matching._indexes.clear()
+            find_similar_pros(self.game.pk, 800, 0.36)
+        self.assertNotIn(self.game.pk, pro_matching._indexes)
+        self.assertEqual(find_similar_pros(self.game.pk, 800, 0.36, k=1)[0]['name'], 'Twin')
+
+    def test_non_finite_or_negative_settings_are_rejected(self):
+        for dpi, sensitivity in [('nan', 0.36), (800, 'inf'), (-800, 0.36), (800, 0)]:
+            params = {'game': self.game.pk, 'dpi': dpi, 'sensitivity': sensitivity}
+            self.assertEqual(self.client.get('/api/pro-matches/', params).status_code, 400)
+            response = self.client.get('/wizard/pro-match/', params)
+            self.assertEqual(response.status_code, 200)
+            self.assertIsNone(response.context['matches'])
+
+
+class FeatureStoreTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        load_sample_catalog(per_category=15)
+
+    def setUp(self):
+        self.store_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.store_dir.cleanup)
+        settings_override = override_settings(FEATURE_STORE_DIR=self.store_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_store_matches_database_and_swaps_generations(self):
+        self.assertIsNone(current_generation())
+        first = write_generation()
+        prefs = {'genre': 'MOBA', 'hand_size': 'Small', 'grip': 'Fingertip'}
+        expected = serialize_variants(VectorizedRecommender().recommend_variant_setups(prefs))
+        recommender = FeatureStoreRecommender()
+        self.assertEqual(recommender.generation.name, first['generation'])
+        self.assertEqual(serialize_variants(recommender.recommend_variant_setups(prefs)), expected)
+
+        second = write_generation(keep=1)
+        self.assertEqual(current_generation().name, second['generation'])
+        self.assertFalse(os.path.exists(os.path.join(self.store_dir.name, first['generation'])))
+
+    def test_rows_gone_from_database_are_replaced(self):
+        write_generation()
+        prefs = {'genre': 'FPS', 'hand_size': 'Medium', 'grip': 'Claw'}
+        ranked = [r['gear'].gear_id for r in FeatureStoreRecommender().recommend_mouse(prefs)]
+        self.assertEqual(len(ranked), FeatureStoreRecommender().top_k)
+
+        GamingGear.objects.filter(gear_id=ranked[0]).delete()
+        GamingGear.objects.filter(gear_id=ranked[1]).update(type='Chair')
+        # A stale snapshot still fills top_k with live mice, in the same order
+        results = FeatureStoreRecommender().recommend_mouse(prefs)
+        self.assertEqual([r['gear'].gear_id for r in results][:len(ranked) - 2], ranked[2:])
+        self.assertEqual(len(results), len(ranked))
+        self.assertTrue(all(r['gear'].type == 'Mouse' for r in results))
+
+    def test_catalog_changes_bypass_stale_store(self):
+        cache.clear()
+        write_generation()
+        self.assertIsInstance(get_recommender(), FeatureStoreRecommender)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            gear = GamingGear.objects.filter(type='Mouse').first()
+            gear.price = 1
+            gear.save()
+        # The live catalog index has moved past the snapshot
+        recommender = get_recommender()
+        self.assertIsInstance(recommender, VectorizedRecommender)
+        self.assertNotIsInstance(recommender, FeatureStoreRecommender)
+
+        write_generation()
+        self.assertIsInstance(get_recommender(), FeatureStoreRecommender)
+
+
+class CatalogIndexTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        load_sample_catalog(per_category=5)
+
+    def setUp(self):
+        cache.clear()
+        catalog_index._index = catalog_index.CatalogIndex()
+
+    def ids(self, bundle):
+        return {category: [g.gear_id for g in gears] for category, gears in bundle.items()}
+
+    def test_signals_patch_only_changed_rows(self):
+        self.assertEqual(self.ids(catalog_index.get_candidates()), self.ids(load_candidates()))
+        with self.assertNumQueries(0):
+            catalog_index.get_candidates()
+
+        mouse, chair = GamingGear.objects.filter(type='Mouse').first(), GamingGear.objects.filter(type='Chair').first()
+        with self.captureOnCommitCallbacks(execute=True):
+            mouse.specs = {**mouse.specs, 'Weight': '33'}
+            mouse.save()
+        # One query re-fetches the edited row
+        with self.assertNumQueries(1):
+            candidates = catalog_index.get_candidates()
+        self.assertEqual(next(g for g in candidates['Mouse'] if g.gear_id == mouse.gear_id).weight_g, 33)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            chair.delete()
+        self.assertNotIn(chair.gear_id, self.ids(catalog_index.get_candidates())['Chair'])
+        self.assertEqual(self.ids(catalog_index.get_candidates()), self.ids(load_candidates()))
+
+
+class BudgetSetupOptimizerTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        load_sample_catalog(per_category=5)
+        for i, gear in enumerate(GamingGear.objects.order_by('gear_id')):
+            gear.price = 20 + (i * 37) % 180
+            gear.save(update_fields=['price'])
+        for glide in ['Control', 'Speed', '']:
+            GamingGear.objects.create(name=f'Pad {glide}', type='Mousepad', brand='Pad', price=25, specs={'Glide': glide})
+
+    def test_matches_exhaustive_search(self):
+        prefs = {'genre': 'FPS', 'hand_size': 'Small', 'grip': 'Claw'}
+        recommender = VectorizedRecommender()
+        recommender.top_k = 100
+        candidates = load_candidates(['Mouse', 'Keyboard', 'Headset', 'Monitor', 'Chair', 'Mousepad'])
+        scored = [
+            getattr(recommender, f'recommend_{category.lower()}')(prefs, gears)
+            for category, gears in candidates.items()
+        ]
+        budget = 450
+        totals = sorted(
+            (sum(e['score'] for e in combo) for combo in itertools.product(*scored)
+             if sum(e['gear'].price for e in combo) <= budget),
+            reverse=True,
+        )
+
+        setups = recommend_budget_setups(prefs, budget, include_mousepad=True, top=3)
+        self.assertEqual([s['score'] for s in setups], [round(t, 2) for t in totals[:3]])
+        for setup in setups:
+            self.assertLessEqual(setup['price'], budget)
+            self.assertEqual(setup['items']['Mousepad']['gear'].name, 'Pad Control')
+        self.assertEqual(recommend_budget_setups(prefs, 50), [])
+
+    def test_non_finite_or_negative_budget_is_rejected(self):
+        for budget in ['nan', 'inf', '-1']:
+            response = self.client.get('/api/budget-setups/', {'budget': budget})
+            self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/budget-setups/', {'budget': 450})
+        self.assertEqual(response.json()['budget'], 450)
+
+
+class ScoringRuleTableTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        load_sample_catalog(per_category=10)
+
+    def test_activated_table_is_hot_swapped(self):
+        with open(DEFAULT_RULES_FILE, encoding='utf-8') as f:
+            data = json.load(f)
+        data['version'] = 2
+        data['categories']['Headset']['terms'] = []
+        data['categories']['Headset']['rules'] = [
+            {"if": [["sentiment", "<", 5]], "points": 50, "reason": "Contrarian pick ({sentiment!i}/10)"},
+        ]
+        prefs = {'genre': 'FPS', 'hand_size': 'Medium', 'grip': 'Palm'}
+
+        with tempfile.TemporaryDirectory() as tmp, override_settings(SCORING_RULES_FILE=os.path.join(tmp, 'live.json')):
+            self.assertEqual(current_rule_table().version, 1)
+            source = os.path.join(tmp, 'v2.json')
+            with open(source, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            activate_rule_table(source)
+
+            self.assertEqual(current_rule_table().version, 2)
+            headsets = VectorizedRecommender().recommend_headset(prefs)
+            self.assertTrue(all(entry['score'] == 50 for entry in headsets))
+            self.assertTrue(all(entry['reasons'][0].startswith('Contrarian pick') for entry in headsets))
+
+        data['categories']['Mouse']['rules'][0]['if'] = [["shape", "has", "Round"]]
+        with self.assertRaisesMessage(ValueError, "'shape' has no value 'Round'"):
+            RuleTable(data)
+
+
+class StageTimingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        load_sample_catalog(per_category=5)
+
+    def setUp(self):
+        reset_metrics()
+        catalog_index._index = catalog_index.CatalogIndex()
+
+    @override_settings(SERVER_TIMING=True)
+    def test_quiz_request_reports_stages(self):
+        response = self.client.post('/wizard/process-quiz/', {'genre': 'FPS', 'hand_size': 'Small', 'grip': 'Claw'})
+        self.assertEqual(response.status_code, 302)
+        header = response['Server-Timing']
+        for name in ['view.process_quiz', 'recommend_variant_setups', 'recommend_mouse', 'get_pro_choice', 'session.save']:
+            self.assertIn(f'{name};dur=', header)
+
+        stages = metrics_snapshot()['stages']
+        self.assertEqual(stages['get_pro_choice']['count'], 5)
+        self.assertEqual(stages['load_candidates']['queries'], 1)
+        self.assertEqual(stages['load_candidates']['rows'], 25)
+
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 302)
+        admin = User.objects.create_superuser('admin@example.com', 'admin', 'pw')
+        self.client.force_login(admin)
+        self.assertIn('view.process_quiz', self.client.get('/api/metrics/').json()['stages'])
+
+
+class RuleIndexTest(TestCase):
+    def test_matches_full_subset_scan(self):
+        rng = random.Random(7)
+        items = [str(i) for i in range(30)]
+        rows = [
+            {
+                'antecedents': frozenset(rng.sample(items, rng.randint(1, 3))),
+                'consequents': frozenset(rng.sample(items, 1)),
+                'confidence': rng.random(), 'lift': 1 + rng.random(), 'score': rng.random(),
+            }
+            for _ in range(300)
+        ]
+        rules = pd.DataFrame(rows).sort_values('score', ascending=False)
+        index = RuleIndex.from_rules(rules)
+
+        for _ in range(50):
+            selected = set(rng.sample(items, rng.randint(1, 6)))
+            expected = [i for i, a in enumerate(rules['antecedents']) if a.issubset(selected)]
+            self.assertEqual(index.matching_rules(selected), expected)
+
+
+class AssociationRecommendationQueryTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        leaderboards._boards = leaderboards.Leaderboards()
+        self.gears = [
+            GamingGear.objects.create(name=f'G{i}', type=gear_type, brand='B', pro_usage_count=i)
+            for i, gear_type in enumerate(['Mouse', 'Keyboard', 'Headset', 'Monitor', 'Chair', 'Mouse'])
+        ]
+        ids = [str(g.gear_id) for g in self.gears]
+        rules = pd.DataFrame([
+            {'antecedents': frozenset([ids[0]]), 'consequents': frozenset([ids[1]]),
+             'confidence': 0.9, 'lift': 2.0, 'score': 1.8},
+            {'antecedents': frozenset([ids[0]]), 'consequents': frozenset([ids[2], ids[5]]),
+             'confidence': 0.8, 'lift': 2.0, 'score': 1.6},
+            {'antecedents': frozenset([ids[0], ids[3]]), 'consequents': frozenset([ids[4]]),
+             'confidence': 0.5, 'lift': 1.0, 'score': 0.5},
+        ])
+        AssociationRuleMiner().publish_rules(rules)
+        self.miner = AssociationRuleMiner()
+
+    def test_hydrates_in_one_query(self):
+        first = self.gears[0].gear_id
+        with self.assertNumQueries(1):
+            recs = self.miner.get_recommendations([first], top_n=3)
+        self.assertEqual([r['gear_id'] for r in recs[:1]], [self.gears[1].gear_id])
+        self.assertEqual({r['gear_id'] for r in recs[1:]}, {self.gears[2].gear_id, self.gears[5].gear_id})
+
+    def test_exclude_types_uses_cached_type_map(self):
+        first = self.gears[0].gear_id
+        self.miner.get_recommendations([first], top_n=1, exclude_types=['Keyboard'])
+        with self.assertNumQueries(1):
+            recs = self.miner.get_recommendations([first], top_n=1, exclude_types=['Keyboard', 'Mouse'])
+        self.assertEqual([r['gear_id'] for r in recs], [self.gears[2].gear_id])
+
+    def test_workers_reload_only_on_new_version(self):
+        miner = AssociationRuleMiner()
+        published = miner.get_rule_index()
+        self.assertIs(miner.get_rule_index(), published)
+
+        # Another worker: loads the compact payload without mining
+        association_rules._local.clear()
+        with mock.patch.object(AssociationRuleMiner, 'mine_association_rules', side_effect=AssertionError):
+            loaded = miner.get_rule_index()
+            self.assertEqual(loaded.consequents, published.consequents)
+            association_rules._local[None]['checked_at'] = 0.0
+            self.assertIs(miner.get_rule_index(), loaded)
+
+
+class MiningBackendTest(TestCase):
+    def setUp(self):
+        rng = random.Random(3)
+        self.transactions = [
+            [str(100 * c + min(int(rng.paretovariate(1.2)), 20)) for c in range(4)] for _ in range(400)
+        ]
+
+    def mine(self, **options):
+        miner = AssociationRuleMiner(min_support=0.05, **options)
+        rows = [(tid, int(gear_id)) for tid, basket in enumerate(self.transactions) for gear_id in basket]
+        with mock.patch.object(AssociationRuleMiner, 'transaction_rows', return_value=[iter(rows)]):
+            rules = miner.mine_association_rules()
+        return {
+            (a, c): round(conf, 9)
+            for a, c, conf in zip(rules['antecedents'], rules['consequents'], rules['confidence'])
+        }
+
+    def test_backends_agree_with_dense_apriori(self):
+        baseline = self.mine(algorithm='apriori', sparse=False)
+        self.assertTrue(baseline)
+        self.assertEqual(self.mine(algorithm='fpgrowth'), baseline)
+
+        # fpmax is not capped at MAX_ITEMSET_LEN; a basket has one gear per category (4)
+        maximal = self.mine(algorithm='fpmax')
+        self.assertTrue(maximal)
+        self.assertLessEqual(maximal.items(), self.mine(algorithm='apriori', sparse=False, max_len=4).items())
+
+        short = self.mine(algorithm='fpgrowth', max_len=2)
+        self.assertEqual(short, {k: v for k, v in baseline.items() if len(k[0] | k[1]) <= 2})
+
+    def test_preset_rows_stream_into_csr(self):
+        owner = User.objects.create_user('owner@example.com', 'owner', 'pw')
+        gears = [GamingGear.objects.create(name=f'G{i}', type='Mouse', brand='B') for i in range(4)]
+        for basket in [gears[:3], gears[1:3], gears[3:]]:
+            preset = Preset.objects.create(name='P', user=owner)
+            PresetGear.objects.bulk_create(PresetGear(preset=preset, gear=g) for g in basket)
+        player = ProPlayer.objects.create(name='Pro', game=Game.objects.create(name='Valorant'))
+        ProPlayerGear.objects.bulk_create(ProPlayerGear(player=player, gear=g) for g in gears[2:])
+
+        presets = AssociationRuleMiner(source='presets').build_transaction_matrix()
+        # The single-gear preset is not a transaction
+        self.assertEqual(presets.matrix.shape, (2, 3))
+        self.assertEqual(sorted(presets.items), [g.gear_id for g in gears[:3]])
+        frame = presets.frame(min_support=0.6)
+        self.assertEqual(sorted(frame.columns), sorted(str(g.gear_id) for g in gears[1:3]))
+        self.assertEqual(len(AssociationRuleMiner(source='all').build_transaction_matrix()), 3)
+
+
+class IncrementalRulesTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        rng = random.Random(11)
+        game = Game.objects.create(name='Valorant')
+        self.gears = [GamingGear.objects.create(name=f'G{i}', type='Mouse', brand='B') for i in range(10)]
+        weights = [1 / (i + 1) for i in range(len(self.gears))]
+        self.players = [ProPlayer.objects.create(name=f'P{i}', game=game) for i in range(60)]
+        for player in self.players:
+            picks = {g.gear_id for g in rng.choices(self.gears, weights=weights, k=rng.randint(1, 5))}
+            ProPlayerGear.objects.bulk_create(ProPlayerGear(player=player, gear_id=gid) for gid in picks)
+        self.rng = rng
+
+    def rules(self, frame):
+        return {
+            (a, c): (round(conf, 9), round(lift, 9))
+            for a, c, conf, lift in zip(frame['antecedents'], frame['consequents'], frame['confidence'], frame['lift'])
+        }
+
+    def run_jobs_inline(self):
+        # The job thread closes its connection, which would end the test transaction
+        def thread(target, args, **kwargs):
+            return mock.Mock(start=lambda: association_rules._run_refresh_job(*args))
+        return mock.patch('APP01.association_rules.threading.Thread', side_effect=thread)
+
+    def test_per_change_updates_match_full_mining(self):
+        miner = AssociationRuleMiner()
+        miner.refresh_cache()
+        full = AssociationRuleMiner(algorithm='apriori', sparse=False)
+
+        for _ in range(25):
+            player = self.rng.choice(self.players)
+            links = list(ProPlayerGear.objects.filter(player=player))
+            with self.run_jobs_inline(), self.captureOnCommitCallbacks(execute=True):
+                if links and self.rng.random() < 0.4:
+                    self.rng.choice(links).delete()
+                elif links and self.rng.random() < 0.5:
+                    link = self.rng.choice(links)
+                    link.gear = self.rng.choice(self.gears)
+                    if not ProPlayerGear.objects.filter(player=player, gear=link.gear).exists():
+                        link.save()
+                else:
+                    gear = self.rng.choice(self.gears)
+                    ProPlayerGear.objects.get_or_create(player=player, gear=gear)
+
+            counts = cache.get(incremental_rules.STATE_KEY)
+            self.assertEqual(self.rules(counts.rules_frame()), self.rules(full.mine_association_rules()))
+
+        # The published index follows the counts without re-mining
+        with mock.patch.object(AssociationRuleMiner, 'mine_association_rules', side_effect=AssertionError):
+            association_rules._local[None]['checked_at'] = 0.0
+            index = miner.get_rule_index()
+        self.assertEqual(len(index), len(counts.rules_frame()))
+
+    def test_counted_and_mined_rules_share_the_itemset_cap(self):
+        miner = AssociationRuleMiner(min_support=0.02)
+        counts = incremental_rules.rebuild_rule_counts(miner)
+        self.assertEqual(max(map(len, counts.counts)), incremental_rules.MAX_ITEMSET_LEN)
+        self.assertEqual(self.rules(counts.rules_frame()), self.rules(miner.mine_association_rules()))
+        # Longer itemsets are frequent here, so the cap is what makes the two agree
+        uncapped = AssociationRuleMiner(min_support=0.02, max_len=10).mine_association_rules()
+        self.assertGreater(len(uncapped), len(counts.rules_frame()))
+
+    @mock.patch('APP01.association_rules.threading.Thread')
+    def test_commit_hook_only_logs_the_change(self, thread):
+        AssociationRuleMiner().refresh_cache()
+        with self.captureOnCommitCallbacks(execute=True):
+            ProPlayerGear.objects.filter(player=self.players[0]).delete()
+        # The state is left to the background job
+        self.assertTrue(incremental_rules.has_pending_changes())
+        thread.return_value.start.assert_called_once()
+
+        miner, job, partitions = thread.call_args.kwargs['args']
+        self.assertFalse(partitions)
+        association_rules._run_refresh_job(miner, job, partitions)
+        self.assertFalse(incremental_rules.has_pending_changes())
+        self.assertNotIn(self.players[0].pk, cache.get(incremental_rules.STATE_KEY).baskets)
+
+
+class RuleRefreshJobTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        leaderboards._boards = leaderboards.Leaderboards()
+        association_rules._local.clear()
+        self.rules = pd.DataFrame([{
+            'antecedents': frozenset(['1']), 'consequents': frozenset(['2']),
+            'confidence': 0.9, 'lift': 2.0, 'score': 1.8,
+        }])
+        self.miner = AssociationRuleMiner()
+
+    @mock.patch('APP01.association_rules.threading.Thread')
+    def test_stale_snapshot_is_served_while_one_job_refreshes(self, thread):
+        published = self.miner.publish_rules(self.rules)
+        with mock.patch.object(AssociationRuleMiner, 'CACHE_TIMEOUT', -1):
+            for _ in range(3):
+                association_rules._local[None]['checked_at'] = 0.0
+                self.assertIs(self.miner.get_rule_index(), published)
+        self.assertEqual(thread.call_count, 1)
+
+        _miner, job, _partitions = thread.call_args.kwargs['args']
+        with mock.patch.object(AssociationRuleMiner, 'compute_rules', return_value=self.rules):
+            association_rules._run_refresh_job(self.miner, job)
+        self.assertEqual(association_rules.get_refresh_job(job['id'])['status'], 'done')
+        self.assertIsNone(cache.get(association_rules.REFRESH_LOCK_KEY))
+        self.assertIsNot(self.miner.get_rule_index(), published)
+
+    @mock.patch('APP01.association_rules.threading.Thread')
+    def test_cold_start_does_not_mine_in_request(self, thread):
+        gear = GamingGear.objects.create(name='G', type='Mouse', brand='B', pro_usage_count=3)
+        with mock.patch.object(AssociationRuleMiner, 'compute_rules', side_effect=AssertionError):
+            recs = self.miner.get_recommendations([], top_n=1)
+        self.assertEqual([r['gear_id'] for r in recs], [gear.gear_id])
+        thread.return_value.start.assert_called_once()
+
+    @mock.patch('APP01.association_rules.threading.Thread')
+    def test_refresh_endpoint_returns_job(self, thread):
+        admin = User.objects.create_superuser('admin@example.com', 'admin', 'pw')
+        self.client.force_login(admin)
+        response = self.client.post('/api/admin/refresh-rules/')
+        self.assertEqual(response.status_code, 202)
+        status = self.client.get(response.json()['status_url']).json()
+        self.assertEqual((status['id'], status['status']), (response.json()['job_id'], 'queued'))
+        self.assertEqual(self.client.get('/api/admin/refresh-rules/missing/').status_code, 404)
+
+
+class GamePartitionTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        leaderboards._boards = leaderboards.Leaderboards()
+        association_rules._local.clear()
+        self.gears = [GamingGear.objects.create(name=f'G{i}', type='Mouse', brand='B') for i in range(5)]
+        self.games = [Game.objects.create(name=name) for name in ('Valorant', 'CS2', 'Apex')]
+        # Gear 0 goes with 1 for Valorant pros and with 2 for CS2 pros; Apex is too small for a partition
+        valorant, cs2, apex = self.games
+        baskets = (
+            [(valorant, (0, 1))] * 15 + [(valorant, (3, 4))] * 10
+            + [(cs2, (0, 2))] * 15 + [(cs2, (3, 4))] * 10 + [(apex, (0, 1))] * 5
+        )
+        for i, (game, basket) in enumerate(baskets):
+            player = ProPlayer.objects.create(name=f'P{i}', game=game)
+            ProPlayerGear.objects.bulk_create(ProPlayerGear(player=player, gear=self.gears[g]) for g in basket)
+
+    def recommended(self, game=None):
+        # Popular gears pad the list up to top_n, so leave no room for them
+        recs = AssociationRuleMiner().get_recommendations([self.gears[0].gear_id], top_n=1, game=game)
+        return {self.gears.index(r['gear']) for r in recs}
+
+    def test_games_get_their_own_rules(self):
+        miner = AssociationRuleMiner()
+        self.assertTrue(miner.refresh_cache(max_workers=0))
+        self.assertEqual(set(association_rules._local), {None, self.games[0].pk, self.games[1].pk})
+
+        self.assertEqual(self.recommended(self.games[0].pk), {1})
+        self.assertEqual(self.recommended(self.games[1].pk), {2})
+        # No partition: all pros' rules
+        self.assertEqual(self.recommended(), {1})
+        self.assertEqual(self.recommended(self.games[2].pk), {1})
+
+    def test_missing_partition_is_cached_per_process(self):
+        miner = AssociationRuleMiner()
+        apex = self.games[2].pk
+        self.assertIsNone(miner.get_rule_index(apex))
+        with mock.patch.object(association_rules, 'cache') as shared:
+            self.assertIsNone(miner.get_rule_index(apex))
+            association_rules._local[apex]['checked_at'] = 0.0
+            shared.get.return_value = None
+            self.assertIsNone(miner.get_rule_index(apex))
+        # Only the version key is re-read once the check interval has passed
+        shared.get.assert_called_once_with(association_rules._version_key(apex))
+
+    def test_game_without_baskets_mines_nothing(self):
+        # Apex has one pro with a single-gear basket, another with none
+        apex = self.games[2]
+        ProPlayerGear.objects.filter(player__game=apex).delete()
+        ProPlayerGear.objects.create(player=ProPlayer.objects.filter(game=apex).first(), gear=self.gears[0])
+        miner = AssociationRuleMiner()
+        with mock.patch.object(association_rules, 'PARTITION_MIN_TRANSACTIONS', 0), \
+                mock.patch.object(AssociationRuleMiner, 'build_transaction_data', side_effect=AssertionError):
+            mined = miner.refresh_game_partitions(max_workers=0)
+        self.assertEqual(mined[apex.pk], 0)
+        self.assertIsNone(cache.get(association_rules._version_key(apex.pk)))
+        self.assertTrue(association_rules._mine_partition(miner.options(), TransactionMatrix.from_rows()).empty)
+
+    def test_worker_pool_matches_inline_mining(self):
+        miner = AssociationRuleMiner()
+        inline = miner.refresh_game_partitions(max_workers=0)
+        self.assertEqual(miner.refresh_game_partitions(max_workers=2), inline)
+
+
+class LeaderboardTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        leaderboards._boards = leaderboards.Leaderboards()
+        rng = random.Random(5)
+        self.games = [Game.objects.create(name=name) for name in ('Valorant', 'CS2')]
+        self.gears = [
+            GamingGear.objects.create(name=f'G{i % 4}', type=rng.choice(['Mouse', 'Keyboard']), brand='B')
+            for i in range(12)
+        ]
+        self.players = [ProPlayer.objects.create(name=f'P{i}', game=self.games[i % 2]) for i in range(20)]
+        for player in self.players:
+            for gear in rng.sample(self.gears, 3):
+                ProPlayerGear.objects.create(player=player, gear=gear)
+
+    def expected(self, gear_type=None, game=None):
+        ranked = []
+        for gear in GamingGear.objects.all():
+            count = gear.pro_usage_count if game is None else gear.pro_usage_by_game.get(str(game), 0)
+            if (gear_type is None or gear.type == gear_type) and (game is None or count):
+                ranked.append((-count, gear.name, gear.gear_id))
+        return [gear_id for _count, _name, gear_id in sorted(ranked)]
+
+    def assertBoardsCurrent(self):
+        for gear_type in (None, 'Mouse', 'Keyboard'):
+            for game in (None, *(g.pk for g in self.games)):
+                self.assertEqual(leaderboards.top_gear_ids(100, gear_type, game), self.expected(gear_type, game))
+
+    @mock.patch('APP01.association_rules.threading.Thread')
+    def test_boards_follow_usage_changes(self, _thread):
+        self.assertBoardsCurrent()
+        with self.assertNumQueries(0):
+            leaderboards.top_gear_ids(3, 'Mouse', self.games[0].pk)
+
+        rare = self.expected()[-1]
+        with self.captureOnCommitCallbacks(execute=True):
+            for player in self.players[:8]:
+                ProPlayerGear.objects.get_or_create(player=player, gear_id=rare)
+            self.gears[0].delete()
+        # One query re-reads the changed rows, every built board is patched in place
+        with self.assertNumQueries(1):
+            self.assertEqual(leaderboards.top_gear_ids(1), [rare])
+        self.assertBoardsCurrent()
+
+        top = self.expected('Keyboard')
+        gears = leaderboards.popular_gears(2, 'Keyboard', exclude={top[0]}, fields=('gear_id', 'name'))
+        self.assertEqual([g.gear_id for g in gears], top[1:3])
@@ -25,6 +25,7 @@ urlpatterns = [
     path('wizard/add/<int:gear_id>/', views.wizard_add_gear, name='wizard_add_gear'),
     path('wizard/remove/<int:gear_id>/', views.wizard_remove_gear, name='wizard_remove_gear'),
     path('wizard/load-preset/<str:variant_name>/', views.wizard_load_preset, name='wizard_load_preset'),
+    path('wizard/pro-match/', views.wizard_pro_match, name='wizard_pro_match'),
 
     
     # Temporary Preset Editing (Session based)
@@ -104,4 +105,9 @@ urlpatterns = [
     # Association Rules API
     path('api/recommendations/', api_views.api_gear_recommendations, name='api_gear_recommendations'),
     path('api/admin/refresh-rules/', api_views.api_refresh_association_rules, name='api_refresh_association_rules'),
+    path('api/admin/refresh-rules/<str:job_id>/', api_views.api_association_rules_job, name='api_association_rules_job'),
+    # Pros who play like you (eDPI / sensitivity)
+    path('api/pro-matches/', api_views.api_pro_matches, name='api_pro_matches'),
+    path('api/budget-setups/', api_views.api_budget_setups, name='api_budget_setups'),
+    path('api/metrics/', api_views.api_metrics, name='api_metrics'),
 ]
\ No newline at end of file
@@ -17,9 +17,12 @@ from django.db.models.functions import TruncDate # เพิ่ม import นี
 
 import json # เพิ่ม import นี้สำหรับ json.loads
 
-from .models import User, Role, ProPlayer, GamingGear, Preset, Alert, ProPlayerGear, PresetGear, AdminLog
+from .models import User, Role, ProPlayer, GamingGear, Preset, Alert, ProPlayerGear, PresetGear, AdminLog, Game
 from .forms import RegisterForm, ProPlayerForm, GamingGearForm, PresetForm, LoginForm, UserEditForm
-from .recommender_hybrid import HybridRecommender
+from .instrumentation import timed
+from .leaderboards import popular_gears
+from .pro_matching import find_similar_pros, parse_setting
+from .quiz_results import get_quiz_variants
 
 
 # from tensorflow.keras.models import load_model # ตัวอย่างการโหลดโมเดล AI
@@ -322,6 +325,7 @@ def wizard_quiz(request):
     """Render the detailed Playstyle Quiz."""
     return render(request, 'APP01/quiz.html')
 
+@timed('view.process_quiz')
 def process_quiz(request):
     """Process quiz results and run Hybrid Recommendation Logic."""
     if request.method == 'POST':
@@ -330,23 +334,22 @@ def process_quiz(request):
             'hand_size': request.POST.get('hand_size'),
             'grip': request.POST.get('grip')
         }
-        # Run Recommender
-        recommender = HybridRecommender()
-        variants = recommender.recommend_variant_setups(user_prefs)
+        # Precomputed lookup for known quiz answers (see quiz_results.py)
+        variants_data = get_quiz_variants(user_prefs)
         
         # We default to 'Performance' as the main preset
-        best_setup = variants.get('Performance', {})
+        best_setup = variants_data.get('Performance', {}).get('gears', {})
         
         # Extract Best Matches for Default View
-        best_gears = []
-        ai_reasons = [] # We might need to fetch individual reasons again or refactor to get them from variant
+        best_gear_ids = []
+        ai_reasons = []
         
         # Helper to extract list from setup dict
         categories = ['Mouse', 'Keyboard', 'Headset', 'Monitor', 'Chair']
         for cat in categories:
             gear_entry = best_setup.get(cat)
             if gear_entry: 
-                best_gears.append(gear_entry['gear'])
+                best_gear_ids.append(gear_entry['id'])
                 # Extract specific AI reasons for this gear
                 # Convert list of reasons to single string or just take top reason
                 reasons_list = gear_entry.get('reasons', [])
@@ -356,36 +359,16 @@ def process_quiz(request):
                 else:
                     ai_reasons.append(f"{cat}: Best spec match for your preferences")
 
-        if best_gears:
+        if best_gear_ids:
             # Setup session for matching_result
             match_result = request.session.get('match_result', {})
             if not match_result:
                 match_result = {}
             
             # 1. Store Default Performance Preset (IDs)
-            request.session['wizard_preset'] = [g.gear_id for g in best_gears]
+            request.session['wizard_preset'] = best_gear_ids
             
             # 2. Store Variants (IDs) for Comparison Tab
-            variants_data = {}
-            for v_name, v_data in variants.items():
-                variants_data[v_name] = {
-                    'desc': v_data.get('desc', ''),
-                    'badge': v_data.get('badge', ''),
-                    'analysis': v_data.get('analysis', ''),
-                    'pros': v_data.get('pros', []),
-                    'cons': v_data.get('cons', []),
-                    'gears': {}
-                }
-                for cat in categories:
-                    g_entry = v_data.get(cat)
-                    if g_entry:
-                        # Store detailed info for reconstruction in result page
-                        variants_data[v_name]['gears'][cat] = {
-                            'id': g_entry['gear'].gear_id,
-                            'reasons': g_entry.get('reasons', []),
-                            'score': g_entry.get('score', 0)
-                        }
-            
             match_result['variants'] = variants_data
 
             # Store AI Context
@@ -393,7 +376,7 @@ def process_quiz(request):
             match_result['ai_reasons'] = ai_reasons
             
             # Use calculated score from Performance variant (or 0 if missing)
-            perf_variant = variants.get('Performance', {})
+            perf_variant = variants_data.get('Performance', {})
             match_result['ai_score'] = perf_variant.get('score', 0)
             
             match_result['uploaded_image_url'] = None 
@@ -405,6 +388,32 @@ def process_quiz(request):
             messages.error(request, "Could not find suitable gear. Please try different options.")
             return redirect('wizard_quiz')
 
+def wizard_pro_match(request):
+    """"Pros who play like you": nearest pros by DPI / sensitivity for a game."""
+    games = Game.objects.filter(
+        pro_players__edpi__isnull=False, pro_players__sensitivity__isnull=False
+    ).distinct().order_by('name')
+
+    matches = None
+    form_values = {
+        'game': request.GET.get('game', ''),
+        'dpi': request.GET.get('dpi', ''),
+        'sensitivity': request.GET.get('sensitivity', ''),
+    }
+    if form_values['game'] and form_values['dpi'] and form_values['sensitivity']:
+        try:
+            matches = find_similar_pros(
+                int(form_values['game']), parse_setting(form_values['dpi']), parse_setting(form_values['sensitivity'])
+            )
+        except ValueError:
+            messages.error(request, "กรุณากรอก DPI และ Sensitivity เป็นตัวเลขที่มากกว่า 0")
+
+    return render(request, 'APP01/wizard_pro_match.html', {
+        'games': games,
+        'matches': matches,
+        'form_values': form_values,
+    })
+
 def wizard_select_gear(request, category):
     """
     Step 2: User selects a specific gear from a category.
@@ -422,18 +431,16 @@ def wizard_select_gear(request, category):
         gears = gears.filter(brand__in=selected_brands)
         
     # 4. Handle Sorting
-    # Annotate with Pro Count for popularity sorting
-    gears = gears.annotate(pro_count=Count('proplayergear'))
-    
+    # Popularity uses the denormalized (indexed) pro_usage_count column
     sort_price = request.GET.get('sort_price') # 'asc', 'desc'
     sort_pros = request.GET.get('sort_pros')   # 'asc', 'desc'
     
     ordering = []
     
     if sort_pros == 'desc':
-        ordering.append('-pro_count')
+        ordering.append('-pro_usage_count')
     elif sort_pros == 'asc':
-        ordering.append('pro_count')
+        ordering.append('pro_usage_count')
         
     if sort_price == 'asc':
         ordering.append('price')
@@ -442,7 +449,7 @@ def wizard_select_gear(request, category):
         
     # Default sorting if nothing selected (Popularity then Name)
     if not ordering:
-        ordering = ['-pro_count', 'name']
+        ordering = ['-pro_usage_count', 'name']
         
     gears = gears.order_by(*ordering)
     
@@ -569,6 +576,7 @@ def upload_image_and_match(request):
 
 
 
+@timed('view.matching_result')
 def matching_result(request):
     # DEBUG
     import logging
@@ -607,8 +615,11 @@ def matching_result(request):
     from APP01.association_rules import get_gear_recommendations
     
     # Get top 5 recommendations, excluding types we already have?
-    # For now, just get general recommendations
-    recommendations = get_gear_recommendations(selected_gear_ids, top_n=5)
+    # For now, just get general recommendations (from one game's pros with ?game=<id>)
+    game = request.GET.get('game')
+    recommendations = get_gear_recommendations(
+        selected_gear_ids, top_n=5, game=int(game) if game and game.isdigit() else None
+    )
     
     # === Inflate Variants (Multi-Preset) ===
     match_result_session = request.session.get('match_result', {})
@@ -799,8 +810,16 @@ def gear_detail(request, gear_id):
                 'game_logo': p.game_logo_url
             })
 
-        # หาอุปกรณ์อื่นๆ ในประเภทเดียวกัน (ไม่รวมตัวเอง)
-        related_qs = GamingGear.objects.filter(type=gear_obj.type).exclude(gear_id=gear_id)[:16] # Increase limit to 16 for "View All"
+        # อุปกรณ์ที่สเปคใกล้เคียงที่สุด (precomputed โดย similar_gear.py)
+        similar_ids = gear_obj.similar_gear_ids or []
+        if similar_ids:
+            similar = GamingGear.objects.only('gear_id', 'name', 'type', 'image').in_bulk(similar_ids)
+            related_qs = [similar[gid] for gid in similar_ids if gid in similar]
+        else:
+            # ยังไม่ได้ build index: ใช้อุปกรณ์ยอดนิยมในประเภทเดียวกันแทน
+            related_qs = popular_gears(
+                16, gear_type=gear_obj.type, exclude={gear_obj.gear_id}, fields=('gear_id', 'name', 'type', 'image')
+            )
         for r in related_qs:
             related_gears.append({
                 'gear_id': r.gear_id,
@@ -986,17 +1005,15 @@ def search_gear(request):
     if selected_brands:
         gears = gears.filter(brand__in=selected_brands)
 
-    # 3. Handling Sorting
-    gears = gears.annotate(pro_count=Count('proplayergear'))
-    
+    # 3. Handling Sorting (pro_usage_count is denormalized and indexed)
     sort_price = request.GET.get('sort_price')
     sort_pros = request.GET.get('sort_pros')
     
     ordering = []
     if sort_pros == 'desc':
-        ordering.append('-pro_count')
+        ordering.append('-pro_usage_count')
     elif sort_pros == 'asc':
-        ordering.append('pro_count')
+        ordering.append('pro_usage_count')
         
     if sort_price == 'asc':
         ordering.append('price')
@@ -1004,7 +1021,7 @@ def search_gear(request):
         ordering.append('-price')
         
     if not ordering:
-        ordering = ['-pro_count', 'name']
+        ordering = ['-pro_usage_count', 'name']
         
     gears = gears.order_by(*ordering)
         
@@ -83,7 +83,8 @@ AUTHENTICATION_BACKENDS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Static files in production
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'APP01.middleware.StageTimingMiddleware',  # Recommender stage timings (/api/metrics/, Server-Timing)
+    'APP01.middleware.TimedSessionMiddleware',  # SessionMiddleware + session.save timing
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -177,6 +178,15 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Memory-mapped recommender arrays shared by all workers (manage.py build_feature_store)
+FEATURE_STORE_DIR = env('FEATURE_STORE_DIR', default=str(BASE_DIR / 'feature_store'))
+
+# Live recommender rule table (manage.py activate_scoring_rules); APP01/default_scoring_rules.json when absent
+SCORING_RULES_FILE = env('SCORING_RULES_FILE', default=str(BASE_DIR / 'scoring_rules.json'))
+
+# Send recommender stage timings as a Server-Timing response header
+SERVER_TIMING = env.bool('SERVER_TIMING', default=DEBUG)
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field